@@ -1,39 +1,126 @@
 import streamlit as st
 from config.settings import Settings
 from jarvis.gemini_engine import GeminiEngine
-from jarvis.memory import Memory
+from jarvis.engine import CachingEngine
+from jarvis.cache import PersistentCache
+from jarvis.session_store import SessionManager
+from jarvis.sqlite_memory import ConversationDatabase
 from jarvis.prompt_controller import PromptController
 from jarvis.assistant import JarvisAssistant
-from jarvis.voice_io import take_command, text_to_audio_file
+from jarvis.actions import ActionHandler
+from jarvis.voice_io import take_command, voice_input_available
+from jarvis.tts_cache import TTSCache
+from jarvis.presynth import PreSynthesizer
+from jarvis.metrics import metrics
+from jarvis.lazy_import import warm_up
+from jarvis.exporter import FORMATS, iter_export
+import io
 import os
 import datetime
-import time
+import uuid
+
+# Number of messages drawn per page; older ones are shown on request.
+PAGE_SIZE = 20
 
 # --- INITIALIZATION ---
 @st.cache_resource
-def initialize_assistant():
+def initialize_shared_services():
+    """
+    Creates the engine, session store, action handler and (for the SQLite
+    backend) database shared by every browser session. The actions control
+    one machine, so every session shares one executor, music player and
+    shuffle history: "stop the music" stops a song started in another tab.
+    """
     settings = Settings()
     api_key = settings.load_api_key()
     if not api_key: return None
-    engine = GeminiEngine(api_key=api_key)
-    memory = Memory(file_path="jarvis/conversation_history.json")
-    prompt_controller = PromptController()
-    return JarvisAssistant(engine=engine, prompt_controller=prompt_controller, memory=memory)
+    # Identical prompts (e.g. common one-shot questions) are answered from the cache
+    engine = CachingEngine(
+        GeminiEngine(api_key=api_key),
+        cache=PersistentCache("jarvis/response_cache.sqlite3", max_entries=1000, ttl=24 * 3600)
+    )
+    if settings.load_memory_backend() == "sqlite":
+        database = ConversationDatabase("jarvis/conversations.sqlite3")
+        sessions = SessionManager(storage_dir="jarvis/sessions", memory_factory=database.memory)
+    else:
+        database = None
+        sessions = SessionManager(storage_dir="jarvis/sessions")
+    return engine, sessions, database, ActionHandler()
 
-assistant = initialize_assistant()
+@st.cache_resource
+def initialize_tts_cache():
+    return TTSCache(cache_dir="jarvis/tts_cache")
+
+@st.cache_resource
+def initialize_presynth():
+    """Starts the background synthesis of replies, shared by every browser session."""
+    return PreSynthesizer(initialize_tts_cache())
+
+@st.cache_resource
+def start_warm_up():
+    """Imports the heavy libraries in the background once per process, after the first page is shown."""
+    return warm_up(["google.generativeai", "gtts", "wikipedia", "speech_recognition", "numpy"])
+
+def get_session_id():
+    """Returns this browser session's ID, kept in the URL so a reload keeps the conversation."""
+    session_id = st.query_params.get("sid")
+    if not session_id:
+        session_id = uuid.uuid4().hex
+        st.query_params["sid"] = session_id
+    return session_id
+
+def initialize_assistant():
+    """Creates this session's assistant on top of the shared services."""
+    shared = initialize_shared_services()
+    if not shared: return None
+    if "assistant" not in st.session_state:
+        engine, sessions, _, action_handler = shared
+        memory = sessions.get(get_session_id())
+        st.session_state.assistant = JarvisAssistant(engine=engine, prompt_controller=PromptController(), memory=memory,
+                                                     action_handler=action_handler)
+    return st.session_state.assistant
+
+def prepare_export(turns, fmt, date_range):
+    """
+    Builds a conversation export for the download button, streaming the
+    turns through the exporter in chunks.
+
+    Returns:
+        dict: File name, MIME type, encoded data and number of exported turns.
+    """
+    exported = 0
+    def count(turns):
+        nonlocal exported
+        for turn in turns:
+            exported += 1
+            yield turn
+    since, until = (list(date_range) + [None, None])[:2]
+    buffer = io.BytesIO()
+    for chunk in iter_export(count(turns), fmt, since=since, until=until):
+        buffer.write(chunk.encode("utf-8"))
+    extension, mime = FORMATS[fmt]
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return {"name": f"conversation_export_{timestamp}.{extension}", "mime": mime,
+            "data": buffer.getvalue(), "turns": exported}
 
 # --- UI SETUP ---
 st.set_page_config(page_title="JARVIS", page_icon="🤖", layout="wide")
 
+assistant = initialize_assistant()
+presynth = initialize_presynth()
+
 if not assistant:
     st.error("FATAL: JARVIS could not be initialized. Check your GEMINI_API_KEY.")
     st.stop()
 
-# Initialize session state
+def new_message_id():
+    return uuid.uuid4().hex
+
+# Initialize session state. Every message gets an ID, under which its audio is pre-synthesized.
 if "messages" not in st.session_state:
-    st.session_state.messages = assistant.memory.get_history()
-if "play_audio_for_index" not in st.session_state:
-    st.session_state.play_audio_for_index = None
+    st.session_state.messages = [dict(message, id=new_message_id()) for message in assistant.memory.get_history()]
+if "visible_messages" not in st.session_state:
+    st.session_state.visible_messages = PAGE_SIZE
 
 # --- SIDEBAR ---
 with st.sidebar:
@@ -56,63 +143,129 @@ with st.sidebar:
     st.markdown("---")
     
     with st.expander("🎙️ Voice Command"):
-        if st.button("Start Listening"):
+        voice_available = voice_input_available()
+        if not voice_available:
+            st.caption("Voice input needs the SpeechRecognition and PyAudio packages.")
+        if st.button("Start Listening", disabled=not voice_available):
             st.toast("Listening...")
+            # The main area below runs after the sidebar, so the prompt is answered in this same run.
             st.session_state.prompt_from_voice = take_command()
             if not st.session_state.get("prompt_from_voice"):
                 st.toast("Could not recognize speech.")
-            else:
-                st.rerun()
 
     st.markdown("---")
 
     with st.expander("📜 Conversation"):
         if st.button("Clear Conversation History"):
+            for message in st.session_state.messages:
+                presynth.cancel(message["id"])
             assistant.clear_memory()
             st.session_state.messages = []
-            st.session_state.play_audio_for_index = None
+            st.session_state.visible_messages = PAGE_SIZE
+            st.session_state.pop("export", None)
             st.toast("Conversation cleared!")
-            st.rerun()
-            
-        # Export Conversation button
-        history_content = assistant.memory.get_exported_history_content()
-        if history_content:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"conversation_export_{timestamp}.json"
+
+        # The export is only generated when asked for, never on an ordinary rerun.
+        database = initialize_shared_services()[2]
+        with st.form("export_form", border=False):
+            export_format = st.selectbox("Export format", list(FORMATS),
+                                         format_func=lambda name: {"json": "JSON", "jsonl": "JSON lines",
+                                                                   "markdown": "Markdown"}[name])
+            date_range = st.date_input("Only these dates (optional)", value=())
+            scope = "This conversation"
+            if database is not None:
+                scope = st.radio("Conversations", ("This conversation", "All conversations"), horizontal=True)
+            if st.form_submit_button("Export Conversation"):
+                turns = database.iter_turns() if scope == "All conversations" else assistant.memory.iter_turns()
+                st.session_state.export = prepare_export(turns, export_format, date_range)
+        # The file is kept only until it is downloaded or the conversation moves on,
+        # so later reruns neither resend it nor offer a stale copy.
+        export = st.session_state.get("export")
+        if export and export["turns"]:
             st.download_button(
-                label="Export Conversation",
-                data=history_content,
-                file_name=filename,
-                mime="application/json",
-                key="download_conversation"
+                label=f"Download {export['name']} ({export['turns']} messages)",
+                data=export["data"],
+                file_name=export["name"],
+                mime=export["mime"],
+                key="download_conversation",
+                on_click=lambda: st.session_state.pop("export", None)
             )
-        else:
+        elif export:
             st.info("No conversation history to export.")
 
+    st.markdown("---")
+
+    with st.expander("⏱️ Latency"):
+        # Timings are process-wide, so they cover every open session: the toggle
+        # shows the shared state, and only clicking it changes that state.
+        def toggle_timings():
+            if st.session_state.record_timings:
+                metrics.enable()
+            else:
+                metrics.disable()
+        st.session_state.record_timings = metrics.enabled
+        st.toggle("Record timings", key="record_timings", on_change=toggle_timings)
+        summary = metrics.summary()
+        if summary:
+            st.table([
+                {"span": name, "count": stats["count"], "p50 (ms)": round(stats["p50"], 1),
+                 "p90 (ms)": round(stats["p90"], 1), "p99 (ms)": round(stats["p99"], 1)}
+                for name, stats in summary.items()
+            ])
+            st.download_button(
+                label="Download Prometheus metrics",
+                data=metrics.prometheus_text(),
+                file_name="jarvis_metrics.prom",
+                mime="text/plain",
+                key="download_metrics"
+            )
+        elif metrics.enabled:
+            st.info("No timings recorded yet.")
+
 # --- MAIN INTERFACE ---
 st.title("🤖 JARVIS – Your AI Assistant")
 
-# Display chat history
-for i, message in enumerate(st.session_state.messages):
+def play_audio(message_id, text):
+    """Plays a message, from audio pre-synthesized in the background where possible."""
+    with st.spinner("Generating audio..."):
+        audio_bytes = presynth.audio(message_id, text, accent=voice_accent)
+    if audio_bytes:
+        st.audio(audio_bytes, format="audio/mp3", autoplay=True)
+    else:
+        st.error("Could not generate audio file.")
+
+@st.fragment
+def render_message(index, message, autoplay=False):
+    """
+    Draws one message. Each message is its own fragment, so clicking its play
+    button reruns only this message instead of the whole page. With
+    `autoplay`, an assistant message is played as soon as it is drawn.
+    """
     with st.chat_message(message["role"]):
+        if message["role"] != "assistant":
+            st.markdown(message["content"])
+            return
         col1, col2 = st.columns([4, 1])
+        with col2:
+            play = st.button("▶️", key=f"play_{index}", help="Play this message")
         with col1:
             st.markdown(message["content"])
-            # Handle audio playback UI
-            if st.session_state.play_audio_for_index == i:
-                with st.spinner("Generating audio..."):
-                    audio_file = text_to_audio_file(message["content"], accent=voice_accent)
-                    if audio_file:
-                        st.audio(audio_file, autoplay=True)
-                        # Reset the index to hide the player on the next run
-                        st.session_state.play_audio_for_index = None
-                    else:
-                        st.error("Could not generate audio file.")
-        with col2:
-            if message["role"] == "assistant":
-                if st.button("▶️", key=f"play_{i}", help="Play this message"):
-                    st.session_state.play_audio_for_index = i
-                    st.rerun()
+            if play or autoplay:
+                play_audio(message["id"], message["content"])
+
+# Only the latest page of the history is drawn, so a rerun costs the same
+# however long the conversation is.
+messages = st.session_state.messages
+first_visible = max(0, len(messages) - st.session_state.visible_messages)
+if first_visible > 0:
+    if st.button(f"Show earlier messages ({first_visible} hidden)"):
+        st.session_state.visible_messages += PAGE_SIZE
+        first_visible = max(0, len(messages) - st.session_state.visible_messages)
+for i in range(first_visible, len(messages)):
+    render_message(i, messages[i])
+
+# The page is on screen now; load the heavy libraries in the background
+start_warm_up()
 
 # Determine prompt and input method
 is_voice_input = False
@@ -122,27 +275,24 @@ if prompt_to_process:
 else:
     prompt_to_process = st.chat_input("Ask JARVIS...")
 
-# Process prompt and update chat
+# Process prompt and update chat. The new messages are drawn here, in place,
+# without rerunning the page.
 if prompt_to_process:
-    st.session_state.messages.append({"role": "user", "content": prompt_to_process})
-    with st.chat_message("user"):
-        st.markdown(prompt_to_process)
-
-    with st.chat_message("assistant"):
-        with st.spinner("JARVIS is thinking..."):
-            placeholder = st.empty()
-            time.sleep(1)
-            placeholder.empty()
+    st.session_state.pop("export", None)
+    messages.append({"role": "user", "content": prompt_to_process, "id": new_message_id()})
+    render_message(len(messages) - 1, messages[-1])
 
-            response_stream = assistant.respond_stream(prompt_to_process, role="Default")
+    message_id = new_message_id()
+    reply = st.empty()
+    with reply.container():
+        with st.chat_message("assistant"):
+            # Each sentence is synthesized in the background as soon as it has streamed in.
+            response_stream = presynth.stream(message_id, assistant.respond_stream(prompt_to_process, role="Default"),
+                                              accent=voice_accent)
             full_response = st.write_stream(response_stream)
-    
-    st.session_state.messages.append({"role": "assistant", "content": full_response})
 
-    # If the input was voice, automatically play the response
-    if is_voice_input:
-        # Set the index of the message to be played to the last one (the one we just added)
-        st.session_state.play_audio_for_index = len(st.session_state.messages) - 1
-        st.rerun()
-    else:
-        st.rerun()
\ No newline at end of file
+    messages.append({"role": "assistant", "content": full_response, "id": message_id})
+    # Redraw the finished reply as a regular message, with its play button. If
+    # the input was voice, the response is played automatically.
+    with reply.container():
+        render_message(len(messages) - 1, messages[-1], autoplay=is_voice_input and bool(full_response))
@@ -0,0 +1,66 @@
+"""
+Measures the wall-clock time of a Wikipedia search action when the spoken
+announcements block the network fetch (the old ActionHandler) versus when
+they are spoken while the fetch runs on the ActionExecutor.
+
+Speech and the network are simulated with FakeSpeechEngine and
+FakeWikipediaFetcher, so the expected times are known: the overlapped
+action should take about max(speech, fetch) instead of their sum.
+
+Usage:
+    python -m benchmarks.bench_actions [fetch_ms] [ms_per_word]
+"""
+import sys
+import time
+
+from jarvis.actions import ActionHandler
+from jarvis.cache import PersistentCache
+from jarvis.fakes import FakeSpeechEngine, FakeWikipediaFetcher
+from jarvis.speech_service import SpeechService
+from jarvis.wiki_search import WikipediaSearch
+
+QUERIES = ["alan turing", "grace hopper", "ada lovelace"]
+
+
+def make_search(fetch_delay):
+    pages = {query: f"{query.title()} was a pioneer of computing." for query in QUERIES}
+    return WikipediaSearch(cache=PersistentCache(":memory:"), fetcher=FakeWikipediaFetcher(pages, delay=fetch_delay))
+
+
+def legacy_search(search, speak, query):
+    speak(f"Searching Wikipedia for {query}...")
+    results = search.summary(query)
+    speak("According to Wikipedia")
+    return results
+
+
+def main(fetch_ms=400, ms_per_word=100):
+    service = SpeechService(engine_factory=lambda: FakeSpeechEngine(seconds_per_word=ms_per_word / 1000)).start()
+
+    search = make_search(fetch_ms / 1000)
+    legacy = 0.0
+    for query in QUERIES:
+        start = time.perf_counter()
+        legacy_search(search, service.say, query)
+        legacy += time.perf_counter() - start
+
+    handler = ActionHandler(wikipedia_search=make_search(fetch_ms / 1000), speak=service.say)
+    answer = spoken = 0.0
+    for query in QUERIES:
+        start = time.perf_counter()
+        handler.search_wikipedia(query)
+        answer += time.perf_counter() - start
+        service.say("", block=True)  # Waits until the queued announcements have been spoken.
+        spoken += time.perf_counter() - start
+    handler.shutdown()
+    service.shutdown()
+
+    announcement_ms = ms_per_word * len("Searching Wikipedia for alan turing...".split())
+    print(f"simulated fetch {fetch_ms} ms, announcement ~{announcement_ms} ms")
+    print(f"blocking announcements, answer and speech done: {legacy / len(QUERIES) * 1000:8.1f} ms")
+    print(f"overlapped, answer ready:                       {answer / len(QUERIES) * 1000:8.1f} ms")
+    print(f"overlapped, announcements spoken:               {spoken / len(QUERIES) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
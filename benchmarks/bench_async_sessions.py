@@ -0,0 +1,64 @@
+"""
+Compares conversation throughput of the blocking API (one session after
+another) with the async API (all sessions sharing one event loop), using
+FakeEngine with a simulated network latency.
+
+Usage:
+    python -m benchmarks.bench_async_sessions [sessions] [turns]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from jarvis.assistant import JarvisAssistant
+from jarvis.fakes import FakeEngine
+from jarvis.memory import Memory
+from jarvis.prompt_controller import PromptController
+
+
+def make_sessions(engine, count, directory):
+    return [
+        JarvisAssistant(engine=engine, prompt_controller=PromptController(),
+                        memory=Memory(file_path=os.path.join(directory, f"session_{i}.jsonl")))
+        for i in range(count)
+    ]
+
+
+def run_sync(assistants, turns):
+    for turn in range(turns):
+        for index, assistant in enumerate(assistants):
+            assistant.respond(f"session {index} question {turn}")
+
+
+async def run_async(assistants, turns):
+    async def conversation(index, assistant):
+        for turn in range(turns):
+            await assistant.respond_async(f"session {index} question {turn}")
+    await asyncio.gather(*(conversation(i, a) for i, a in enumerate(assistants)))
+
+
+def main(sessions=50, turns=4):
+    engine = FakeEngine(first_token_delay=0.05, chunk_delay=0.005, chunks=5)
+    total = sessions * turns
+    with tempfile.TemporaryDirectory() as directory:
+        os.makedirs(os.path.join(directory, "sync"))
+        assistants = make_sessions(engine, sessions, os.path.join(directory, "sync"))
+        start = time.perf_counter()
+        run_sync(assistants, turns)
+        sync_seconds = time.perf_counter() - start
+
+        os.makedirs(os.path.join(directory, "async"))
+        assistants = make_sessions(engine, sessions, os.path.join(directory, "async"))
+        start = time.perf_counter()
+        asyncio.run(run_async(assistants, turns))
+        async_seconds = time.perf_counter() - start
+
+    print(f"{sessions} sessions x {turns} turns against FakeEngine")
+    print(f"sync  (sequential):      {sync_seconds:7.2f}s  {total / sync_seconds:8.1f} turns/s")
+    print(f"async (one event loop):  {async_seconds:7.2f}s  {total / async_seconds:8.1f} turns/s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
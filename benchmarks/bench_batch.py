@@ -0,0 +1,46 @@
+"""
+Measures batch-mode throughput: thousands of queries run through
+JarvisAssistant and the BatchRunner against FakeEngine with a simulated
+network latency, at increasing concurrency.
+
+Usage:
+    python -m benchmarks.bench_batch [queries] [latency_ms]
+"""
+import asyncio
+import io
+import sys
+
+from jarvis.actions import ActionHandler
+from jarvis.assistant import JarvisAssistant
+from jarvis.batch import BatchRunner
+from jarvis.fakes import FakeEngine
+from jarvis.memory import Memory
+from jarvis.prompt_controller import PromptController
+
+CONCURRENCY = (1, 16, 128, 512)
+
+
+def make_queries(count):
+    # One in ten queries is a command ("what is your name"), as in a real regression file.
+    for index in range(1, count + 1):
+        query = "what is your name" if index % 10 == 0 else f"question number {index} about the weather"
+        yield index, {"id": index, "query": query}
+
+
+def main(count=5000, latency_ms=20):
+    engine = FakeEngine(first_token_delay=latency_ms / 1000, chunk_delay=latency_ms / 5000)
+    action_handler = ActionHandler()
+    make_assistant = lambda: JarvisAssistant(engine=engine, prompt_controller=PromptController(),
+                                             memory=Memory(file_path=None), action_handler=action_handler)
+    print(f"{count} queries, FakeEngine first token after {latency_ms} ms")
+    for concurrency in CONCURRENCY:
+        queries = count if concurrency > 1 else min(count, 200)
+        runner = BatchRunner(make_assistant, concurrency=concurrency)
+        summary = asyncio.run(runner.run(make_queries(queries), io.StringIO()))
+        print(f"concurrency {concurrency:>4}: {summary['queries_per_second']:8.1f} queries/s  "
+              f"p50 {summary['p50_ms']:7.1f} ms  p99 {summary['p99_ms']:7.1f} ms  errors {summary['errors']}")
+    action_handler.shutdown()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,69 @@
+"""
+Compares the cost of routing a query through the CommandRouter with the
+substring if/elif chain it replaced, as the number of commands grows.
+
+Only matching is timed; no command handler is executed.
+
+Usage:
+    python -m benchmarks.bench_command_router
+"""
+import time
+
+from jarvis.assistant import JarvisAssistant
+
+# The substring checks of the old `_handle_commands`, in their original order.
+LEGACY_CHECKS = [
+    ('your name',), ('how are you',), ('who made you',), ('time',), ('thank you',),
+    ('open music',), ('play music', 'play song'), ('search wikipedia',), ('open google',),
+    ('open facebook',), ('open github',), ('youtube',), ('open calendar',), ('close calendar',),
+    ('open calculator',), ('close calculator',), ('open terminal',), ('close terminal',),
+    ('close music',),
+]
+
+QUERIES = [
+    "what is your name",
+    "open the calculator please",
+    "close music",
+    "search wikipedia alan turing",
+    "sometimes i wonder about the universe",
+    "tell me a joke about programmers",
+    "can you explain how transformers work in machine learning",
+    "close terminal",
+]
+
+
+def legacy_route(checks, query):
+    for index, needles in enumerate(checks):
+        for needle in needles:
+            if needle in query:
+                return index
+    return None
+
+
+def time_per_query(func, queries, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            func(query)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+
+
+def main(repeat=2000):
+    assistant = JarvisAssistant(engine=None, prompt_controller=None, memory=None)
+    router = assistant.router
+    print(f"{'commands':>10} {'legacy (us)':>12} {'router (us)':>12}")
+    for extra in (0, 50, 200, 1000):
+        checks = list(LEGACY_CHECKS)
+        for i in range(extra):
+            phrase = f"launch plugin{i} now"
+            checks.append((phrase,))
+            router.register(f"plugin{i}", [phrase], lambda match: None)
+        legacy_us = time_per_query(lambda q: legacy_route(checks, q), QUERIES, repeat)
+        router_us = time_per_query(router.match, QUERIES, repeat)
+        print(f"{len(checks):>10} {legacy_us:>12.2f} {router_us:>12.2f}")
+        for i in range(extra):
+            router.unregister(f"plugin{i}")
+
+
+if __name__ == "__main__":
+    main()
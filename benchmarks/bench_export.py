@@ -0,0 +1,47 @@
+"""
+Compares exporting a long conversation with the old
+`get_exported_history_content()` (one json.dumps string) against the
+streaming exporter writing chunks to a file, in time and peak memory.
+
+Usage:
+    python -m benchmarks.bench_export [turns]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from jarvis.exporter import export_to_path
+from jarvis.memory import Memory
+
+
+def measure(func):
+    """Returns the run time in ms and, from a second traced run, the peak allocation in MiB."""
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds * 1000, peak / 2 ** 20
+
+
+def main(turns=100000):
+    memory = Memory(file_path=None)
+    for i in range(turns):
+        memory.add("user" if i % 2 == 0 else "model", f"Message number {i}. " * 10)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "export")
+        print(f"{turns} turns")
+        ms, mb = measure(lambda: json.dumps(memory.get_generative_history(), indent=4))
+        print(f"json.dumps of the whole history:  {ms:8.1f} ms  peak {mb:7.1f} MiB")
+        for fmt in ("json", "jsonl", "markdown"):
+            ms, mb = measure(lambda: export_to_path(memory.iter_turns(), path, fmt))
+            print(f"streamed {fmt:<9} export to file:  {ms:8.1f} ms  peak {mb:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,93 @@
+"""
+Evaluates the IntentClassifier on a labelled set of noisy voice transcripts
+(benchmarks/intent_transcripts.jsonl), compared with exact phrase routing.
+
+Reports intent accuracy, slot accuracy, how many non-commands were wrongly
+taken for commands, and the latency of classifying one utterance at a time
+versus the whole set in one batch.
+
+Usage:
+    python -m benchmarks.bench_intent_classifier [--threshold 0.6] [--misses]
+"""
+import argparse
+import json
+import os
+import time
+
+from jarvis.assistant import JarvisAssistant
+from jarvis.fakes import FakeEngine
+from jarvis.intent_classifier import IntentClassifier
+from jarvis.memory import Memory
+from jarvis.prompt_controller import PromptController
+
+TRANSCRIPTS = os.path.join(os.path.dirname(__file__), "intent_transcripts.jsonl")
+
+
+def load_transcripts(path=TRANSCRIPTS):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def score(rows, predictions):
+    """Returns (intent accuracy, slot accuracy, false commands, misses) for (name, slot) predictions."""
+    correct = slots = slot_total = false_commands = 0
+    misses = []
+    for row, (name, slot) in zip(rows, predictions):
+        if name == row["intent"]:
+            correct += 1
+        else:
+            misses.append((row, name, slot))
+        if row["intent"] is None and name is not None:
+            false_commands += 1
+        if row["slot"] is not None:
+            slot_total += 1
+            slots += name == row["intent"] and slot == row["slot"]
+    return correct / len(rows), slots / slot_total, false_commands, misses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Accuracy and latency of the fuzzy intent classifier.")
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--misses", action="store_true", help="List the misclassified transcripts.")
+    args = parser.parse_args(argv)
+
+    rows = load_transcripts()
+    texts = [row["text"] for row in rows]
+    negatives = sum(row["intent"] is None for row in rows)
+    router = JarvisAssistant(engine=FakeEngine(), prompt_controller=PromptController(),
+                             memory=Memory(file_path=None)).router
+
+    start = time.perf_counter()
+    classifier = IntentClassifier.from_router(router, threshold=args.threshold)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    exact = []
+    for text in texts:
+        match = router.match(text)
+        exact.append((match.name, match.rest or None) if match else (None, None))
+
+    start = time.perf_counter()
+    intents = [classifier.classify(text) for text in texts]
+    single_us = (time.perf_counter() - start) / len(texts) * 1e6
+    start = time.perf_counter()
+    batch = classifier.classify_batch(texts)
+    batch_us = (time.perf_counter() - start) / len(texts) * 1e6
+    assert [i and i.name for i in batch] == [i and i.name for i in intents]
+
+    fuzzy = [(i.name, i.slot or None) if i else (None, None) for i in intents]
+    print(f"{len(rows)} transcripts ({negatives} not commands), {len(classifier.entries)} catalogue phrases, "
+          f"classifier built in {build_ms:.1f} ms")
+    print(f"{'':<22} {'intent acc':>10} {'slot acc':>9} {'false cmds':>11}")
+    for label, predictions in (("exact phrase routing", exact), ("intent classifier", fuzzy)):
+        accuracy, slot_accuracy, false_commands, misses = score(rows, predictions)
+        print(f"{label:<22} {accuracy:>10.1%} {slot_accuracy:>9.1%} {false_commands:>7}/{negatives}")
+    print(f"latency, one at a time:  {single_us:8.1f} µs/utterance")
+    print(f"latency, one batch:      {batch_us:8.1f} µs/utterance")
+
+    if args.misses:
+        for row, name, slot in score(rows, fuzzy)[3]:
+            print(f"MISS {row['text']!r}: expected {row['intent']}, got {name} (slot {slot!r})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Measures the MusicLibrary on a large synthetic library: the initial scan,
+loading the persisted index, incremental refreshes, and fuzzy title lookups
+compared with a linear difflib scan over every title.
+
+Usage:
+    python -m benchmarks.bench_music_library [tracks]
+"""
+import difflib
+import os
+import random
+import sys
+import tempfile
+import time
+
+from jarvis.fakes import FakePlayer, write_fake_mp3
+from jarvis.music_library import MusicLibrary
+
+WORDS = ("love night dance heart fire rain summer blue river city dream light road home wild gold "
+         "shadow moon star ocean train money sweet lonely electric midnight golden crazy forever").split()
+ARTISTS = ["The Lanterns", "Nova", "Blue Harbor", "Echo Park", "Mira", "The Static", "Jun", "Westbound"]
+TRACKS_PER_ALBUM = 12
+
+
+def build_library(root, count, rng):
+    titles = []
+    for i in range(count):
+        album = os.path.join(root, f"album_{i // TRACKS_PER_ALBUM:05d}")
+        if i % TRACKS_PER_ALBUM == 0:
+            os.makedirs(album)
+        title = " ".join(rng.sample(WORDS, 3)).title() + f" {i}"
+        titles.append(title)
+        write_fake_mp3(os.path.join(album, f"{i % TRACKS_PER_ALBUM + 1:02d} - {title}.mp3"),
+                       title=title, artist=rng.choice(ARTISTS), seconds=rng.uniform(120, 420))
+    return titles
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(count=20000):
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as directory:
+        music_dir = os.path.join(directory, "music")
+        index_path = os.path.join(directory, "music_index.json")
+        titles = build_library(music_dir, count, rng)
+
+        library = MusicLibrary(music_dir, index_path, player=FakePlayer())
+        changes, scan = timed(library.refresh)
+        print(f"{count} tracks in {library.stats()['directories']} directories")
+        print(f"initial scan (headers read):         {scan * 1000:9.1f} ms  {changes}")
+
+        library, load = timed(lambda: MusicLibrary(music_dir, index_path, player=FakePlayer()))
+        changes, noop = timed(library.refresh)
+        print(f"load persisted index:                {load * 1000:9.1f} ms")
+        print(f"incremental refresh, nothing new:    {noop * 1000:9.1f} ms  {changes}")
+
+        album = os.path.join(music_dir, "album_00003")
+        time.sleep(0.01)
+        write_fake_mp3(os.path.join(album, "13 - Brand New Song.mp3"), title="Brand New Song")
+        changes, one = timed(library.refresh)
+        print(f"incremental refresh, one new file:   {one * 1000:9.1f} ms  {changes}")
+        changes, full = timed(lambda: library.refresh(full=True))
+        print(f"full refresh (every directory):      {full * 1000:9.1f} ms  {changes}")
+
+        # Misspelled queries: one word of a real title dropped and a letter swapped.
+        queries = []
+        for title in rng.sample(titles, 50):
+            words = title.lower().split()[:3]
+            word = words[0]
+            words[0] = word[1] + word[0] + word[2:]
+            queries.append(" ".join(words))
+
+        start = time.perf_counter()
+        found = sum(1 for query in queries if library.find(query))
+        indexed_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        all_titles = [track["title"].lower() for track in library.tracks.values()]
+        start = time.perf_counter()
+        for query in queries[:5]:
+            max(all_titles, key=lambda title: difflib.SequenceMatcher(None, query, title).ratio())
+        linear_ms = (time.perf_counter() - start) / 5 * 1000
+
+        print(f"fuzzy lookup, word index:            {indexed_ms:9.2f} ms/query  ({found}/{len(queries)} found)")
+        print(f"fuzzy lookup, linear difflib scan:   {linear_ms:9.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
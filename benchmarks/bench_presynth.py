@@ -0,0 +1,103 @@
+"""
+Measures how long pressing play waits for audio after a reply has finished
+streaming: synthesizing the whole reply on demand (as `play_audio` did)
+versus pre-synthesizing it sentence by sentence in the background while it
+streams in. Playback is measured right after the stream ends (voice input
+plays the reply automatically) and after the press of the play button.
+
+Replies are streamed a few words at a time with a simulated generation
+delay, and synthesized by FakeSynthesizer with a per-request and a
+per-character latency like gTTS. Each mode gets its own empty TTSCache.
+
+Usage:
+    python -m benchmarks.bench_presynth [--chunk-delay MS] [--synth-delay MS] [--press-delay MS] [--workers 2]
+"""
+import argparse
+import tempfile
+import time
+
+from jarvis.fakes import FakeSynthesizer
+from jarvis.presynth import PreSynthesizer
+from jarvis.tts_cache import TTSCache
+
+REPLIES = [
+    "Alan Turing was an English mathematician and computer scientist. He formalised the concepts of "
+    "algorithm and computation with the Turing machine. During the Second World War he worked at "
+    "Bletchley Park on breaking German ciphers. He is widely considered the father of computer science.",
+    "The weather today is sunny with a light breeze. Temperatures will reach about twenty eight degrees "
+    "in the afternoon. Let me know if you need anything else.",
+    "Here is a short joke about computers. Why did the computer go to the doctor? Because it had a virus! "
+    "Let me know if you need anything else.",
+    "Sure, opening the calculator now.",
+]
+WORDS_PER_CHUNK = 3
+
+
+def stream_reply(text, chunk_delay):
+    """Yields a reply a few words at a time, like an engine stream."""
+    words = text.split(" ")
+    for i in range(0, len(words), WORDS_PER_CHUNK):
+        time.sleep(chunk_delay)
+        yield " ".join(words[i:i + WORDS_PER_CHUNK]) + (" " if i + WORDS_PER_CHUNK < len(words) else "")
+
+
+def on_demand(cache, chunk_delay, press_delay):
+    waits = []
+    for text in REPLIES:
+        reply = "".join(stream_reply(text, chunk_delay))
+        time.sleep(press_delay)
+        start = time.perf_counter()
+        cache.get_audio(reply)
+        waits.append(time.perf_counter() - start)
+    return waits
+
+
+def presynthesized(cache, chunk_delay, press_delay, workers):
+    presynth = PreSynthesizer(cache, max_workers=workers)
+    waits = []
+    for number, text in enumerate(REPLIES):
+        reply = "".join(presynth.stream(number, stream_reply(text, chunk_delay)))
+        time.sleep(press_delay)
+        start = time.perf_counter()
+        presynth.audio(number, reply)
+        waits.append(time.perf_counter() - start)
+    presynth.shutdown()
+    return waits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wait for audio after a reply, on demand vs pre-synthesized.")
+    parser.add_argument("--chunk-delay", type=float, default=60.0, help="Milliseconds between streamed chunks.")
+    parser.add_argument("--synth-delay", type=float, default=300.0, help="Synthesis latency per request in ms.")
+    parser.add_argument("--char-delay", type=float, default=2.0, help="Additional synthesis latency per character in ms.")
+    parser.add_argument("--press-delay", type=float, default=1000.0,
+                        help="Milliseconds between the end of a reply and the press of play.")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    chunk_delay = args.chunk_delay / 1000
+    for playback, press_delay in [("autoplay", 0.0), (f"play pressed after {args.press_delay:.0f} ms",
+                                                      args.press_delay / 1000)]:
+        results = {}
+        for name, run in [
+            ("on demand", lambda cache: on_demand(cache, chunk_delay, press_delay)),
+            ("pre-synthesized", lambda cache: presynthesized(cache, chunk_delay, press_delay, args.workers)),
+        ]:
+            synthesizer = FakeSynthesizer(delay=args.synth_delay / 1000, delay_per_char=args.char_delay / 1000)
+            with tempfile.TemporaryDirectory() as directory:
+                waits = run(TTSCache(cache_dir=directory, synthesizer=synthesizer))
+            results[name] = (waits, len(synthesizer.calls), sum(len(text) for text, _, _ in synthesizer.calls))
+
+        print(f"{playback}:")
+        print(f"  {'reply':<42} {'on demand':>10} {'pre-synthesized':>16}")
+        for text, slow, fast in zip(REPLIES, results["on demand"][0], results["pre-synthesized"][0]):
+            label = text if len(text) <= 40 else text[:37] + "..."
+            print(f"  {label:<42} {slow * 1000:>7.0f} ms {fast * 1000:>13.0f} ms")
+        for name, (waits, calls, chars) in results.items():
+            print(f"  {name:<16} mean wait {sum(waits) / len(waits) * 1000:6.0f} ms, "
+                  f"{calls} synthesis requests, {chars} characters synthesized")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Measures the per-utterance overhead of speaking through the persistent
+SpeechService versus creating a new engine for every utterance, as the old
+`speak()` did. Uses FakeSpeechEngine with a simulated engine start-up cost.
+
+Usage:
+    python -m benchmarks.bench_speech_service
+"""
+import time
+
+from jarvis.fakes import FakeSpeechEngine
+from jarvis.speech_service import SpeechService
+
+INIT_DELAY = 0.05  # Simulated pyttsx3.init() cost, in seconds.
+UTTERANCES = ["Searching Wikipedia for alan turing...", "According to Wikipedia", "Playing groovy-vibe.mp3"] * 10
+
+
+def legacy_speak(text):
+    engine = FakeSpeechEngine(init_delay=INIT_DELAY)
+    engine.setProperty('rate', 180)
+    voices = engine.getProperty("voices")
+    engine.setProperty('voice', voices[7].id if len(voices) > 7 else voices[0].id)
+    engine.say(text)
+    engine.runAndWait()
+    engine.stop()
+
+
+def main():
+    start = time.perf_counter()
+    for text in UTTERANCES:
+        legacy_speak(text)
+    legacy_ms = (time.perf_counter() - start) / len(UTTERANCES) * 1000
+
+    service = SpeechService(engine_factory=lambda: FakeSpeechEngine(init_delay=INIT_DELAY)).start()
+    start = time.perf_counter()
+    for text in UTTERANCES:
+        service.say(text)
+    service_ms = (time.perf_counter() - start) / len(UTTERANCES) * 1000
+
+    start = time.perf_counter()
+    handles = [service.say(text, block=False) for text in UTTERANCES]
+    enqueue_ms = (time.perf_counter() - start) / len(UTTERANCES) * 1000
+    for handle in handles:
+        handle.wait()
+    service.shutdown()
+
+    print(f"per-utterance overhead, new engine per call:  {legacy_ms:8.3f} ms")
+    print(f"per-utterance overhead, persistent service:   {service_ms:8.3f} ms")
+    print(f"per-utterance caller time, non-blocking say:  {enqueue_ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
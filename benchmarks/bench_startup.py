@@ -0,0 +1,95 @@
+"""
+Reports the cold import time of the JARVIS entry points and checks that
+heavy libraries stay out of the start-up path.
+
+Every module is imported in a fresh interpreter with `python -X importtime`.
+The script prints the cumulative import time and the slowest dependencies,
+and exits with status 1 if a deferred library (google.generativeai,
+speech_recognition, pyttsx3, gtts, wikipedia) is imported eagerly or an
+import exceeds the time budget.
+
+`app.py` is not imported here because importing it runs the Streamlit page;
+it only adds streamlit itself on top of the modules below.
+
+Usage:
+    python -m benchmarks.bench_startup [--budget-ms 500] [--top 5]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+ENTRY_MODULES = [
+    "jarvis.assistant",
+    "jarvis.gemini_engine",
+    "jarvis.voice_io",
+    "jarvis.listener",
+    "jarvis.wiki_search",
+    "cli",
+]
+
+DEFERRED_MODULES = ["google.generativeai", "speech_recognition", "pyttsx3", "gtts", "wikipedia", "numpy"]
+
+PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({{'ms': elapsed * 1000, 'eager': [m for m in {deferred!r} if m in sys.modules]}}))\n"
+)
+
+
+def parse_importtime(stderr):
+    """Returns (cumulative microseconds, module name) pairs from `-X importtime` output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((int(cumulative), name.rstrip()))
+    return entries
+
+
+def probe(module):
+    """Imports a module in a fresh interpreter and returns its timings, or an error string."""
+    code = PROBE.format(module=module, deferred=DEFERRED_MODULES)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["slowest"] = sorted(
+        (entry for entry in parse_importtime(result.stderr) if entry[1].strip() != module),
+        reverse=True,
+    )
+    return report, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time report for the JARVIS entry points.")
+    parser.add_argument("--budget-ms", type=float, default=500.0, help="Maximum import time per module.")
+    parser.add_argument("--top", type=int, default=5, help="Number of slowest dependencies to list.")
+    parser.add_argument("modules", nargs="*", default=ENTRY_MODULES)
+    args = parser.parse_args(argv)
+
+    failures = []
+    for module in args.modules:
+        report, error = probe(module)
+        if error:
+            print(f"{module:<22} import failed: {error}")
+            failures.append(f"{module} cannot be imported")
+            continue
+        print(f"{module:<22} {report['ms']:8.1f} ms")
+        for cumulative, name in report["slowest"][:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name.strip()}")
+        if report["eager"]:
+            failures.append(f"{module} eagerly imports {', '.join(report['eager'])}")
+        if report["ms"] > args.budget_ms:
+            failures.append(f"{module} took {report['ms']:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Measures how soon a spoken command reaches the command router when it is
+taken from the final transcript (after the speaker has stopped and the
+endpointer has heard enough silence) versus from stable partial
+transcripts, and how fast the file source and endpointer process audio.
+
+Speech is synthetic (tones shaped like phrases, see `fakes.synthetic_speech`)
+and recognized by FakeSTTBackend, which reveals the words of a script as
+they would have been spoken. Times are on the audio clock, plus a simulated
+recognition round trip per request.
+
+Usage:
+    python -m benchmarks.bench_stt [--latency MS] [--words-per-second 2.5] [--partial-interval 0.2]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from jarvis.assistant import JarvisAssistant
+from jarvis.fakes import FakeEngine, FakeSTTBackend, synthetic_speech, write_wav
+from jarvis.memory import Memory
+from jarvis.prompt_controller import PromptController
+from jarvis.stt import EnergyEndpointer, WavFileSource, deliver_phrases, pcm_seconds
+
+TRANSCRIPTS = [
+    "open calculator please",
+    "what time is it right now",
+    "search wikipedia for alan turing",
+    "skip this song",
+    "tell me a joke about computers",
+    "close terminal",
+    "thank you very much jarvis",
+]
+PAUSE_SECONDS = 1.0
+
+
+def speech_ends(durations):
+    """Returns the audio time at which each phrase ends."""
+    ends, position = [], PAUSE_SECONDS
+    for seconds in durations:
+        position += seconds
+        ends.append(position)
+        position += PAUSE_SECONDS
+    return ends
+
+
+def command_delays(path, router, args):
+    """Returns, per delivered phrase, (text, early, seconds from the end of speech to delivery)."""
+    backend = FakeSTTBackend(TRANSCRIPTS, words_per_second=args.words_per_second,
+                             partial_interval=args.partial_interval)
+    with WavFileSource(path) as source:
+        hypotheses = backend.stream(source.chunks(), source.sample_rate)
+        delivered = list(deliver_phrases(hypotheses, router))
+    durations = [len(text.split()) / args.words_per_second for text in TRANSCRIPTS]
+    return [
+        (hypothesis.text, early, hypothesis.audio_seconds + args.latency / 1000 - end)
+        for (hypothesis, early), end in zip(delivered, speech_ends(durations))
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Command latency with final vs partial transcripts.")
+    parser.add_argument("--latency", type=float, default=300.0, help="Simulated recognition round trip in ms.")
+    parser.add_argument("--words-per-second", type=float, default=2.5)
+    parser.add_argument("--partial-interval", type=float, default=0.2,
+                        help="Seconds of speech between partial results.")
+    args = parser.parse_args(argv)
+
+    durations = [len(text.split()) / args.words_per_second for text in TRANSCRIPTS]
+    pcm = synthetic_speech(durations, pause_seconds=PAUSE_SECONDS)
+    router = JarvisAssistant(engine=FakeEngine(), prompt_controller=PromptController(),
+                             memory=Memory(file_path=None)).router
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "speech.wav")
+        write_wav(path, pcm)
+
+        final_only = command_delays(path, None, args)
+        early = command_delays(path, router, args)
+
+        start = time.perf_counter()
+        endpointer = EnergyEndpointer()
+        with WavFileSource(path) as source:
+            for chunk in source.chunks():
+                endpointer.feed(chunk, source.sample_rate)
+        process_seconds = time.perf_counter() - start
+
+    audio_seconds = pcm_seconds(pcm, 16000)
+    print(f"{len(TRANSCRIPTS)} phrases, {audio_seconds:.1f} s of audio, recognition round trip {args.latency:.0f} ms")
+    print(f"{'phrase':<34} {'final only':>11} {'with partials':>14}")
+    for (text, _, final_delay), (_, was_early, early_delay) in zip(final_only, early):
+        marker = " (early)" if was_early else ""
+        print(f"{text:<34} {final_delay * 1000:>8.0f} ms {early_delay * 1000:>11.0f} ms{marker}")
+    mean = lambda rows: sum(delay for _, _, delay in rows) / len(rows) * 1000
+    print(f"{'mean delay after speech ended':<34} {mean(final_only):>8.0f} ms {mean(early):>11.0f} ms")
+    print(f"WAV source + endpointer: {audio_seconds / process_seconds:.0f}x real time")
+
+
+if __name__ == "__main__":
+    main()
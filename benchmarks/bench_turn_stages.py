@@ -0,0 +1,280 @@
+"""
+Microbenchmarks for every stage of a conversation turn, run fully offline.
+
+Each stage is timed on its own at several history sizes, using the fake
+engine, TTS and STT backends from `jarvis.fakes`:
+
+    stt           next phrase from a BackgroundListener on a FakeRecognizer
+    route         `_handle_commands` on command and chat queries
+    memory_add    `Memory.add` (one journal append) on a history of n turns
+    get_history   `Memory.get_history` conversion of n turns
+    build_prompt  `PromptController.build_prompt` as the history grows past n turns
+    engine        streaming a FakeEngine reply through `generate_stream`
+    tts           `TTSCache.get_audio` with a FakeSynthesizer (misses and hits)
+    turn          a full `JarvisAssistant.respond` on a history of n turns
+
+Percentiles are reported in microseconds. Results can be saved as a
+baseline and later runs compared against it to spot regressions.
+
+Usage:
+    python -m benchmarks.bench_turn_stages
+    python -m benchmarks.bench_turn_stages --sizes 10 1000 100000 --stages memory_add build_prompt
+    python -m benchmarks.bench_turn_stages --save             # store a baseline
+    python -m benchmarks.bench_turn_stages --compare          # compare with it
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from jarvis.assistant import JarvisAssistant
+from jarvis.fakes import FakeAudioSource, FakeEngine, FakeRecognizer, FakeSynthesizer, fake_recognize
+from jarvis.listener import BackgroundListener
+from jarvis.memory import Memory
+from jarvis.prompt_controller import PromptController
+from jarvis.tts_cache import TTSCache
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "turn_stages.json")
+
+# Stages whose cost does not depend on the history size are only run once.
+SIZE_INDEPENDENT = {"stt", "route", "engine", "tts"}
+
+ROUTE_QUERIES = [
+    "what is your name",
+    "what time is it",
+    "thank you jarvis",
+    "can you explain how transformers work in machine learning",
+    "tell me a joke about programmers",
+    "sometimes i wonder about the universe",
+]
+
+USER_TURN = "Can you explain how {topic} works, with a short example I can try at home?"
+MODEL_TURN = ("Sure. {topic} is easiest to understand through a small example. First, think about "
+              "what problem it solves, then look at the moving parts one at a time.")
+TOPICS = ["recursion", "a hash map", "gradient descent", "TCP", "a compiler", "photosynthesis"]
+
+_copies = itertools.count()
+
+
+def percentiles(samples):
+    """Summarizes timings given in seconds as microsecond percentiles."""
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1e6
+
+    return {
+        "n": len(ordered),
+        "mean": statistics.fmean(ordered) * 1e6,
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "max": ordered[-1] * 1e6,
+    }
+
+
+def measure(func, iterations):
+    """Calls `func(i)` for every iteration and returns the duration of each call."""
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def write_journal(path, turns):
+    """Writes a Memory journal holding `turns` alternating user/model turns."""
+    ts = time.time() - turns
+    with open(path, "w") as f:
+        for i in range(turns):
+            topic = TOPICS[i // 2 % len(TOPICS)]
+            role, template = ("user", USER_TURN) if i % 2 == 0 else ("model", MODEL_TURN)
+            f.write(json.dumps({"role": role, "parts": [template.format(topic=topic)], "ts": ts + i}) + "\n")
+
+
+def load_memory(directory, turns):
+    """Returns a Memory holding `turns` turns, on its own copy of a cached journal."""
+    template = os.path.join(directory, f"history_{turns}.jsonl")
+    if not os.path.exists(template):
+        write_journal(template, turns)
+    path = os.path.join(directory, f"memory_{turns}_{next(_copies)}.jsonl")
+    shutil.copyfile(template, path)
+    return Memory(file_path=path, compact_threshold=10 ** 9)
+
+
+# --- Stages ---
+
+def bench_stt(directory, size, iterations):
+    phrases = [f"search wikipedia topic number {i}" for i in range(iterations)]
+    listener = BackgroundListener(source_factory=lambda: FakeAudioSource(phrases), recognizer=FakeRecognizer(),
+                                  recognize=fake_recognize, calibration_duration=0)
+    listener.start()
+    try:
+        return measure(lambda i: listener.get(timeout=5), iterations)
+    finally:
+        listener.stop()
+
+
+def bench_route(directory, size, iterations):
+    assistant = JarvisAssistant(engine=None, prompt_controller=None, memory=None)
+    return measure(lambda i: assistant._handle_commands(ROUTE_QUERIES[i % len(ROUTE_QUERIES)]), iterations)
+
+
+def bench_memory_add(directory, size, iterations):
+    memory = load_memory(directory, size)
+    return measure(lambda i: memory.add("user", USER_TURN.format(topic=TOPICS[i % len(TOPICS)])), iterations)
+
+
+def bench_get_history(directory, size, iterations):
+    memory = load_memory(directory, size)
+    return measure(lambda i: memory.get_history(), iterations)
+
+
+def bench_build_prompt(directory, size, iterations):
+    history = list(load_memory(directory, size).get_generative_history())
+    controller = PromptController()
+    controller.build_prompt(history)  # The first call indexes the whole history.
+
+    def turn(i):
+        topic = TOPICS[i % len(TOPICS)]
+        history.append({"role": "user", "parts": [USER_TURN.format(topic=topic)]})
+        history.append({"role": "model", "parts": [MODEL_TURN.format(topic=topic)]})
+        controller.build_prompt(history)
+
+    return measure(turn, iterations)
+
+
+def bench_engine(directory, size, iterations):
+    engine = FakeEngine(chunks=8)
+    prompt = [{"role": "user", "parts": [USER_TURN.format(topic="TCP")]}]
+    return measure(lambda i: sum(1 for _ in engine.generate_stream(prompt, "You are Jarvis.")), iterations)
+
+
+def bench_tts(directory, size, iterations):
+    cache = TTSCache(cache_dir=os.path.join(directory, "tts"), synthesizer=FakeSynthesizer())
+    sentences = [f"This is sentence number {i} of the answer." for i in range(max(1, iterations // 2))]
+    # Half of the calls synthesize a new sentence, the other half hit the cache.
+    return measure(lambda i: cache.get_audio(sentences[i % len(sentences)]), iterations)
+
+
+def bench_turn(directory, size, iterations):
+    assistant = JarvisAssistant(engine=FakeEngine(chunks=8), prompt_controller=PromptController(),
+                                memory=load_memory(directory, size))
+    assistant.prompt_controller.build_prompt(assistant.memory.get_generative_history())
+    return measure(lambda i: assistant.respond(USER_TURN.format(topic=TOPICS[i % len(TOPICS)])), iterations)
+
+
+STAGES = {
+    "stt": bench_stt,
+    "route": bench_route,
+    "memory_add": bench_memory_add,
+    "get_history": bench_get_history,
+    "build_prompt": bench_build_prompt,
+    "engine": bench_engine,
+    "tts": bench_tts,
+    "turn": bench_turn,
+}
+
+
+def run(stages, sizes, iterations):
+    """Runs the selected stages and returns {"stage@size": percentiles}."""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for stage in stages:
+            for size in ([0] if stage in SIZE_INDEPENDENT else sizes):
+                # get_history copies the whole history, so keep large sizes affordable.
+                count = iterations if stage != "get_history" else max(5, min(iterations, 2_000_000 // max(size, 1)))
+                key = f"{stage}@{size}"
+                results[key] = percentiles(STAGES[stage](directory, size, count))
+                print_row(key, results[key])
+    return results
+
+
+# --- Reporting and baselines ---
+
+def print_header():
+    print(f"{'stage@turns':<22} {'n':>6} {'mean':>10} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}   (us)")
+
+
+def print_row(key, stats):
+    print(f"{key:<22} {stats['n']:>6} {stats['mean']:>10.1f} {stats['p50']:>10.1f} "
+          f"{stats['p90']:>10.1f} {stats['p99']:>10.1f} {stats['max']:>10.1f}")
+
+
+def save_baseline(path, results):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    baseline = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+    print(f"\nBaseline saved to {path}")
+
+
+def compare(path, results, tolerance):
+    """
+    Prints the p50/p90 ratio of every result against a saved baseline.
+
+    Returns:
+        list: Keys whose p50 is slower than the baseline by more than `tolerance`.
+    """
+    with open(path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with baseline from {baseline['created']} (Python {baseline['python']}):")
+    print(f"{'stage@turns':<22} {'p50 ratio':>10} {'p90 ratio':>10}")
+    regressions = []
+    for key, stats in results.items():
+        old = baseline["results"].get(key)
+        if old is None:
+            print(f"{key:<22} {'(new)':>10}")
+            continue
+        p50_ratio = stats["p50"] / old["p50"] if old["p50"] else float("inf")
+        p90_ratio = stats["p90"] / old["p90"] if old["p90"] else float("inf")
+        flag = ""
+        if p50_ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<22} {p50_ratio:>10.2f} {p90_ratio:>10.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline microbenchmarks for each stage of a turn.")
+    parser.add_argument("--stages", nargs="+", choices=sorted(STAGES), default=list(STAGES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES),
+                        help="History sizes (in turns) for the size-dependent stages.")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed calls per stage and size.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file to save or compare with.")
+    parser.add_argument("--save", action="store_true", help="Save the results as the new baseline.")
+    parser.add_argument("--compare", action="store_true", help="Compare the results with the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed p50 slowdown before a stage is flagged, e.g. 0.25 for 25%%.")
+    args = parser.parse_args(argv)
+
+    print_header()
+    results = run(args.stages, args.sizes, args.iterations)
+    regressions = []
+    if args.compare:
+        if os.path.exists(args.baseline):
+            regressions = compare(args.baseline, results, args.tolerance)
+        else:
+            print(f"\nNo baseline at {args.baseline}; run with --save first.")
+    if args.save:
+        save_baseline(args.baseline, results)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
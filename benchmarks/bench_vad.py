@@ -0,0 +1,114 @@
+"""
+Compares how much audio is sent to the recognizer, and how long after the
+end of speech recognition can start, for the old capture (energy threshold
+300 and a fixed 1 s pause, like `r.listen` with `pause_threshold = 1`)
+and the NumPy VAD (adaptive noise floor and pause, silence trimmed).
+
+The WAV fixtures are synthesized (see `fakes.synthetic_speech`) and written
+to a temporary directory, so the ground truth of where speech ends is
+known. Recordings of your own can be added with --wav; for those only the
+upload size and the processing speed are reported.
+
+Usage:
+    python -m benchmarks.bench_vad [--wav FILE ...]
+"""
+import argparse
+import array
+import os
+import random
+import tempfile
+import time
+
+from jarvis.fakes import FakeSTTBackend, synthetic_speech, write_wav
+from jarvis.stt import EnergyEndpointer, WavFileSource, pcm_seconds
+from jarvis.vad import VADEndpointer
+
+# Fixtures: (name, background noise amplitude, segments). A segment is
+# ("speech", seconds), ("hiss", seconds) for an unvoiced sound such as "s",
+# or ("pause", seconds).
+FIXTURES = [
+    ("short command", 50, [("pause", 0.8), ("speech", 1.2), ("pause", 2.0)]),
+    ("hesitation", 50, [("pause", 0.8), ("speech", 0.8), ("pause", 0.3), ("speech", 1.0), ("pause", 2.0)]),
+    ("starts with 's'", 50, [("pause", 0.8), ("hiss", 0.2), ("speech", 1.0), ("pause", 2.0)]),
+    ("two commands", 50, [("pause", 0.8), ("speech", 1.0), ("pause", 1.5), ("speech", 1.6), ("pause", 2.0)]),
+    ("noisy room", 600, [("pause", 2.0), ("speech", 1.4), ("pause", 2.0)]),
+]
+
+
+def hiss(seconds, amplitude=250, sample_rate=16000, seed=1):
+    rng = random.Random(seed)
+    return array.array("h", (rng.randint(-amplitude, amplitude) for _ in range(int(seconds * sample_rate)))).tobytes()
+
+
+def build_fixture(noise, segments, sample_rate=16000):
+    """Returns (pcm, end of each phrase in seconds). Pauses under 0.5 s do not end a phrase."""
+    parts, ends = [], []
+    position = 0.0
+    for kind, seconds in segments:
+        if kind == "speech":
+            parts.append(synthetic_speech([seconds], pause_seconds=0, noise=noise, seed=len(parts)))
+        elif kind == "hiss":
+            parts.append(hiss(seconds))
+        else:
+            parts.append(synthetic_speech([], pause_seconds=seconds, noise=noise, seed=len(parts)))
+            if position and seconds >= 0.5:
+                ends.append(position)
+        position += seconds
+    return b"".join(parts), ends
+
+
+def run(path, endpointer):
+    """Returns (final hypotheses, uploaded bytes per phrase, processing seconds)."""
+    backend = FakeSTTBackend(["phrase"] * 20, endpointer=endpointer, partial_interval=None)
+    start = time.perf_counter()
+    with WavFileSource(path) as source:
+        finals = [h for h in backend.stream(source.chunks(), source.sample_rate) if h.final]
+    return finals, backend.uploaded, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upload size and end-of-speech latency with and without the VAD.")
+    parser.add_argument("--wav", nargs="*", default=[], help="Extra 16-bit WAV recordings to measure.")
+    args = parser.parse_args(argv)
+
+    strategies = [
+        ("fixed 1 s pause", lambda: EnergyEndpointer(threshold=300, silence_seconds=1.0)),
+        ("NumPy VAD", VADEndpointer),
+    ]
+    print(f"{'fixture':<16} {'strategy':<16} {'phrases':>8} {'uploaded':>9} {'after end':>10} {'speed':>8}")
+    totals = {name: [0.0, 0.0, 0] for name, _ in strategies}
+    with tempfile.TemporaryDirectory() as directory:
+        cases = []
+        for name, noise, segments in FIXTURES:
+            pcm, ends = build_fixture(noise, segments)
+            path = os.path.join(directory, f"{name}.wav")
+            write_wav(path, pcm)
+            cases.append((name, path, ends, pcm_seconds(pcm, 16000)))
+        for path in args.wav:
+            with WavFileSource(path) as source:
+                seconds = sum(pcm_seconds(chunk, source.sample_rate) for chunk in source.chunks())
+            cases.append((os.path.basename(path), path, None, seconds))
+
+        for name, path, ends, seconds in cases:
+            for strategy, make_endpointer in strategies:
+                finals, uploaded, elapsed = run(path, make_endpointer())
+                upload_seconds = sum(uploaded) / 32000
+                phrases = f"{len(finals)}/{len(ends)}" if ends is not None else str(len(finals))
+                latency = ""
+                if ends is not None and len(finals) == len(ends):
+                    delays = [h.audio_seconds - end for h, end in zip(finals, ends)]
+                    latency = f"{sum(delays) / len(delays) * 1000:.0f} ms"
+                    totals[strategy][1] += sum(delays) / len(delays)
+                    totals[strategy][2] += 1
+                totals[strategy][0] += upload_seconds
+                print(f"{name:<16} {strategy:<16} {phrases:>8} {upload_seconds:>8.2f}s {latency:>10} "
+                      f"{seconds / elapsed:>7.0f}x")
+
+    print()
+    for strategy, (uploaded, delay, counted) in totals.items():
+        mean_delay = f"{delay / counted * 1000:.0f} ms" if counted else "n/a"
+        print(f"{strategy:<16} uploaded {uploaded:6.2f} s of audio, recognition starts {mean_delay} after speech ends")
+
+
+if __name__ == "__main__":
+    main()
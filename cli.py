@@ -1,21 +1,213 @@
+import argparse
+import asyncio
+import contextlib
+import json
 import logging
 import datetime
 import sys
 
 from config.settings import Settings
 from jarvis.gemini_engine import GeminiEngine
+from jarvis.engine import CachingEngine
+from jarvis.cache import PersistentCache
 from jarvis.memory import Memory
+from jarvis.sqlite_memory import SQLiteMemory
 from jarvis.prompt_controller import PromptController
 from jarvis.assistant import JarvisAssistant
-from jarvis.voice_io import speak, take_command
+from jarvis.voice_io import speak, take_command, voice_input_available
+from jarvis.speech_pipeline import StreamingSpeaker
+from jarvis.speech_service import get_speech_service
+from jarvis.listener import BackgroundListener
+from jarvis.stt import StreamingListener, MicrophoneStream, VoskBackend, audio_file_source, create_backend, pyaudio
+from jarvis.vad import np
+from jarvis.metrics import metrics, JsonLinesExporter
+from jarvis.lazy_import import warm_up, import_report
+from jarvis.actions import ActionHandler, DryRunActionHandler
+from jarvis.batch import BatchRunner, read_queries
+from jarvis.command_router import WORD_PATTERN
 
 # --- Basic Logging Setup ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+EXIT_WORDS = {"exit", "quit", "stop", "goodbye", "bye"}
+# Words that may accompany an exit word, as in "stop jarvis" or "exit now please".
+EXIT_FILLER = {"jarvis", "please", "now", "ok", "okay"}
+
+def _only_words(query, allowed):
+    words = [word for word in WORD_PATTERN.findall(query) if word not in EXIT_FILLER]
+    return bool(words) and all(word in allowed for word in words)
+
+def is_exit_command(query):
+    """
+    Returns True if the query asks JARVIS to exit. The whole utterance must be
+    an exit word, so "stop the music" is left to the music command.
+    """
+    return _only_words(query, EXIT_WORDS)
+
+def heard_stop(listener):
+    """
+    Returns True if the user has said "stop" (on its own, so not "don't stop")
+    since the last check. Anything else heard meanwhile is discarded, as it is
+    most likely JARVIS's own voice.
+    """
+    return any(_only_words(phrase, {"stop", "cancel"}) for phrase in listener.drain())
+
+def cancel_response(speaker, action_handler):
+    """Stops the answer being spoken and any action it started."""
+    speaker.cancel()
+    action_handler.cancel()
+    get_speech_service().interrupt()
+    print("\n[Response cancelled]")
+
+class KeyboardListener:
+    """
+    Reads typed queries; used in place of the BackgroundListener when no
+    microphone or speech recognition library is available.
+    """
+    exhausted = False
+
+    def get(self, timeout=None):
+        try:
+            return input("You: ").strip().lower()
+        except EOFError:
+            return "exit"
+
+    def drain(self):
+        return []
+
+    def stop(self):
+        pass
+
+def wait_for_speech(speaker, listener):
+    """
+    Waits until the speaker has finished, cancelling it if the user says "stop".
+    Returns True if it was cancelled.
+    """
+    while not speaker.wait(timeout=0.1):
+        if heard_stop(listener):
+            return True
+    listener.drain()
+    return False
+
+def make_listener(args, settings, router):
+    """
+    Returns the listener for voice input: the streaming STT pipeline for an
+    audio file or the microphone, the BackgroundListener when NumPy is not
+    installed for the voice-activity detector, or the keyboard if there is
+    no microphone.
+    """
+    backend_name = args.stt or settings.load_stt_backend()
+    if backend_name == "vosk" and not VoskBackend.available():
+        print("Offline recognition is unavailable: install vosk. Using Google recognition.")
+        backend_name = "google"
+    if args.audio_file:
+        backend = create_backend(backend_name, model_path=settings.load_vosk_model())
+        return StreamingListener(backend, lambda: audio_file_source(args.audio_file, realtime=True), router=router).start()
+    if (backend_name == "vosk" and pyaudio.available) or (voice_input_available() and np.available):
+        # Google recognition gets only the voiced audio, cut by the NumPy VAD.
+        backend = create_backend(backend_name, model_path=settings.load_vosk_model())
+        return StreamingListener(backend, MicrophoneStream, router=router).start()
+    # The microphone stays open and calibrated while JARVIS is thinking or speaking.
+    if voice_input_available():
+        listener = BackgroundListener().start()
+        listener.drain()
+        return listener
+    print("Voice input is unavailable; type your questions instead.")
+    return KeyboardListener()
+
+def print_profile(prometheus_path, file=None):
+    """Prints the latency of every instrumented stage and writes them in Prometheus format."""
+    summary = metrics.summary()
+    if not summary:
+        return
+    print(f"\n{'span':<20} {'count':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}", file=file)
+    for name, stats in summary.items():
+        print(f"{name:<20} {stats['count']:>6} {stats['p50']:>9.1f} {stats['p90']:>9.1f} "
+              f"{stats['p99']:>9.1f} {stats['max']:>9.1f}", file=file)
+    metrics.write_prometheus(prometheus_path)
+    print(f"Metrics written to {prometheus_path}", file=file)
+    for module in import_report():
+        if module["loaded"]:
+            print(f"import {module['name']:<22} {module['import_ms']:>7.0f} ms  (in {module['loaded_by']})", file=file)
+
+def run_batch(args):
+    """
+    Runs the queries of a JSONL file (or stdin) through the assistant without
+    voice I/O and writes one JSON result per query. Returns the exit status.
+    """
+    # Per-command routing logs would drown the summary on large runs.
+    logging.getLogger().setLevel(logging.WARNING)
+    if args.fake_engine:
+        from jarvis.fakes import FakeEngine
+        engine = FakeEngine(first_token_delay=args.fake_latency / 1000, chunk_delay=args.fake_latency / 5000)
+    else:
+        api_key = Settings().load_api_key()
+        if not api_key:
+            print("Fatal error: Could not load Gemini API key.", file=sys.stderr)
+            return 1
+        engine = GeminiEngine(api_key=api_key)
+        if not args.no_cache:
+            engine = CachingEngine(
+                engine,
+                cache=PersistentCache("jarvis/response_cache.sqlite3", max_entries=1000, ttl=24 * 3600)
+            )
+    # Every session gets its own in-memory conversation; actions share one executor.
+    action_handler = DryRunActionHandler() if args.dry_run else ActionHandler()
+    runner = BatchRunner(
+        lambda: JarvisAssistant(engine=engine, prompt_controller=PromptController(),
+                                memory=Memory(file_path=None), action_handler=action_handler),
+        concurrency=args.concurrency, rate=args.rate, role=args.role, timeout=args.timeout,
+    )
+
+    with contextlib.ExitStack() as stack:
+        stack.callback(action_handler.shutdown)
+        source = sys.stdin if args.batch == "-" else stack.enter_context(open(args.batch, encoding="utf-8"))
+        output = sys.stdout if args.output == "-" else stack.enter_context(open(args.output, "w", encoding="utf-8"))
+        summary = asyncio.run(runner.run(read_queries(source), output))
+
+    print(json.dumps(summary), file=sys.stderr)
+    if args.profile:
+        print_profile("jarvis/metrics.prom", file=sys.stderr)
+        metrics.disable()
+    return 1 if summary["errors"] else 0
+
 def main():
     """
     Main function to run the JARVIS voice assistant in CLI mode.
     """
+    parser = argparse.ArgumentParser(description="JARVIS voice assistant (CLI mode).")
+    parser.add_argument("--profile", nargs="?", const="jarvis/metrics.jsonl", metavar="FILE",
+                        help="Record per-turn latency spans to FILE (JSON lines, default: %(const)s) "
+                             "and print a latency summary on exit.")
+    voice = parser.add_argument_group("voice input")
+    voice.add_argument("--stt", choices=["google", "vosk"],
+                       help="Speech-to-text backend (default: JARVIS_STT_BACKEND, else google).")
+    voice.add_argument("--audio-file", metavar="FILE",
+                       help="Take voice commands from a WAV or raw 16 kHz PCM file instead of the microphone.")
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument("--batch", metavar="FILE",
+                       help="Answer the JSONL queries in FILE ('-' for stdin) without voice I/O, then exit.")
+    batch.add_argument("--output", default="-", metavar="FILE",
+                       help="Where to write the JSONL results (default: stdout).")
+    batch.add_argument("--concurrency", type=int, default=8, help="Queries in flight at once (default: %(default)s).")
+    batch.add_argument("--rate", type=float, help="Maximum queries started per second.")
+    batch.add_argument("--timeout", type=float, help="Seconds after which a query is abandoned.")
+    batch.add_argument("--role", default="Default", help="Prompt role for queries that do not set one.")
+    batch.add_argument("--no-cache", action="store_true", help="Do not answer from the response cache.")
+    batch.add_argument("--dry-run", action="store_true",
+                       help="Describe OS actions (apps, websites, music) instead of performing them.")
+    batch.add_argument("--fake-engine", action="store_true",
+                       help="Answer with the offline FakeEngine instead of Gemini.")
+    batch.add_argument("--fake-latency", type=float, default=0.0, metavar="MS",
+                       help="Simulated time to first token of the FakeEngine.")
+    args = parser.parse_args()
+    if args.profile:
+        metrics.enable(JsonLinesExporter(args.profile))
+    if args.batch:
+        sys.exit(run_batch(args))
+    # Heavy libraries are imported on first use; load them while JARVIS greets the user.
+    warm_up(["google.generativeai", "speech_recognition", "gtts", "wikipedia", "numpy"])
+
     # --- INITIALIZATION ---
     settings = Settings()
     api_key = settings.load_api_key()
@@ -24,8 +216,15 @@ def main():
         return
 
     # Initialize components with file path for history
-    engine = GeminiEngine(api_key=api_key)
-    memory = Memory(file_path="jarvis/conversation_history.json")
+    # Identical prompts (e.g. common one-shot questions) are answered from the cache
+    engine = CachingEngine(
+        GeminiEngine(api_key=api_key),
+        cache=PersistentCache("jarvis/response_cache.sqlite3", max_entries=1000, ttl=24 * 3600)
+    )
+    if settings.load_memory_backend() == "sqlite":
+        memory = SQLiteMemory(db_path="jarvis/conversations.sqlite3", session_id="cli")
+    else:
+        memory = Memory(file_path="jarvis/conversation_history.json")
     prompt_controller = PromptController()
     assistant = JarvisAssistant(
         engine=engine,
@@ -43,37 +242,70 @@ def main():
         speak("Good Evening Sir! How are you doing?")
     speak("I am Jarvis. How may I help you today?")
 
+    listener = make_listener(args, settings, assistant.router)
+
     # --- MAIN LOOP ---
     while True:
-        query = take_command()
+        query = take_command(listener)
 
         if not query:
+            if listener.exhausted:
+                # The microphone could not be opened or has gone away.
+                print("Voice input stopped; type your questions instead.")
+                listener = KeyboardListener()
             continue
 
         # --- Command Handling ---
-        if 'exit' in query or 'quit' in query or 'stop' in query:
+        if is_exit_command(query):
             speak("Goodbye, have a nice day!")
+            listener.stop()
+            assistant.action_handler.shutdown()
+            get_speech_service().shutdown()
+            if args.profile:
+                print_profile("jarvis/metrics.prom")
+                metrics.disable()
             break
         
         if 'export conversation' in query:
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"conversation_export_{timestamp}.json"
-            memory.export_history(filename)
-            speak(f"Conversation exported successfully to {filename}")
+            # "export conversation as markdown" / "... as json lines"; JSON otherwise.
+            extension = "md" if "markdown" in query else "jsonl" if "json lines" in query else "json"
+            filename = f"conversation_export_{timestamp}.{extension}"
+            if memory.export_history(filename):
+                speak(f"Conversation exported successfully to {filename}")
+            else:
+                speak("Sorry, I couldn't export the conversation.")
+            listener.drain()
             continue
 
         # --- Streaming Response ---
+        # Sentences are spoken as soon as they are complete, while the rest
+        # of the response is still streaming in.
         print("JARVIS: ", end="", flush=True)
-        full_response = ""
-        for chunk in assistant.respond_stream(query):
-            print(chunk, end="", flush=True)
-            full_response += chunk
-        
+        speaker = StreamingSpeaker(speak).start()
+        stream = assistant.respond_stream(query)
+        try:
+            # Saying "stop" cancels the answer while it is still being generated, too.
+            cancelled = False
+            for chunk in stream:
+                print(chunk, end="", flush=True)
+                speaker.feed(chunk)
+                if heard_stop(listener):
+                    cancelled = True
+                    break
+            if not cancelled:
+                speaker.close()
+                cancelled = wait_for_speech(speaker, listener)
+            if cancelled:
+                stream.close()
+                cancel_response(speaker, assistant.action_handler)
+        except KeyboardInterrupt:
+            # Ctrl+C stops the current answer without leaving JARVIS.
+            stream.close()
+            cancel_response(speaker, assistant.action_handler)
+
         print("\n") # Newline after the response is complete
-        
-        # Speak the full response after streaming it to the console
-        if full_response:
-            speak(full_response)
+        speaker.log_timings()
 
 if __name__ == "__main__":
     main()
@@ -23,3 +23,33 @@ class Settings:
             print("ERROR: GEMINI_API_KEY not found or not set in .env file.")
             return None
         return api_key
+
+
+    def load_memory_backend(self):
+        """
+        Loads which conversation store to use from the JARVIS_MEMORY_BACKEND variable.
+
+        Returns:
+            str: "sqlite" for the SQLite store with full-text search, otherwise "journal".
+        """
+        backend = os.getenv("JARVIS_MEMORY_BACKEND", "journal").strip().lower()
+        return "sqlite" if backend == "sqlite" else "journal"
+
+    def load_stt_backend(self):
+        """
+        Loads which speech-to-text backend to use from the JARVIS_STT_BACKEND variable.
+
+        Returns:
+            str: "vosk" for offline recognition, otherwise "google".
+        """
+        backend = os.getenv("JARVIS_STT_BACKEND", "google").strip().lower()
+        return "vosk" if backend == "vosk" else "google"
+
+    def load_vosk_model(self):
+        """
+        Loads the Vosk model directory from the JARVIS_VOSK_MODEL variable.
+
+        Returns:
+            str: The directory, or None to download the default small English model.
+        """
+        return os.getenv("JARVIS_VOSK_MODEL") or None
@@ -0,0 +1,179 @@
+import concurrent.futures
+import itertools
+import logging
+import threading
+import time
+from jarvis.metrics import metrics
+
+class ActionTimeout(Exception):
+    """Raised when an action does not finish within its timeout."""
+
+class ActionCancelled(Exception):
+    """Raised when waiting for an action that has been cancelled."""
+
+
+class ActionFuture:
+    """
+    A handle on an action running on the ActionExecutor's thread pool.
+    """
+    def __init__(self, name, timeout, cancel_event=None):
+        """
+        Args:
+            name (str): Name used in logs and metrics.
+            timeout (float): Seconds from submission until the action times out, or None.
+            cancel_event (threading.Event): Set when the action is cancelled or times out.
+                                            A new one by default.
+        """
+        self.name = name
+        self.cancel_event = cancel_event or threading.Event()
+        self.submitted_at = time.perf_counter()
+        self.deadline = None if timeout is None else self.submitted_at + timeout
+        self._future = None
+        self._finished = threading.Event()
+
+    def _attach(self, future):
+        self._future = future
+        future.add_done_callback(lambda _: self._finished.set())
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def done(self):
+        """True once the action has finished, failed or been cancelled."""
+        return self._finished.is_set()
+
+    def cancel(self):
+        """
+        Cancels the action. A queued action never starts; a running one keeps
+        its thread until it returns, but its result is discarded and actions
+        that check `cancel_event` can stop early.
+        """
+        if self.done():
+            return
+        self.cancel_event.set()
+        self._future.cancel()
+        self._finished.set()
+        logging.info(f"Cancelled action '{self.name}'")
+
+    def result(self, timeout=None):
+        """
+        Waits for the action and returns its result.
+
+        Args:
+            timeout (float): Seconds to wait. Defaults to the time left until the
+                             action's own deadline.
+
+        Returns:
+            The value returned by the action. Exceptions raised by the action are re-raised.
+
+        Raises:
+            ActionTimeout: If the action is still running at the deadline. It is cancelled.
+            ActionCancelled: If the action was cancelled.
+        """
+        if timeout is None and self.deadline is not None:
+            timeout = max(0.0, self.deadline - time.perf_counter())
+        # Also wakes up when the action is cancelled from another thread.
+        if not self._finished.wait(timeout):
+            self.cancel()
+            raise ActionTimeout(f"Action '{self.name}' timed out")
+        if self.cancelled:
+            raise ActionCancelled(f"Action '{self.name}' was cancelled")
+        return self._future.result()
+
+
+class ActionExecutor:
+    """
+    Runs actions (network lookups, launching programs, playback) on a managed
+    thread pool, so the caller can speak announcements while they run.
+
+    Every action gets a timeout and can be cancelled, individually or all at
+    once. The pool threads are created on first use.
+    """
+    def __init__(self, max_workers=4, timeout=15.0):
+        """
+        Initializes the ActionExecutor.
+
+        Args:
+            max_workers (int): Number of actions that can run at the same time.
+            timeout (float): Default timeout per action, in seconds. None waits forever.
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool = None
+        self._pending = set()
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix="jarvis-action")
+        return self._pool
+
+    def submit(self, func, *args, name=None, timeout=None, cancel_event=None, **kwargs):
+        """
+        Starts an action in the background.
+
+        Args:
+            func (callable): The action.
+            *args, **kwargs: Passed to `func`.
+            name (str): Name used in logs and metrics. Defaults to the function name.
+            timeout (float): Overrides the executor's default timeout.
+            cancel_event (threading.Event): Set when the action is cancelled or times out.
+                                            Pass the same event to `func` in `args`, so it can
+                                            check it before a side effect it must not perform late.
+
+        Returns:
+            ActionFuture: Handle to wait for or cancel the action.
+        """
+        name = name or getattr(func, "__name__", f"action-{next(self._counter)}")
+        action = ActionFuture(name, self.timeout if timeout is None else timeout, cancel_event)
+
+        def run():
+            if action.cancelled:
+                raise ActionCancelled(f"Action '{name}' was cancelled")
+            with metrics.span(f"action.{name}"):
+                return func(*args, **kwargs)
+
+        with self._lock:
+            self._pending.add(action)
+            action._attach(self._get_pool().submit(run))
+        action._future.add_done_callback(lambda _: self._discard(action))
+        return action
+
+    def _discard(self, action):
+        with self._lock:
+            self._pending.discard(action)
+
+    def run(self, func, *args, name=None, timeout=None, cancel_event=None, **kwargs):
+        """
+        Runs an action on the pool and waits for it, up to its timeout.
+
+        Returns:
+            The value returned by the action.
+
+        Raises:
+            ActionTimeout: If the action did not finish in time.
+            ActionCancelled: If the action was cancelled while waiting.
+        """
+        return self.submit(func, *args, name=name, timeout=timeout, cancel_event=cancel_event, **kwargs).result()
+
+    def pending(self):
+        """Returns the actions that have not finished yet."""
+        with self._lock:
+            return [action for action in self._pending if not action.done()]
+
+    def cancel_all(self):
+        """Cancels every queued or running action. Returns how many were cancelled."""
+        actions = self.pending()
+        for action in actions:
+            action.cancel()
+        return len(actions)
+
+    def shutdown(self, wait=False):
+        """Cancels the pending actions and stops the pool threads."""
+        self.cancel_all()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
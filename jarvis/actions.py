@@ -1,44 +1,119 @@
 import os
 import webbrowser
-import wikipedia
-import random
 import subprocess
 import logging
-from jarvis.voice_io import speak
+import threading
+from jarvis.voice_io import speak as voice_speak
+from jarvis.wiki_search import WikipediaSearch, PageNotFound, AmbiguousQuery
+from jarvis.music_library import MusicLibrary
+from jarvis.action_executor import ActionExecutor, ActionTimeout, ActionCancelled
 
 class ActionHandler:
     """
     This class handles the execution of commands that interact with the OS,
     such as opening applications, websites, or searching for information.
+
+    The slow part of every action (network lookups, launching programs,
+    playback) runs on an ActionExecutor with a timeout, while announcements
+    are queued for speaking without waiting, so both happen at the same time.
     """
+    def __init__(self, wikipedia_search=None, music_library=None, executor=None, speak=None):
+        """
+        Initializes the ActionHandler.
 
-    def play_music(self):
+        Args:
+            wikipedia_search (WikipediaSearch): Cached Wikipedia client. A default
+                                                one is created on first use if omitted.
+            music_library (MusicLibrary): Indexed music collection. A default one for
+                                          the 'music' directory is created on first use.
+            executor (ActionExecutor): Runs the actions. Defaults to a private pool.
+            speak (callable): `speak(text, block=...)` used for announcements.
+                              Defaults to `voice_io.speak`.
         """
-        Plays a random song from the 'music' directory.
+        self._wikipedia_search = wikipedia_search
+        self._music_library = music_library
+        self.executor = executor or ActionExecutor()
+        self.speak = speak or voice_speak
+        # A handler can be shared by several sessions; each default is created once.
+        self._init_lock = threading.Lock()
+
+    @property
+    def wikipedia_search(self):
+        with self._init_lock:
+            if self._wikipedia_search is None:
+                self._wikipedia_search = WikipediaSearch()
+            return self._wikipedia_search
+
+    @property
+    def music_library(self):
+        with self._init_lock:
+            if self._music_library is None:
+                self._music_library = MusicLibrary()
+            return self._music_library
+
+    @staticmethod
+    def _describe(track):
+        if track.get("artist"):
+            return f"{track['title']} by {track['artist']}"
+        return track["title"]
+
+    def play_music(self, title=None):
         """
-        music_dir = 'music'
+        Plays a song from the music library: the one best matching `title`, or
+        the next song of the no-repeat shuffle.
+
+        Returns:
+            str: The message for the user.
+        """
+        library = self.music_library
+        # Set if the wait below times out or is cancelled, so a late lookup does not start a song anyway.
+        cancelled = threading.Event()
         try:
-            songs = [f for f in os.listdir(music_dir) if f.endswith('.mp3')]
-            if not songs:
+            track = self.executor.run(library.play, title, cancelled, name="play_music", cancel_event=cancelled)
+            if track is None:
+                if not os.path.isdir(library.music_dir):
+                    return f"Music directory not found. Please create a '{library.music_dir}' folder."
+                if title:
+                    return f"I couldn't find a song called '{title}'."
                 return "No music files found in the music directory."
-            
-            random_song = random.choice(songs)
-            music_path = os.path.join(music_dir, random_song)
-            speak(f"Playing {os.path.basename(music_path)}")
-            subprocess.call(["open", music_path])
-            return f"Now playing: {os.path.basename(music_path)}"
-        except FileNotFoundError:
-            return "Music directory not found. Please create a 'music' folder."
+            self.speak(f"Playing {self._describe(track)}", block=False)
+            return f"Now playing: {self._describe(track)}"
+        except ActionTimeout:
+            return "Sorry, the music library is taking too long to respond."
+        except ActionCancelled:
+            return "Music playback cancelled."
         except Exception as e:
             logging.error(f"Music playback error: {e}")
             return f"Sorry, an error occurred while trying to play music: {e}"
 
+    def previous_song(self):
+        """Plays the previously played song again."""
+        try:
+            cancelled = threading.Event()
+            track = self.executor.run(self.music_library.previous, cancelled, name="previous_song",
+                                      cancel_event=cancelled)
+        except (ActionTimeout, ActionCancelled):
+            return "Sorry, I couldn't go back to the previous song."
+        except Exception as e:
+            logging.error(f"Music playback error: {e}")
+            return f"Sorry, an error occurred while trying to play music: {e}"
+        if track is None:
+            return "There is no previous song."
+        return f"Now playing: {self._describe(track)}"
+
+    def stop_music(self):
+        """Stops the music that is playing."""
+        if not self.music_library.stop():
+            return ("Sorry, I can't stop the music: it is playing in your default music app. "
+                    "Install mpg123 or ffplay so that I can control playback.")
+        return "Music stopped."
+
     def open_website(self, url, site_name):
         """
         Opens a specified URL in the default web browser.
         """
         try:
-            webbrowser.open(url)
+            self.executor.run(webbrowser.open, url, name="open_website")
             return f"Opening {site_name}..."
         except Exception as e:
             logging.error(f"Error opening website {url}: {e}")
@@ -47,26 +122,41 @@ class ActionHandler:
     def search_wikipedia(self, query):
         """
         Searches Wikipedia for a query and returns a summary.
+
+        The announcement is spoken while the summary is being fetched.
         """
+        search = self.executor.submit(self.wikipedia_search.summary, query, name="search_wikipedia")
+        announcement = self.speak(f"Searching Wikipedia for {query}...", block=False)
         try:
-            speak(f"Searching Wikipedia for {query}...")
-            results = wikipedia.summary(query, sentences=2)
-            speak("According to Wikipedia")
+            results = search.result()
+            self.speak("According to Wikipedia", block=False)
             return results
-        except wikipedia.exceptions.PageError:
+        except PageNotFound:
             return f"Sorry, I could not find anything on Wikipedia for '{query}'."
-        except wikipedia.exceptions.DisambiguationError:
+        except AmbiguousQuery:
             return f"There are multiple results for '{query}'. Please be more specific."
+        except ActionTimeout:
+            self._drop(announcement)
+            return f"Sorry, Wikipedia is taking too long to answer for '{query}'."
+        except ActionCancelled:
+            self._drop(announcement)
+            return f"Wikipedia search for '{query}' cancelled."
         except Exception as e:
             logging.error(f"Wikipedia search error: {e}")
             return "Sorry, an error occurred while searching Wikipedia."
-    
+
+    @staticmethod
+    def _drop(announcement):
+        """Keeps an announcement that has not been spoken yet from being spoken."""
+        if announcement is not None:
+            announcement.cancelled = True
+
     def open_application(self, app_name):
         """
         Opens a macOS application.
         """
         try:
-            subprocess.Popen(["open", "-a", app_name])
+            self.executor.run(subprocess.Popen, ["open", "-a", app_name], name="open_application")
             return f"Opening {app_name}..."
         except Exception as e:
             logging.error(f"Error opening application {app_name}: {e}")
@@ -77,8 +167,120 @@ class ActionHandler:
         Closes a macOS application.
         """
         try:
-            subprocess.Popen(["osascript", "-e", f'tell application "{app_name}" to quit'])
+            self.executor.run(subprocess.Popen, ["osascript", "-e", f'tell application "{app_name}" to quit'],
+                              name="close_application")
             return f"Closing {app_name}..."
         except Exception as e:
             logging.error(f"Error closing application {app_name}: {e}")
             return f"Sorry, I couldn't close {app_name}."
+
+    def cancel(self):
+        """Cancels every action that is still running, e.g. when the user interrupts."""
+        return self.executor.cancel_all()
+
+    def shutdown(self):
+        """Cancels the running actions and stops the executor's threads."""
+        self.executor.shutdown()
+
+    def register_commands(self, router):
+        """
+        Registers the commands this handler can execute with a CommandRouter.
+
+        Args:
+            router (CommandRouter): The router to register into.
+        """
+        # Commands whose phrase is followed by free text take precedence, so that
+        # "search wikipedia time travel" is not mistaken for a time request.
+        router.register("search_wikipedia", ["search wikipedia", "search wikipedia for", "search on wikipedia", "wikipedia search"],
+                        self._wikipedia_command, priority=30, slot=True, side_effects=True)
+        router.register("youtube", ["open youtube", "search youtube", "search youtube for", "search on youtube", "youtube search"],
+                        self._youtube_command, priority=30, slot=True, side_effects=True)
+        router.register("play_music", ["play music", "play song", "play a song", "play some music",
+                                       "play the song", "play something"],
+                        lambda match: self.play_music(match.rest or None), priority=20, slot=True,
+                        side_effects=True)
+        router.register("next_song", ["next song", "skip song", "skip this song", "next track"],
+                        lambda match: self.play_music(), priority=20, side_effects=True)
+        router.register("previous_song", ["previous song", "last song", "previous track"],
+                        lambda match: self.previous_song(), priority=20, side_effects=True)
+        router.register("stop_music", ["stop music", "stop the music", "pause music"],
+                        lambda match: self.stop_music(), priority=20, side_effects=True)
+        # "play <title>" only answers if a song matches; otherwise the query goes to the model.
+        router.register("play_title", ["play"], self._play_title_command, priority=5, slot=True,
+                        side_effects=True)
+
+        websites = {
+            "google": ("https://www.google.com/", "Google"),
+            "facebook": ("https://www.facebook.com/", "Facebook"),
+            "github": ("https://github.com/", "GitHub"),
+        }
+        for key, (url, site_name) in websites.items():
+            router.register(f"open_{key}", [f"open {key}"],
+                            lambda match, url=url, site_name=site_name: self.open_website(url, site_name), priority=20,
+                            side_effects=True)
+
+        for app_name in ("Music", "Calendar", "Calculator", "Terminal"):
+            key = app_name.lower()
+            router.register(f"open_{key}", [f"open {key}"],
+                            lambda match, app_name=app_name: self.open_application(app_name), priority=20,
+                            side_effects=True)
+            router.register(f"close_{key}", [f"close {key}"],
+                            lambda match, app_name=app_name: self.close_application(app_name), priority=20,
+                            side_effects=True)
+
+    def _wikipedia_command(self, match):
+        search_query = match.rest
+        if search_query:
+            return self.search_wikipedia(search_query)
+        return "Please tell me what you want to search on Wikipedia."
+
+    def _play_title_command(self, match):
+        # Only "play <title>" at the start of a query, not "what is the play hamlet about".
+        if match.before or not match.rest or not os.path.isdir(self.music_library.music_dir):
+            return None
+        # Any query starting with "play" ends up here, so it must clearly name a track.
+        if not self.music_library.find(match.rest, min_score=0.7):
+            return None
+        return self.play_music(match.rest)
+
+    def _youtube_command(self, match):
+        search_query = match.rest
+        if search_query:
+            # Not using urllib.parse.quote as per user request
+            url = f"https://www.youtube.com/results?search_query={search_query}"
+            return self.open_website(url, f"YouTube for '{search_query}'")
+        return self.open_website("https://www.youtube.com/", "YouTube")
+
+
+class DryRunActionHandler(ActionHandler):
+    """
+    An ActionHandler that describes the OS actions it would take instead of
+    taking them, so that batch evaluations can exercise the command routing
+    without opening apps, websites or music. Wikipedia lookups, which change
+    nothing, still run; announcements are not spoken.
+    """
+    def __init__(self, **kwargs):
+        kwargs.setdefault("speak", lambda text, block=True: None)
+        super().__init__(**kwargs)
+
+    @staticmethod
+    def _would(action):
+        return f"[dry run] Would {action}."
+
+    def play_music(self, title=None):
+        return self._would(f"play '{title}'" if title else "play the next song")
+
+    def previous_song(self):
+        return self._would("play the previous song")
+
+    def stop_music(self):
+        return self._would("stop the music")
+
+    def open_website(self, url, site_name):
+        return self._would(f"open {site_name} ({url})")
+
+    def open_application(self, app_name):
+        return self._would(f"open {app_name}")
+
+    def close_application(self, app_name):
+        return self._would(f"close {app_name}")
@@ -1,17 +1,38 @@
 from jarvis.actions import ActionHandler
+from jarvis.command_router import CommandRouter
+from jarvis.intent_classifier import IntentClassifier, np
+from jarvis.metrics import metrics
+import asyncio
 import datetime
-import webbrowser
 
 class JarvisAssistant:
     """
     The main coordinator for the JARVIS assistant.
     Orchestrates the interaction between memory, prompt control, actions, and the AI engine.
     """
-    def __init__(self, engine, prompt_controller, memory):
+    def __init__(self, engine, prompt_controller, memory, action_handler=None, classify_intents=True):
+        """
+        Initializes the JarvisAssistant.
+
+        Args:
+            engine (BaseEngine): The generative engine, e.g. GeminiEngine or a CachingEngine around it.
+            prompt_controller (PromptController): Builds the prompt for each turn.
+            memory (Memory): Stores the conversation history.
+            action_handler (ActionHandler): Executes OS actions. Can be shared between
+                                            assistants; a new one is created if omitted.
+            classify_intents (bool): When no command phrase matches exactly, try the fuzzy
+                                     IntentClassifier (requires NumPy) before the engine.
+        """
         self.engine = engine
         self.prompt_controller = prompt_controller
         self.memory = memory
-        self.action_handler = ActionHandler()
+        self.action_handler = action_handler or ActionHandler()
+        self.router = CommandRouter()
+        self._register_commands()
+        self.classify_intents = classify_intents
+        self.intent_classifier = None
+        # The command that answered the latest turn, or None if the engine did.
+        self.last_command = None
 
     def respond(self, user_input, role="Default"):
         """
@@ -26,12 +47,18 @@ class JarvisAssistant:
         """
         Generates a streaming response to user input. It first checks for specific commands,
         and if none are found, it queries the generative AI model via a stream.
+        The name of the command that answered, if any, is left in `last_command`.
         """
+        yield from metrics.time_stream(self._respond_stream(user_input, role), "turn")
+
+    def _respond_stream(self, user_input, role):
         query = user_input.lower()
+        self.last_command = None
 
         # --- Command Handling ---
         # (These are handled instantly and don't need to be streamed)
-        command_response = self._handle_commands(query)
+        with metrics.span("turn.route"):
+            command_response = self._handle_commands(query)
         if command_response:
             yield command_response
             return
@@ -39,11 +66,12 @@ class JarvisAssistant:
         # --- Generative AI Fallback ---
         self.memory.add("user", user_input)
         history = self.memory.get_generative_history() # Use the correct history format
-        prompt_for_engine = self.prompt_controller.build_prompt(history, role)
+        # Older turns are folded into a summary carried by the system instruction
+        prompt_for_engine, system_instruction = self.prompt_controller.build_request(history, role)
         
         full_response = ""
         # Stream the response from the engine
-        for chunk in self.engine.generate_stream(prompt_for_engine):
+        for chunk in self.engine.generate_stream(prompt_for_engine, system_instruction=system_instruction):
             full_response += chunk
             yield chunk
         
@@ -51,62 +79,133 @@ class JarvisAssistant:
         if full_response:
             self.memory.add("model", full_response)
 
+    async def respond_async(self, user_input, role="Default"):
+        """
+        Asynchronous version of `respond()`.
+        """
+        full_response = ""
+        async for chunk in self.respond_stream_async(user_input, role):
+            full_response += chunk
+        return full_response
+
+    async def respond_stream_async(self, user_input, role="Default"):
+        """
+        Asynchronous version of `respond_stream()`, also setting `last_command`.
+
+        Commands run on an executor thread, memory writes are offloaded, and the
+        engine is streamed through its async API, so many conversations can
+        share one event loop without blocking each other.
+        """
+        async for chunk in metrics.time_stream_async(self._respond_stream_async(user_input, role), "turn"):
+            yield chunk
+
+    async def _respond_stream_async(self, user_input, role):
+        query = user_input.lower()
+        self.last_command = None
+
+        # --- Command Handling ---
+        with metrics.span("turn.route"):
+            match = self.router.match(query)
+            command_response = None
+            loop = asyncio.get_running_loop()
+            if match is not None:
+                command_response = await loop.run_in_executor(None, self.router.dispatch, match)
+            if not command_response:
+                intent = self._classify(query, match)
+                if intent is not None:
+                    match = intent.to_match()
+                    command_response = await loop.run_in_executor(None, self.router.dispatch, match)
+        if command_response:
+            self.last_command = match.name
+            yield command_response
+            return
+
+        # --- Generative AI Fallback ---
+        await self.memory.add_async("user", user_input)
+        history = self.memory.get_generative_history()
+        prompt_for_engine, system_instruction = self.prompt_controller.build_request(history, role)
+
+        full_response = ""
+        async for chunk in self.engine.generate_stream_async(prompt_for_engine, system_instruction=system_instruction):
+            full_response += chunk
+            yield chunk
+
+        if full_response:
+            await self.memory.add_async("model", full_response)
+
+    def _register_commands(self):
+        """Registers the conversational replies and the ActionHandler's commands."""
+        self.router.register("name", ["your name"],
+                             lambda match: "My name is Jarvis, your personal assistant.", priority=10)
+        self.router.register("how_are_you", ["how are you"],
+                             lambda match: "I am functioning at full capacity, sir. Thank you for asking.", priority=10)
+        self.router.register("creator", ["who made you", "who created you"],
+                             lambda match: "I was created by Anwar, a Data Science Learner.", priority=10)
+        self.router.register("time", ["the time", "what time", "time is it", "current time"],
+                             self._tell_time, priority=10)
+        self.router.register("thanks", ["thank you", "thanks"],
+                             lambda match: "It's my pleasure, sir. Always happy to help.", priority=10)
+        self.router.register("search_history",
+                             ["what did i ask about", "what did i say about", "did i ask about", "search my history for"],
+                             self._search_history, priority=40, slot=True)
+        self.action_handler.register_commands(self.router)
+
+    def _tell_time(self, match):
+        strTime = datetime.datetime.now().strftime("%H:%M:%S")
+        return f"Sir, the time is {strTime}"
+
+    def _search_history(self, match):
+        topic = match.rest.rstrip("?")
+        if not topic:
+            return "Please tell me what topic you want me to look for."
+        # A session proxy returns None when its storage backend cannot search.
+        search = getattr(self.memory, "search", None)
+        results = search(topic, role="user", limit=3) if search else None
+        if results is None:
+            return "Searching past conversations requires the SQLite conversation store."
+        if not results:
+            return f"I couldn't find anything you asked about {topic}."
+        lines = [f"Here is what you asked about {topic}:"]
+        for result in results:
+            when = datetime.datetime.fromtimestamp(result["created_at"]).strftime("%b %d, %H:%M")
+            lines.append(f"- {when}: {result['content']}")
+        return "\n".join(lines)
+
     def _handle_commands(self, query):
-        """Helper to process simple, non-AI commands."""
-        if 'your name' in query:
-            return "My name is Jarvis, your personal assistant."
-        elif 'how are you' in query:
-            return "I am functioning at full capacity, sir. Thank you for asking."
-        elif 'who made you' in query:
-            return "I was created by Anwar, a Data Science Learner."
-        elif 'time' in query:
-            strTime = datetime.datetime.now().strftime("%H:%M:%S")
-            return f"Sir, the time is {strTime}"
-        elif 'thank you' in query:
-            return "It's my pleasure, sir. Always happy to help."
-        elif 'open music' in query:
-            return self.action_handler.open_application("Music")
-        elif 'play music' in query or 'play song' in query:
-            return self.action_handler.play_music()
-        elif 'search wikipedia' in query:
-            search_query = query.replace("search wikipedia", "").strip()
-            if search_query:
-                return self.action_handler.search_wikipedia(search_query)
-            else:
-                return "Please tell me what you want to search on Wikipedia."
-        elif 'open google' in query:
-            return self.action_handler.open_website("https://www.google.com/", "Google")
-        elif 'open facebook' in query:
-            return self.action_handler.open_website("https://www.facebook.com/", "Facebook")
-        elif 'open github' in query:
-            return self.action_handler.open_website("https://github.com/", "GitHub")
-        elif 'youtube' in query:
-            # Simplified logic as per user request
-            search_query = query.replace("open youtube", "").replace("search youtube for", "").replace("search youtube", "").strip()
-            if search_query:
-                # Not using urllib.parse.quote as per user request
-                url = f"https://www.youtube.com/results?search_query={search_query}"
-                return self.action_handler.open_website(url, f"YouTube for '{search_query}'")
-            else:
-                return self.action_handler.open_website("https://www.youtube.com/", "YouTube")
-        elif 'open calendar' in query:
-            return self.action_handler.open_application("Calendar")
-        elif 'close calendar' in query:
-            return self.action_handler.close_application("Calendar")
-        elif 'open calculator' in query:
-            return self.action_handler.open_application("Calculator")
-        elif 'close calculator' in query:
-            return self.action_handler.close_application("Calculator")
-        elif 'open terminal' in query:
-            return self.action_handler.open_application("Terminal")
-        elif 'close terminal' in query:
-            return self.action_handler.close_application("Terminal")
-        elif 'close music' in query:
-            return self.action_handler.close_application("Music")
+        """
+        Helper to process simple, non-AI commands: exact command phrases first,
+        then the intent classifier for noisy transcripts such as "open calculater".
+        """
+        match = self.router.match(query)
+        if match is not None:
+            response = self.router.dispatch(match)
+            if response:
+                self.last_command = match.name
+                return response
+        intent = self._classify(query, match)
+        if intent is not None:
+            response = self.router.dispatch(intent.to_match())
+            if response:
+                self.last_command = intent.name
+            return response
         return None
 
+    def _classify(self, query, match):
+        """Returns the fuzzy Intent of a query, or None. A command the router already tried is skipped."""
+        if not self.classify_intents:
+            return None
+        if self.intent_classifier is None:
+            if not np.available:
+                self.classify_intents = False
+                return None
+            # Built once per set of commands and shared by every assistant.
+            self.intent_classifier = IntentClassifier.shared(self.router)
+        with metrics.span("turn.classify"):
+            return self.intent_classifier.classify(query, exclude=(match.name,) if match is not None else ())
+
     def clear_memory(self):
         """
         Clears the conversation history for the generative AI.
         """
-        self.memory.clear()
\ No newline at end of file
+        self.memory.clear()
+        self.prompt_controller.context_window.reset()
\ No newline at end of file
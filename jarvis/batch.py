@@ -0,0 +1,220 @@
+"""
+Non-interactive batch mode: runs JSON-lines queries through JarvisAssistant.
+
+Every input line is a JSON object such as
+
+    {"id": "q1", "query": "what is the capital of france", "role": "Default", "session": "a"}
+
+Only "query" is required; a line that is not JSON is taken as the query
+text itself. Queries without a "session" are independent: each one starts
+from an empty conversation. Queries sharing a session share one
+conversation and run one after another, in input order.
+
+Queries go through the same command router and engine pipeline as the
+interactive CLI, with a bounded number in flight and an optional rate
+limit. One result per query is written as soon as it completes:
+
+    {"index": 1, "id": "q1", "query": "...", "response": "...", "command": null,
+     "error": null, "queued_ms": 0.1, "first_chunk_ms": 52.3, "total_ms": 80.4, "chunks": 5}
+"""
+import asyncio
+import json
+import logging
+import time
+
+class RateLimiter:
+    """
+    An asyncio token bucket allowing `rate` acquisitions per second on average,
+    with bursts of up to `burst`.
+    """
+    def __init__(self, rate, burst=1):
+        """
+        Args:
+            rate (float): Average acquisitions per second.
+            burst (int): Number of acquisitions allowed back to back.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self._updated is not None:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def read_queries(lines):
+    """
+    Parses batch input.
+
+    Args:
+        lines (iterable): Lines of JSONL (e.g. an open file or sys.stdin).
+
+    Yields:
+        tuple: (line number, record dict). Records without a usable query carry an "error".
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = line
+        if isinstance(record, str):
+            record = {"query": record}
+        if not isinstance(record, dict) or not isinstance(record.get("query"), str) or not record["query"].strip():
+            record = {"id": number, "error": "line has no 'query' string"}
+        record.setdefault("id", number)
+        yield number, record
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class BatchRunner:
+    """
+    Runs queries concurrently on one event loop and streams the results.
+    """
+    def __init__(self, make_assistant, concurrency=8, rate=None, role="Default", timeout=None):
+        """
+        Initializes the BatchRunner.
+
+        Args:
+            make_assistant (callable): Returns a new JarvisAssistant. Called once per
+                                       session; queries without a session reuse idle
+                                       assistants whose memory is cleared after each query.
+            concurrency (int): Maximum number of queries in flight.
+            rate (float): Maximum number of queries started per second, or None.
+            role (str): Default prompt role for queries that do not name one.
+            timeout (float): Seconds after which a query is abandoned, or None.
+        """
+        self.make_assistant = make_assistant
+        self.concurrency = concurrency
+        self.rate = rate
+        self.role = role
+        self.timeout = timeout
+        self._sessions = {}
+        self._idle = []
+
+    def _session(self, name):
+        if name is None:
+            # Building an assistant registers every command, which costs more than answering.
+            return (self._idle.pop() if self._idle else self.make_assistant()), None
+        if name not in self._sessions:
+            self._sessions[name] = (self.make_assistant(), asyncio.Lock())
+        return self._sessions[name]
+
+    def _release(self, assistant, lock):
+        if lock is not None:
+            lock.release()
+        else:
+            assistant.memory.clear()
+            self._idle.append(assistant)
+
+    async def _answer(self, assistant, record, result, started):
+        async for chunk in assistant.respond_stream_async(record["query"], record.get("role", self.role)):
+            if result["chunks"] == 0:
+                result["first_chunk_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            result["chunks"] += 1
+            result["response"] += chunk
+
+    async def _run_one(self, index, record, read_at):
+        result = {
+            "index": index, "id": record["id"], "query": record.get("query"), "response": "",
+            "command": None, "error": record.get("error"), "queued_ms": None,
+            "first_chunk_ms": None, "total_ms": None, "chunks": 0,
+        }
+        if result["error"]:
+            return result
+        assistant, lock = self._session(record.get("session"))
+        if lock is not None:
+            await lock.acquire()
+        started = time.perf_counter()
+        result["queued_ms"] = round((started - read_at) * 1000, 3)
+        try:
+            await asyncio.wait_for(self._answer(assistant, record, result, started), self.timeout)
+            # The command that actually answered, whether routed exactly or classified.
+            result["command"] = assistant.last_command
+        except asyncio.TimeoutError:
+            result["error"] = f"timed out after {self.timeout} s"
+        except Exception as e:
+            logging.error(f"Batch query {record['id']!r} failed: {e}")
+            result["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            result["total_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            self._release(assistant, lock)
+        return result
+
+    async def run(self, queries, output):
+        """
+        Runs every query and writes one JSON line per result as it completes.
+
+        Args:
+            queries (iterable): (index, record) pairs, e.g. from `read_queries`.
+            output (file): Text stream the JSONL results are written to.
+
+        Returns:
+            dict: Totals and latency percentiles of the run.
+        """
+        slots = asyncio.Semaphore(self.concurrency)
+        limiter = RateLimiter(self.rate) if self.rate else None
+        tasks = set()
+        latencies = []
+        totals = {"queries": 0, "errors": 0, "commands": 0}
+        start = time.perf_counter()
+
+        def finished(task):
+            slots.release()
+            tasks.discard(task)
+            result = task.result()
+            totals["queries"] += 1
+            if result["error"]:
+                totals["errors"] += 1
+            else:
+                latencies.append(result["total_ms"])
+                totals["commands"] += result["command"] is not None
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+        # Input is read lazily, so at most `concurrency` queries are held in memory.
+        # Lines are read on a worker thread, so a slow pipe doesn't stall the queries in flight.
+        queries = iter(queries)
+        while True:
+            item = await asyncio.to_thread(next, queries, None)
+            if item is None:
+                break
+            index, record = item
+            read_at = time.perf_counter()
+            await slots.acquire()
+            if limiter is not None and not record.get("error"):
+                await limiter.acquire()
+            task = asyncio.create_task(self._run_one(index, record, read_at))
+            tasks.add(task)
+            task.add_done_callback(finished)
+        while tasks:
+            await asyncio.wait(set(tasks))
+
+        seconds = time.perf_counter() - start
+        latencies.sort()
+        return dict(
+            totals,
+            seconds=seconds,
+            queries_per_second=totals["queries"] / seconds if seconds else 0.0,
+            p50_ms=_percentile(latencies, 0.5),
+            p90_ms=_percentile(latencies, 0.9),
+            p99_ms=_percentile(latencies, 0.99),
+        )
@@ -0,0 +1,102 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class PersistentCache:
+    """
+    A size-bounded key/value cache persisted in SQLite, with LRU eviction and
+    per-entry expiry.
+
+    Values must be JSON-serializable. The cache is safe to share between threads.
+    """
+    def __init__(self, path, max_entries=1000, ttl=None):
+        """
+        Initializes the cache.
+
+        Args:
+            path (str): Path to the SQLite file, or ":memory:" for a non-persistent cache.
+            max_entries (int): Maximum number of entries kept before the least
+                               recently used ones are evicted.
+            ttl (float): Default time-to-live in seconds, or None for no expiry.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path) if path != ":memory:" else ""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+        self._conn.commit()
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for a key, or `default` if it is missing or expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return default
+            self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a value, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key (str): The cache key.
+            value: A JSON-serializable value.
+            ttl (float): Time-to-live in seconds; defaults to the cache's `ttl`.
+        """
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires = now + ttl if ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def delete(self, key):
+        """Removes a key from the cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        """Removes every entry and resets the hit/miss counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Returns a dict with the hit/miss counters and the current size."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size}
@@ -0,0 +1,185 @@
+import re
+import logging
+
+# Words are runs of letters, digits and apostrophes, so "sometimes" never matches "time".
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+class CommandMatch:
+    """
+    The result of routing a query to a registered command.
+    """
+    def __init__(self, name, phrase, query, start, end):
+        """
+        Args:
+            name (str): The name of the matched command.
+            phrase (str): The registered phrase that matched.
+            query (str): The full (lower-cased) query.
+            start (int): Index in `query` where the phrase starts.
+            end (int): Index in `query` where the phrase ends.
+        """
+        self.name = name
+        self.phrase = phrase
+        self.query = query
+        self.start = start
+        self.end = end
+
+    @property
+    def rest(self):
+        """The text following the matched phrase, e.g. the search terms."""
+        return self.query[self.end:].strip()
+
+    @property
+    def before(self):
+        """The text preceding the matched phrase."""
+        return self.query[:self.start].strip()
+
+    def __repr__(self):
+        return f"CommandMatch(name={self.name!r}, phrase={self.phrase!r}, rest={self.rest!r})"
+
+
+class CommandRouter:
+    """
+    Routes queries to command handlers using a word-level trie.
+
+    Every registered phrase is compiled into a single trie keyed by words, so
+    a query is routed in one pass over its words no matter how many commands
+    are registered. Phrases only match on whole words. When several phrases
+    match, the highest priority wins, then the longest phrase, then the one
+    that appears first in the query.
+    """
+    _END = None  # Trie key marking the end of a phrase.
+
+    def __init__(self):
+        self._commands = {}
+        self._trie = {}
+
+    @staticmethod
+    def _words(text):
+        return WORD_PATTERN.findall(text.lower())
+
+    def register(self, name, phrases, handler, priority=0, slot=False, side_effects=False):
+        """
+        Registers a command.
+
+        Args:
+            name (str): Unique command name. Re-registering a name replaces it.
+            phrases (list): Phrases that trigger the command, e.g. ["open google"].
+            handler (callable): Called with a CommandMatch; returns the response text.
+            priority (int): Higher priorities win when several commands match.
+            slot (bool): The phrase is followed by free text the handler reads from
+                         `match.rest`, e.g. the search terms.
+            side_effects (bool): The command acts on the system (opens apps or websites,
+                                 plays music), so a fuzzy match must not be framed as a question.
+        """
+        if name in self._commands:
+            self.unregister(name)
+        self._commands[name] = {"phrases": list(phrases), "handler": handler, "priority": priority, "slot": slot,
+                                "side_effects": side_effects}
+        for phrase in phrases:
+            words = self._words(phrase)
+            if not words:
+                raise ValueError(f"Command '{name}' has an empty phrase: {phrase!r}")
+            node = self._trie
+            for word in words:
+                node = node.setdefault(word, {})
+            node.setdefault(self._END, []).append((priority, len(words), name, phrase))
+
+    def command(self, name, phrases, priority=0, slot=False, side_effects=False):
+        """Decorator form of `register`."""
+        def decorator(handler):
+            self.register(name, phrases, handler, priority, slot, side_effects)
+            return handler
+        return decorator
+
+    def unregister(self, name):
+        """Removes a command and rebuilds the trie from the remaining ones."""
+        self._commands.pop(name, None)
+        commands = self._commands
+        self._commands = {}
+        self._trie = {}
+        for cmd_name, cmd in commands.items():
+            self.register(cmd_name, cmd["phrases"], cmd["handler"], cmd["priority"], cmd["slot"], cmd["side_effects"])
+
+    def commands(self):
+        """Returns the names of all registered commands."""
+        return list(self._commands)
+
+    def catalogue(self):
+        """
+        Returns every registered phrase, e.g. to train an intent classifier.
+
+        Returns:
+            list: Dicts with the command "name", "phrase", "priority", "slot" and "side_effects".
+        """
+        return [
+            {"name": name, "phrase": phrase, "priority": cmd["priority"], "slot": cmd["slot"],
+             "side_effects": cmd["side_effects"]}
+            for name, cmd in self._commands.items()
+            for phrase in cmd["phrases"]
+        ]
+
+    def match(self, query):
+        """
+        Finds the best command for a query without running it.
+
+        Args:
+            query (str): The user's query.
+
+        Returns:
+            CommandMatch: The best match, or None if no command matches.
+        """
+        query = query.lower()
+        words = WORD_PATTERN.findall(query)
+        root = self._trie
+        # Only words that start a phrase are walked down the trie; most queries have few or none.
+        starts = [i for i, word in enumerate(words) if word in root]
+        if not starts:
+            return None
+        best = None
+        count = len(words)
+        for i in starts:
+            node = root[words[i]]
+            j = i
+            while node is not None:
+                ends = node.get(self._END)
+                if ends:
+                    for priority, length, name, phrase in ends:
+                        key = (priority, length, -i)
+                        if best is None or key > best[0]:
+                            best = (key, name, phrase, i, j)
+                j += 1
+                if j >= count:
+                    break
+                node = node.get(words[j])
+        if best is None:
+            return None
+        _, name, phrase, i, j = best
+        # Character offsets are only needed for the winning phrase. Only non-word
+        # characters separate the words, so each one is the next occurrence of its text.
+        end = 0
+        for k in range(j + 1):
+            start = query.find(words[k], end)
+            end = start + len(words[k])
+            if k == i:
+                phrase_start = start
+        return CommandMatch(name, phrase, query, phrase_start, end)
+
+    def dispatch(self, match):
+        """Runs the handler of a previously matched command."""
+        logging.info(f"Routing to command '{match.name}' via '{match.phrase}'")
+        return self._commands[match.name]["handler"](match)
+
+    def route(self, query):
+        """
+        Matches a query and runs the winning command.
+
+        Args:
+            query (str): The user's query.
+
+        Returns:
+            str: The command's response, or None if no command matches.
+        """
+        match = self.match(query)
+        if match is None:
+            return None
+        return self.dispatch(match)
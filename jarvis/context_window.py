@@ -0,0 +1,107 @@
+import logging
+
+class ContextWindow:
+    """
+    Keeps the generative history sent to the model within a token budget.
+
+    Recent turns are sent verbatim. Once they no longer fit, the oldest turns
+    are folded into a running summary. The window only moves in steps (down to
+    a low-water mark), so the summary is recomputed occasionally rather than
+    on every turn.
+    """
+    def __init__(self, max_tokens=4000, summary_tokens=500, low_water=0.6, summarizer=None):
+        """
+        Initializes the ContextWindow.
+
+        Args:
+            max_tokens (int): Token budget for the verbatim turns sent to the model.
+            summary_tokens (int): Token budget for the summary of older turns.
+            low_water (float): Fraction of `max_tokens` the window shrinks to when
+                               it overflows. Lower values move the window less often.
+            summarizer (callable): Optional `summarizer(previous_summary, turns, max_tokens)`
+                                   returning a new summary string. Defaults to a
+                                   local extractive summarizer.
+        """
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.low_water = low_water
+        self.summarizer = summarizer or self._extractive_summary
+        self._turn_tokens = []
+        self._start = 0
+        self._summary = ""
+        self._summary_end = 0
+
+    @staticmethod
+    def estimate_tokens(text):
+        """Roughly estimates the token count of a text (about 4 characters per token)."""
+        return len(text) // 4 + 1
+
+    def _sync(self, history):
+        """Extends the per-turn token estimates to cover newly added turns."""
+        if len(history) < len(self._turn_tokens):
+            # The history was cleared or replaced; start over.
+            self.reset()
+        for entry in history[len(self._turn_tokens):]:
+            self._turn_tokens.append(sum(self.estimate_tokens(part) for part in entry["parts"]))
+
+    def reset(self):
+        """Forgets all cached token estimates and the running summary."""
+        self._turn_tokens = []
+        self._start = 0
+        self._summary = ""
+        self._summary_end = 0
+
+    def _window_tokens(self):
+        return sum(self._turn_tokens[self._start:])
+
+    def _move_window(self, history):
+        """Advances the window start until the verbatim turns fit under the low-water mark."""
+        target = int(self.max_tokens * self.low_water)
+        tokens = self._window_tokens()
+        start = self._start
+        # Always keep the latest turn, even if it alone exceeds the budget.
+        while tokens > target and start < len(history) - 1:
+            tokens -= self._turn_tokens[start]
+            start += 1
+        # Gemini expects the conversation to start with a user turn.
+        while start < len(history) - 1 and history[start]["role"] != "user":
+            start += 1
+        self._start = start
+
+    def apply(self, history):
+        """
+        Returns the turns to send verbatim and the summary of everything older.
+
+        Args:
+            history (list): The generative history from the Memory class.
+
+        Returns:
+            tuple: (list of recent history entries, summary string)
+        """
+        self._sync(history)
+        if self._window_tokens() > self.max_tokens:
+            self._move_window(history)
+
+        if self._summary_end != self._start:
+            # Fold only the turns that left the window since the last summary.
+            folded = history[self._summary_end:self._start]
+            logging.info(f"Folding {len(folded)} turns into the conversation summary.")
+            self._summary = self.summarizer(self._summary, folded, self.summary_tokens)
+            self._summary_end = self._start
+
+        return history[self._start:], self._summary
+
+    def _extractive_summary(self, previous_summary, turns, max_tokens):
+        """Summarizes turns locally by keeping the first sentence of each one."""
+        lines = [previous_summary] if previous_summary else []
+        for entry in turns:
+            text = " ".join(entry["parts"]).strip().replace("\n", " ")
+            sentence = text.split(". ")[0][:200]
+            speaker = "User" if entry["role"] == "user" else "Jarvis"
+            lines.append(f"{speaker}: {sentence}")
+        summary = "\n".join(lines)
+        # Drop the oldest lines once the summary outgrows its own budget.
+        max_chars = max_tokens * 4
+        if len(summary) > max_chars:
+            summary = summary[-max_chars:].split("\n", 1)[-1]
+        return summary
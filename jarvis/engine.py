@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from jarvis.metrics import metrics
+
+class EngineError(Exception):
+    """
+    Raised by engines when a response cannot be produced.
+    """
+    def __init__(self, message, user_message=None):
+        """
+        Args:
+            message (str): Description of the failure, for the logs.
+            user_message (str): Optional text to show the user instead of the generic apology.
+        """
+        super().__init__(message)
+        self.user_message = user_message
+
+
+class BaseEngine:
+    """
+    The interface the assistant uses to talk to a generative model.
+
+    Subclasses implement `stream()`, which yields text chunks and raises on
+    failure. `generate_stream()` and `generate()` turn failures into a
+    polite message for the user, so callers never have to handle exceptions.
+    """
+    model_name = None
+    fallback_message = "I'm sorry, I can't respond to that. Let's try a different topic."
+
+    def stream(self, prompt, system_instruction=None):
+        """
+        Streams a response, raising an exception if it cannot be produced.
+
+        Args:
+            prompt (list): A list of conversation history or a simple prompt string.
+            system_instruction (str): Optional system instruction for the model.
+
+        Yields:
+            str: Chunks of the generated text response.
+        """
+        raise NotImplementedError
+
+    def generate_stream(self, prompt, system_instruction=None):
+        """
+        Generates a streaming response from the model.
+
+        Args:
+            prompt (list): A list of conversation history or a simple prompt string.
+            system_instruction (str): Optional system instruction for the model.
+
+        Yields:
+            str: Chunks of the generated text response.
+        """
+        try:
+            yield from metrics.time_stream(self.stream(prompt, system_instruction), "engine")
+        except EngineError as e:
+            logging.error(f"Engine error: {e}")
+            yield e.user_message or self.fallback_message
+        except Exception as e:
+            logging.error(f"An error occurred with the engine stream: {e}")
+            yield self.fallback_message
+
+    async def stream_async(self, prompt, system_instruction=None):
+        """
+        Asynchronous version of `stream()`.
+
+        The default implementation runs the blocking `stream()` on a worker
+        thread and hands the chunks to the event loop, so it never blocks
+        other coroutines. Engines with a native async client should override it.
+
+        Yields:
+            str: Chunks of the generated text response.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                for chunk in self.stream(prompt, system_instruction):
+                    if cancelled.is_set():
+                        return
+                    loop.call_soon_threadsafe(chunks.put_nowait, ("chunk", chunk))
+                loop.call_soon_threadsafe(chunks.put_nowait, ("end", None))
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, ("error", e))
+
+        loop.run_in_executor(None, produce)
+        try:
+            while True:
+                kind, payload = await chunks.get()
+                if kind == "chunk":
+                    yield payload
+                elif kind == "end":
+                    return
+                else:
+                    raise payload
+        finally:
+            cancelled.set()
+
+    async def generate_stream_async(self, prompt, system_instruction=None):
+        """
+        Asynchronous version of `generate_stream()`.
+
+        Yields:
+            str: Chunks of the generated text response.
+        """
+        try:
+            async for chunk in metrics.time_stream_async(self.stream_async(prompt, system_instruction), "engine"):
+                yield chunk
+        except EngineError as e:
+            logging.error(f"Engine error: {e}")
+            yield e.user_message or self.fallback_message
+        except Exception as e:
+            logging.error(f"An error occurred with the engine stream: {e}")
+            yield self.fallback_message
+
+    def generate(self, prompt, system_instruction=None):
+        """
+        Generates a complete response from the model.
+
+        Args:
+            prompt (list): A list of conversation history or a simple prompt string.
+            system_instruction (str): Optional system instruction for the model.
+
+        Returns:
+            str: The generated text response, or an error message.
+        """
+        return "".join(self.generate_stream(prompt, system_instruction))
+
+
+class CachingEngine(BaseEngine):
+    """
+    Wraps another engine and replays cached responses for repeated prompts.
+
+    The cache key is an exact match on the normalized tail of the history,
+    the system instruction (which carries the assistant's role) and the model
+    name. Entries are kept in a bounded in-memory LRU and, optionally, in a
+    PersistentCache on disk. Cached responses are replayed chunk by chunk,
+    and only responses that streamed to completion are cached.
+    """
+    def __init__(self, engine, max_entries=256, history_tail=3, cache=None):
+        """
+        Initializes the CachingEngine.
+
+        Args:
+            engine (BaseEngine): The engine to wrap.
+            max_entries (int): Maximum number of responses kept in memory.
+            history_tail (int): Number of trailing history entries that form the key.
+            cache (PersistentCache): Optional disk cache shared across restarts.
+        """
+        self.engine = engine
+        self.model_name = engine.model_name
+        self.max_entries = max_entries
+        self.history_tail = history_tail
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(text):
+        return " ".join(str(text).lower().split())
+
+    def key(self, prompt, system_instruction=None):
+        """Returns the cache key for a prompt."""
+        if isinstance(prompt, str):
+            tail = [["user", self._normalize(prompt)]]
+        else:
+            tail = [
+                [entry["role"], self._normalize(" ".join(str(part) for part in entry["parts"]))]
+                for entry in prompt[-self.history_tail:]
+            ]
+        payload = json.dumps([self.model_name, self._normalize(system_instruction or ""), tail])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key):
+        with self._lock:
+            chunks = self._memory.get(key)
+            if chunks is not None:
+                self._memory.move_to_end(key)
+                return chunks
+        if self.cache is not None:
+            chunks = self.cache.get(key)
+            if chunks is not None:
+                self._remember(key, chunks)
+                return chunks
+        return None
+
+    def _remember(self, key, chunks):
+        with self._lock:
+            self._memory[key] = chunks
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def stream(self, prompt, system_instruction=None):
+        key = self.key(prompt, system_instruction)
+        chunks = self._lookup(key)
+        if chunks is not None:
+            self.hits += 1
+            yield from chunks
+            return
+
+        self.misses += 1
+        chunks = []
+        for chunk in self.engine.stream(prompt, system_instruction):
+            chunks.append(chunk)
+            yield chunk
+        # Only reached when the inner stream finished without raising.
+        if chunks:
+            self._remember(key, chunks)
+            if self.cache is not None:
+                self.cache.set(key, chunks)
+
+    async def stream_async(self, prompt, system_instruction=None):
+        key = self.key(prompt, system_instruction)
+        chunks = await asyncio.to_thread(self._lookup, key) if self.cache is not None else self._lookup(key)
+        if chunks is not None:
+            self.hits += 1
+            for chunk in chunks:
+                yield chunk
+            return
+
+        self.misses += 1
+        chunks = []
+        async for chunk in self.engine.stream_async(prompt, system_instruction):
+            chunks.append(chunk)
+            yield chunk
+        if chunks:
+            self._remember(key, chunks)
+            if self.cache is not None:
+                await asyncio.to_thread(self.cache.set, key, chunks)
+
+    def clear(self):
+        """Empties the in-memory and disk caches."""
+        with self._lock:
+            self._memory.clear()
+        if self.cache is not None:
+            self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Returns the hit/miss counters and the number of responses held in memory."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._memory)}
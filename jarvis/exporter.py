@@ -0,0 +1,179 @@
+"""
+Conversation export in JSON, JSON lines or Markdown.
+
+Exports are generated lazily from an iterable of turns and written in
+chunks, so a long history is never held in memory as one big string.
+A turn is a dict with "role", "content", "created_at" (a UNIX timestamp
+or None) and "session_id" (or None), as yielded by the `iter_turns()`
+method of Memory, SQLiteMemory and ConversationDatabase.
+
+JSON and JSON-lines records keep the {"role", "parts"} layout of the
+conversation history files, so an exported conversation can be imported
+again.
+
+Usage:
+    with open("export.md", "w", encoding="utf-8") as f:
+        export_turns(memory.iter_turns(), f, "markdown", since=datetime.date(2025, 1, 1))
+"""
+import datetime
+import json
+import os
+
+FORMATS = {
+    "json": ("json", "application/json"),
+    "jsonl": ("jsonl", "application/x-ndjson"),
+    "markdown": ("md", "text/markdown"),
+}
+
+ROLE_NAMES = {"user": "You", "model": "JARVIS"}
+
+# Turns are written out in batches of roughly this many characters.
+CHUNK_SIZE = 64 * 1024
+
+def format_for_path(path, default="json"):
+    """Returns the export format matching a file name's extension."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    for name, (ext, _) in FORMATS.items():
+        if extension in (name, ext):
+            return name
+    return default
+
+def to_timestamp(value, end_of_day=False):
+    """
+    Converts a date filter to a UNIX timestamp.
+
+    Args:
+        value: A datetime.datetime, a datetime.date, an ISO date string
+               ("2025-01-31"), a timestamp or None.
+        end_of_day (bool): For whole dates, return the end of the day instead
+                           of its start, so an "until" date is inclusive.
+
+    Returns:
+        float: The timestamp, or None if `value` is None.
+    """
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.date.fromisoformat(value) if len(value) == 10 else datetime.datetime.fromisoformat(value)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time.min)
+        if end_of_day:
+            value += datetime.timedelta(days=1)
+    return value.timestamp()
+
+def filter_turns(turns, since=None, until=None, session_id=None):
+    """
+    Filters turns by date and session.
+
+    Args:
+        turns (iterable): Turn dicts.
+        since: Keep turns from this date or time on (see `to_timestamp`).
+        until: Keep turns up to and including this date, or before this time.
+        session_id (str): Keep only the turns of this session.
+
+    Yields:
+        dict: The matching turns. Turns without a timestamp are dropped when a date filter is set.
+    """
+    start = to_timestamp(since)
+    end = to_timestamp(until, end_of_day=True)
+    for turn in turns:
+        if session_id is not None and turn.get("session_id") != session_id:
+            continue
+        if start is not None or end is not None:
+            created_at = turn.get("created_at")
+            if created_at is None:
+                continue
+            if start is not None and created_at < start:
+                continue
+            if end is not None and created_at >= end:
+                continue
+        yield turn
+
+def _record(turn):
+    record = {"role": turn["role"], "parts": [turn["content"]], "ts": turn.get("created_at")}
+    if turn.get("session_id") is not None:
+        record["session_id"] = turn["session_id"]
+    return record
+
+def _json_pieces(turns):
+    yield "["
+    separator = "\n"
+    for turn in turns:
+        yield separator + "    " + json.dumps(_record(turn))
+        separator = ",\n"
+    yield "\n]\n" if separator == ",\n" else "]\n"
+
+def _jsonl_pieces(turns):
+    for turn in turns:
+        yield json.dumps(_record(turn)) + "\n"
+
+def _markdown_pieces(turns):
+    yield "# JARVIS conversation export\n"
+    session = object()
+    for turn in turns:
+        if turn.get("session_id") != session:
+            session = turn.get("session_id")
+            if session is not None:
+                yield f"\n## Session {session}\n"
+        when = ""
+        if turn.get("created_at") is not None:
+            when = datetime.datetime.fromtimestamp(turn["created_at"]).strftime(" (%Y-%m-%d %H:%M)")
+        name = ROLE_NAMES.get(turn["role"], turn["role"])
+        yield f"\n**{name}**{when}:\n\n{turn['content']}\n"
+
+_WRITERS = {"json": _json_pieces, "jsonl": _jsonl_pieces, "markdown": _markdown_pieces}
+
+def iter_export(turns, fmt="json", chunk_size=CHUNK_SIZE, **filters):
+    """
+    Generates an export in chunks.
+
+    Args:
+        turns (iterable): Turn dicts, oldest first.
+        fmt (str): "json", "jsonl" or "markdown".
+        chunk_size (int): Approximate number of characters per chunk.
+        **filters: `since`, `until` and `session_id`, see `filter_turns`.
+
+    Yields:
+        str: Consecutive pieces of the export.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    buffer = []
+    size = 0
+    for piece in _WRITERS[fmt](filter_turns(turns, **filters)):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+def export_turns(turns, file, fmt="json", **filters):
+    """
+    Writes an export to an open text file.
+
+    Returns:
+        int: The number of characters written.
+    """
+    written = 0
+    for chunk in iter_export(turns, fmt, **filters):
+        file.write(chunk)
+        written += len(chunk)
+    return written
+
+def export_to_path(turns, path, fmt=None, **filters):
+    """
+    Writes an export to a file, choosing the format from its extension if
+    `fmt` is not given. The file is replaced atomically once complete.
+
+    Returns:
+        int: The number of characters written.
+    """
+    fmt = fmt or format_for_path(path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        written = export_turns(turns, f, fmt, **filters)
+    os.replace(tmp_path, path)
+    return written
@@ -0,0 +1,501 @@
+"""
+Local stand-ins for the network and hardware backends used by JARVIS.
+
+They implement the same interfaces as the real backends so the rest of the
+pipeline can be exercised and benchmarked offline.
+"""
+import array
+import asyncio
+import hashlib
+import json
+import math
+import random
+import struct
+import sys
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from jarvis.engine import BaseEngine, EngineError
+from jarvis.stt import BufferedBackend, pcm_seconds
+from jarvis.wiki_search import PageNotFound, AmbiguousQuery
+
+class FakeWikipediaFetcher:
+    """
+    A stand-in for `wikipedia_fetcher` that serves summaries from a dict.
+    """
+    def __init__(self, pages=None, ambiguous=(), delay=0.0):
+        """
+        Args:
+            pages (dict): Maps lower-cased queries to summaries.
+            ambiguous (iterable): Queries that should raise AmbiguousQuery.
+            delay (float): Simulated network latency in seconds.
+        """
+        self.pages = pages or {}
+        self.ambiguous = set(ambiguous)
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, query, sentences=2):
+        self.calls.append(query)
+        if self.delay:
+            time.sleep(self.delay)
+        key = query.lower()
+        if key in self.ambiguous:
+            raise AmbiguousQuery(query)
+        if key not in self.pages:
+            raise PageNotFound(query)
+        return self.pages[key]
+
+
+class FakeSynthesizer:
+    """
+    A stand-in for `synthesize_mp3` that returns deterministic bytes.
+    """
+    def __init__(self, delay=0.0, bytes_per_char=64, delay_per_char=0.0):
+        """
+        Args:
+            delay (float): Simulated synthesis latency in seconds.
+            bytes_per_char (int): Size of the fake audio per character of text.
+            delay_per_char (float): Additional latency per character, as gTTS requests
+                                    long texts in several parts.
+        """
+        self.delay = delay
+        self.bytes_per_char = bytes_per_char
+        self.delay_per_char = delay_per_char
+        self.calls = []
+
+    def __call__(self, text, accent="com", lang="en"):
+        self.calls.append((text, accent, lang))
+        delay = self.delay + self.delay_per_char * len(text)
+        if delay:
+            time.sleep(delay)
+        header = f"FAKEMP3:{lang}:{accent}:".encode("utf-8")
+        return header + text.encode("utf-8")[:32].ljust(max(1, len(text)) * self.bytes_per_char, b"\0")
+
+
+class FakeVoice:
+    def __init__(self, voice_id):
+        self.id = voice_id
+
+
+class FakeSpeechEngine:
+    """
+    A pyttsx3-compatible engine that records what it was asked to say.
+    """
+    def __init__(self, init_delay=0.0, voice_count=8, seconds_per_word=0.0):
+        """
+        Args:
+            init_delay (float): Simulated cost of creating the engine, in seconds.
+            voice_count (int): Number of voices the engine reports.
+            seconds_per_word (float): Simulated speaking time per word.
+        """
+        if init_delay:
+            time.sleep(init_delay)
+        self.properties = {"voices": [FakeVoice(f"fake-voice-{i}") for i in range(voice_count)]}
+        self.seconds_per_word = seconds_per_word
+        self.pending = []
+        self.spoken = []
+        self.stopped = 0
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def say(self, text):
+        self.pending.append(text)
+
+    def runAndWait(self):
+        for text in self.pending:
+            if self.seconds_per_word:
+                time.sleep(self.seconds_per_word * len(text.split()))
+            self.spoken.append(text)
+        self.pending = []
+
+    def stop(self):
+        self.stopped += 1
+
+
+class FakeAudio:
+    """A stand-in for `speech_recognition.AudioData` carrying the spoken text as bytes."""
+    def __init__(self, frame_data):
+        self.frame_data = frame_data
+
+
+class FakeAudioSource:
+    """
+    An audio source that "plays" a fixed list of phrases, then reports end of input.
+    """
+    def __init__(self, phrases):
+        """
+        Args:
+            phrases (iterable): The phrases to deliver, in order.
+        """
+        self.phrases = list(phrases)
+        self.position = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class FakeRecognizer:
+    """
+    A `speech_recognition.Recognizer` stand-in for BackgroundListener.
+
+    `listen()` returns the next phrase of a FakeAudioSource after a simulated
+    speaking time, and empty audio once the source is exhausted. Pass
+    `fake_recognize` as the listener's `recognize` callable.
+    """
+    def __init__(self, phrase_delay=0.0, calibration_delay=0.0):
+        """
+        Args:
+            phrase_delay (float): Simulated seconds of speech per phrase.
+            calibration_delay (float): Simulated seconds per ambient noise calibration.
+        """
+        self.phrase_delay = phrase_delay
+        self.calibration_delay = calibration_delay
+        self.energy_threshold = 300
+        self.pause_threshold = 1
+
+    def adjust_for_ambient_noise(self, source, duration=1):
+        if self.calibration_delay:
+            time.sleep(self.calibration_delay)
+
+    def listen(self, source, timeout=None, phrase_time_limit=None):
+        if source.position >= len(source.phrases):
+            return FakeAudio(b"")
+        if self.phrase_delay:
+            time.sleep(self.phrase_delay)
+        phrase = source.phrases[source.position]
+        source.position += 1
+        return FakeAudio(phrase.encode("utf-8"))
+
+
+def fake_recognize(audio):
+    """Transcribes a FakeAudio by decoding the text it carries."""
+    return audio.frame_data.decode("utf-8")
+
+
+class FakeSTTBackend(BufferedBackend):
+    """
+    An STT backend that "recognizes" a script of transcripts, one per phrase.
+
+    Phrases are cut from the audio by the endpointer like for GoogleBackend.
+    A partial result reveals as many words of the current transcript as
+    could have been spoken so far at `words_per_second`.
+    """
+    name = "fake"
+
+    def __init__(self, transcripts, words_per_second=2.5, endpointer=None, partial_interval=0.2, delay=0.0):
+        """
+        Args:
+            transcripts (iterable): The transcript of each phrase, in order.
+            words_per_second (float): Simulated speaking rate for partial results.
+            endpointer: Splits the stream into phrases; a VADEndpointer by default.
+            partial_interval (float): Seconds of speech between partial results, or None.
+            delay (float): Simulated recognition latency per call, in seconds.
+        """
+        super().__init__(endpointer, partial_interval)
+        self.transcripts = list(transcripts)
+        self.words_per_second = words_per_second
+        self.delay = delay
+        self.position = 0
+        self.calls = 0
+        self.uploaded = []
+
+    def recognize(self, pcm, sample_rate, final):
+        self.calls += 1
+        self.uploaded.append(len(pcm))
+        if self.delay:
+            time.sleep(self.delay)
+        if self.position >= len(self.transcripts):
+            return ""
+        words = self.transcripts[self.position].split()
+        if final:
+            self.position += 1
+            return " ".join(words)
+        return " ".join(words[:int(pcm_seconds(pcm, sample_rate) * self.words_per_second)])
+
+
+def synthetic_speech(phrase_seconds, pause_seconds=1.0, sample_rate=16000, amplitude=3000, noise=50, seed=0):
+    """
+    Generates 16-bit mono PCM of "phrases" separated by near-silence.
+
+    Each phrase is a tone whose pitch and loudness wobble like a voice, on
+    top of low background noise, so energy-based endpointers and VADs see
+    speech where the phrases are.
+
+    Args:
+        phrase_seconds (iterable): Length of each phrase in seconds.
+        pause_seconds (float): Silence before, between and after the phrases.
+        sample_rate (int): Samples per second.
+        amplitude (int): Peak amplitude of the phrases.
+        noise (int): Peak amplitude of the background noise.
+        seed (int): Seed of the noise generator.
+
+    Returns:
+        bytes: The PCM audio.
+    """
+    rng = random.Random(seed)
+    samples = array.array("h")
+
+    def pause():
+        samples.extend(rng.randint(-noise, noise) for _ in range(int(pause_seconds * sample_rate)))
+
+    pause()
+    for seconds in phrase_seconds:
+        count = int(seconds * sample_rate)
+        for i in range(count):
+            t = i / sample_rate
+            envelope = 0.6 + 0.4 * math.sin(2 * math.pi * 3 * t)
+            pitch = 150 + 30 * math.sin(2 * math.pi * 0.7 * t)
+            value = amplitude * envelope * math.sin(2 * math.pi * pitch * t) + rng.randint(-noise, noise)
+            samples.append(max(-32768, min(32767, int(value))))
+        pause()
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples.tobytes()
+
+
+def write_wav(path, pcm, sample_rate=16000):
+    """Writes 16-bit mono PCM audio to a WAV file."""
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm)
+
+
+class FakePlayer:
+    """
+    A music player that records what it was asked to play instead of playing it.
+    """
+    def __init__(self):
+        self.played = []
+        self.playing = None
+        self.stops = 0
+
+    def play(self, path):
+        self.played.append(path)
+        self.playing = path
+
+    def stop(self):
+        self.playing = None
+        self.stops += 1
+        return True
+
+
+def write_fake_mp3(path, title=None, artist=None, seconds=180.0, vbr=True):
+    """
+    Writes a tiny MP3 file whose headers describe a track of the given length.
+
+    The file holds an optional ID3v2.3 tag and a single MPEG-1 Layer III frame,
+    carrying a Xing header with the frame count (`vbr=True`) or followed by
+    enough padding for a 128 kbit/s constant bitrate duration (`vbr=False`).
+    """
+    frames = []
+    for frame_id, text in (("TIT2", title), ("TPE1", artist)):
+        if text:
+            data = b"\x03" + text.encode("utf-8")
+            frames.append(frame_id.encode("ascii") + struct.pack(">I", len(data)) + b"\0\0" + data)
+    body = b"".join(frames)
+    tag = b""
+    if body:
+        size = len(body)
+        tag = b"ID3\x03\x00\x00" + bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F]) + body
+
+    # MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, stereo: 417-byte frames of 1152 samples.
+    header = b"\xff\xfb\x90\x00"
+    frame = bytearray(417)
+    frame[:4] = header
+    if vbr:
+        frame[36:48] = b"Xing" + struct.pack(">II", 0x1, round(seconds * 44100 / 1152))
+        padding = b""
+    else:
+        padding = b"\0" * max(0, int(seconds * 128000 / 8) - len(frame))
+    with open(path, "wb") as f:
+        f.write(tag + bytes(frame) + padding)
+
+
+class FakeEngine(BaseEngine):
+    """
+    A deterministic local engine implementing the BaseEngine interface.
+
+    The reply depends only on the last user message, and its latency profile
+    (time to first chunk, time between chunks) is configurable, so the cache
+    and the rest of the pipeline can be tested and benchmarked offline.
+    """
+    model_name = "fake-engine"
+
+    def __init__(self, first_token_delay=0.0, chunk_delay=0.0, chunks=5, fail_every=0):
+        """
+        Args:
+            first_token_delay (float): Seconds before the first chunk is produced.
+            chunk_delay (float): Seconds between subsequent chunks.
+            chunks (int): Number of chunks per response.
+            fail_every (int): If set, every n-th call raises EngineError before streaming.
+        """
+        self.first_token_delay = first_token_delay
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+        self.fail_every = fail_every
+        self.calls = 0
+
+    @staticmethod
+    def _last_user_message(prompt):
+        if isinstance(prompt, str):
+            return prompt
+        for entry in reversed(prompt):
+            if entry["role"] == "user":
+                return " ".join(str(part) for part in entry["parts"])
+        return ""
+
+    def reply_for(self, prompt):
+        """Returns the full reply the engine gives for a prompt."""
+        message = self._last_user_message(prompt)
+        digest = hashlib.sha256(message.encode("utf-8")).hexdigest()[:8]
+        return f"Fake answer {digest} to: {message}. This reply is deterministic and generated offline."
+
+    def _chunks(self, prompt):
+        """Returns (delay, chunk) pairs for a reply, raising injected failures."""
+        self.calls += 1
+        if self.fail_every and self.calls % self.fail_every == 0:
+            raise EngineError(f"Injected failure on call {self.calls}")
+        reply = self.reply_for(prompt)
+        size = max(1, -(-len(reply) // self.chunks))
+        return [
+            (self.first_token_delay if i == 0 else self.chunk_delay, reply[i:i + size])
+            for i in range(0, len(reply), size)
+        ]
+
+    def stream(self, prompt, system_instruction=None):
+        for delay, chunk in self._chunks(prompt):
+            if delay:
+                time.sleep(delay)
+            yield chunk
+
+    async def stream_async(self, prompt, system_instruction=None):
+        for delay, chunk in self._chunks(prompt):
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+
+
+class FakeGeminiServer:
+    """
+    A local HTTP stand-in for the Gemini REST API (`streamGenerateContent` with SSE).
+
+    Replies come from a FakeEngine. Faults can be scripted per request with
+    `inject()`; each injected behaviour is used by exactly one request, in order:
+
+        {"status": 503}                 answer with an error status
+        {"delay": 2.0}                  wait before sending the response headers
+        {"first_token_delay": 2.0}      send headers, then wait before the first event
+        {"disconnect_after": 1}         drop the connection after n events
+
+    Usage:
+        with FakeGeminiServer() as server:
+            engine = GeminiEngine("test-key", transport="rest", base_url=server.url)
+    """
+    def __init__(self, engine=None, chunk_delay=0.0):
+        """
+        Args:
+            engine (FakeEngine): Produces the reply text. Defaults to FakeEngine(chunks=5).
+            chunk_delay (float): Seconds between SSE events.
+        """
+        self.engine = engine or FakeEngine(chunks=5)
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+        self._faults = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def inject(self, *behaviours):
+        """Queues fault behaviours for the next requests."""
+        with self._lock:
+            self._faults.extend(behaviours)
+
+    def _next_behaviour(self):
+        with self._lock:
+            self.requests += 1
+            return self._faults.pop(0) if self._faults else {}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                behaviour = server._next_behaviour()
+                if behaviour.get("delay"):
+                    time.sleep(behaviour["delay"])
+                if behaviour.get("status"):
+                    error = json.dumps({"error": {"code": behaviour["status"], "message": "injected"}}).encode()
+                    self.send_response(behaviour["status"])
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(error)))
+                    self.end_headers()
+                    self.wfile.write(error)
+                    return
+
+                history = [
+                    {"role": content.get("role", "user"), "parts": [part.get("text", "") for part in content.get("parts", [])]}
+                    for content in body.get("contents", [])
+                ]
+                chunks = list(server.engine.stream(history))
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                if behaviour.get("first_token_delay"):
+                    time.sleep(behaviour["first_token_delay"])
+                for index, chunk in enumerate(chunks):
+                    if index and server.chunk_delay:
+                        time.sleep(server.chunk_delay)
+                    if "disconnect_after" in behaviour and index >= behaviour["disconnect_after"]:
+                        self.close_connection = True
+                        return
+                    candidate = {"content": {"role": "model", "parts": [{"text": chunk}]}}
+                    if index == len(chunks) - 1:
+                        candidate["finishReason"] = "STOP"
+                    event = {"candidates": [candidate]}
+                    self._write_chunk(f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8"))
+                self._write_chunk(b"")
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-gemini", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
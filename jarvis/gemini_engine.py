@@ -1,40 +1,102 @@
-import google.generativeai as genai
 import logging
+import threading
+from collections import OrderedDict
+from jarvis.engine import BaseEngine, EngineError
+from jarvis.gemini_rest import GeminiRestTransport
+from jarvis.lazy_import import lazy_import
+from jarvis.resilience import RetryPolicy, resilient_stream
 
-class GeminiEngine:
+genai = lazy_import("google.generativeai")
+
+class GeminiEngine(BaseEngine):
     """
     Handles interactions with the Google Gemini API.
     """
-    def __init__(self, api_key, model_name="gemini-2.5-flash"):
+    # Number of distinct system instructions to keep configured models for.
+    MAX_CACHED_MODELS = 8
+
+    def __init__(self, api_key, model_name="gemini-2.5-flash", transport="sdk", base_url=None,
+                 connect_timeout=10.0, first_token_timeout=30.0, read_timeout=60.0,
+                 retry_policy=None, hedge_after=None):
         """
         Initializes the Gemini Engine.
 
         Args:
             api_key (str): The API key for the Gemini service.
             model_name (str): The name of the model to use.
+            transport (str): "sdk" to use google-generativeai, or "rest" to use the
+                             pooled REST transport (which honours `base_url` and
+                             `connect_timeout`). The REST transport is also used
+                             when google-generativeai is not installed.
+            base_url (str): REST API host, e.g. a local stand-in for testing.
+            connect_timeout (float): Seconds allowed to establish a connection (REST only; the
+                                     first-token timeout covers connection problems with the SDK).
+            first_token_timeout (float): Seconds to wait for the first chunk before retrying.
+            read_timeout (float): Seconds to wait between chunks once streaming has started.
+            retry_policy (RetryPolicy): Retry and backoff settings.
+            hedge_after (float): Send a second request if the first has produced nothing
+                                 after this many seconds. None disables hedging.
         """
-        if api_key:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel(model_name)
-        else:
-            self.model = None
+        self.api_key = api_key
+        self.model_name = model_name
+        self.first_token_timeout = first_token_timeout
+        self.read_timeout = read_timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedge_after = hedge_after
+        self.rest = None
+        self.model = None
+        self._models = OrderedDict()
+        # Hedged attempts ask for models from several threads at once.
+        self._models_lock = threading.Lock()
+        if not api_key:
             logging.error("Gemini API key not provided. GeminiEngine not initialized.")
+        elif transport == "rest" or not genai.available:
+            if transport != "rest":
+                logging.warning("google-generativeai is not installed; using the Gemini REST API instead.")
+            self.rest = GeminiRestTransport(api_key, model_name, base_url=base_url,
+                                            connect_timeout=connect_timeout, read_timeout=read_timeout)
+        # Otherwise the SDK is imported and configured on first use (see _get_model),
+        # which keeps it out of the start-up path.
+
+    def _get_model(self, system_instruction=None):
+        """
+        Returns a model configured with the given system instruction, reusing
+        previously created models for recently used instructions. Thread-safe.
+        """
+        with self._models_lock:
+            if self.model is None:
+                genai.configure(api_key=self.api_key)
+                self.model = genai.GenerativeModel(self.model_name)
+            if not system_instruction:
+                return self.model
+            model = self._models.get(system_instruction)
+            if model is None:
+                model = genai.GenerativeModel(self.model_name, system_instruction=system_instruction)
+                self._models[system_instruction] = model
+                if len(self._models) > self.MAX_CACHED_MODELS:
+                    self._models.popitem(last=False)
+            else:
+                self._models.move_to_end(system_instruction)
+            return model
 
-    def generate(self, prompt):
+    def generate(self, prompt, system_instruction=None):
         """
         Generates a response from the Gemini model based on the prompt.
 
         Args:
             prompt (list): A list of conversation history or a simple prompt string.
+            system_instruction (str): Optional system instruction for the model.
 
         Returns:
             str: The generated text response, or an error message.
         """
-        if not self.model:
+        if self.rest is not None:
+            return super().generate(prompt, system_instruction)
+        if not self.api_key:
             return "Error: Gemini Engine is not initialized. Please check your API key."
 
         try:
-            response = self.model.generate_content(prompt)
+            response = self._get_model(system_instruction).generate_content(prompt)
             # Handle cases where the response might be blocked or empty
             return response.text
         except ValueError:
@@ -45,30 +107,47 @@ class GeminiEngine:
             logging.error(f"An error occurred with the Gemini API: {e}")
             return f"Sorry, I encountered an error while trying to connect to the AI service."
 
-    def generate_stream(self, prompt):
+    def stream(self, prompt, system_instruction=None):
         """
-        Generates a streaming response from the Gemini model.
+        Streams a response from the Gemini model, raising on failure.
+
+        Requests that fail or produce nothing within the first-token timeout are
+        retried with jittered exponential backoff; once a chunk has been yielded
+        the response is never retried.
 
         Args:
             prompt (list): A list of conversation history or a simple prompt string.
+            system_instruction (str): Optional system instruction for the model.
 
         Yields:
             str: Chunks of the generated text response.
         """
-        if not self.model:
-            yield "Error: Gemini Engine is not initialized. Please check your API key."
-            return
+        if not self.api_key:
+            raise EngineError("Gemini Engine is not initialized.",
+                              user_message="Error: Gemini Engine is not initialized. Please check your API key.")
 
-        try:
-            response_stream = self.model.generate_content(prompt, stream=True)
-            for chunk in response_stream:
-                try:
-                    yield chunk.text
-                except ValueError:
-                    # This can happen if a specific chunk is empty/blocked.
-                    # We can log it and continue to the next chunk.
-                    logging.warning("A chunk in the stream was blocked or empty.")
-                    continue
-        except Exception as e:
-            logging.error(f"An error occurred with the Gemini API stream: {e}")
-            yield "I'm sorry, I can't respond to that. Let's try a different topic."
+        yield from resilient_stream(
+            lambda: self._open_stream(prompt, system_instruction),
+            retry_policy=self.retry_policy,
+            first_token_timeout=self.first_token_timeout,
+            read_timeout=self.read_timeout,
+            hedge_after=self.hedge_after,
+        )
+
+    def _open_stream(self, prompt, system_instruction=None):
+        """Starts a single streaming request and returns an iterator over its text chunks."""
+        if self.rest is not None:
+            return self.rest.open_stream(prompt, system_instruction)
+        response_stream = self._get_model(system_instruction).generate_content(prompt, stream=True)
+        return self._iter_sdk_chunks(response_stream)
+
+    @staticmethod
+    def _iter_sdk_chunks(response_stream):
+        for chunk in response_stream:
+            try:
+                yield chunk.text
+            except ValueError:
+                # This can happen if a specific chunk is empty/blocked.
+                # We can log it and continue to the next chunk.
+                logging.warning("A chunk in the stream was blocked or empty.")
+                continue
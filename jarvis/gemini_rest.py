@@ -0,0 +1,178 @@
+import http.client
+import json
+import logging
+import queue
+from urllib.parse import urlsplit
+from jarvis.engine import EngineError
+from jarvis.resilience import RetryableError, RETRYABLE_STATUS
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com"
+
+class HTTPStatusError(EngineError):
+    """Raised when the Gemini REST API answers with a non-2xx status."""
+    def __init__(self, status, body):
+        super().__init__(f"HTTP {status}: {body[:200]}")
+        self.status = status
+
+
+class RetryableHTTPStatusError(HTTPStatusError, RetryableError):
+    """An HTTP error status that is worth retrying (429 and transient 5xx)."""
+
+
+class ConnectionPool:
+    """
+    A small pool of persistent HTTP(S) connections to a single host.
+    """
+    def __init__(self, base_url, size=4, connect_timeout=10.0, read_timeout=60.0):
+        """
+        Args:
+            base_url (str): Scheme and host of the server, e.g. "https://example.com".
+            size (int): Maximum number of idle connections kept for reuse.
+            connect_timeout (float): Seconds allowed to establish a connection.
+            read_timeout (float): Seconds allowed between two reads on an open connection.
+        """
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.created = 0
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def acquire(self):
+        """
+        Returns a connection from the pool, opening a new one if none is idle.
+
+        Returns:
+            tuple: (connection, True if it was reused from the pool)
+        """
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            pass
+        connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        conn = connection_class(self.host, self.port, timeout=self.connect_timeout)
+        conn.connect()
+        conn.sock.settimeout(self.read_timeout)
+        self.created += 1
+        return conn, False
+
+    def release(self, conn):
+        """Returns a connection whose response was fully read to the pool."""
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def discard(self, conn):
+        """Closes a connection that is in an unknown state."""
+        conn.close()
+
+    def close(self):
+        """Closes every idle connection."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class GeminiRestTransport:
+    """
+    Streams Gemini responses over the REST API (`streamGenerateContent`, SSE),
+    reusing pooled keep-alive connections across calls.
+    """
+    def __init__(self, api_key, model_name, base_url=None, connect_timeout=10.0, read_timeout=60.0, pool_size=4):
+        """
+        Args:
+            api_key (str): The API key for the Gemini service.
+            model_name (str): The name of the model to use.
+            base_url (str): API host; point it at a local stand-in for testing.
+            connect_timeout (float): Seconds allowed to establish a connection.
+            read_timeout (float): Seconds allowed between two reads.
+            pool_size (int): Maximum number of idle connections kept for reuse.
+        """
+        self.api_key = api_key
+        self.model_name = model_name
+        self.pool = ConnectionPool(base_url or DEFAULT_BASE_URL, size=pool_size,
+                                   connect_timeout=connect_timeout, read_timeout=read_timeout)
+
+    @staticmethod
+    def build_body(prompt, system_instruction=None):
+        """Converts the assistant's history format into a REST request body."""
+        if isinstance(prompt, str):
+            prompt = [{"role": "user", "parts": [prompt]}]
+        body = {
+            "contents": [
+                {"role": entry["role"], "parts": [{"text": str(part)} for part in entry["parts"]]}
+                for entry in prompt
+            ]
+        }
+        if system_instruction:
+            body["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+        return body
+
+    def open_stream(self, prompt, system_instruction=None):
+        """
+        Sends a streaming request and returns an iterator over the text chunks.
+
+        Raises:
+            HTTPStatusError: If the server answers with an error status.
+            OSError: If the connection fails or times out.
+        """
+        path = f"/v1beta/models/{self.model_name}:streamGenerateContent?alt=sse"
+        payload = json.dumps(self.build_body(prompt, system_instruction)).encode("utf-8")
+        headers = {"Content-Type": "application/json", "x-goog-api-key": self.api_key}
+
+        conn, reused = self.pool.acquire()
+        try:
+            conn.request("POST", path, body=payload, headers=headers)
+            response = conn.getresponse()
+        except (OSError, http.client.HTTPException):
+            self.pool.discard(conn)
+            if not reused:
+                raise
+            # The server may have closed an idle keep-alive connection; try a fresh one.
+            conn, _ = self.pool.acquire()
+            try:
+                conn.request("POST", path, body=payload, headers=headers)
+                response = conn.getresponse()
+            except (OSError, http.client.HTTPException):
+                self.pool.discard(conn)
+                raise
+
+        if response.status >= 400:
+            body = response.read().decode("utf-8", errors="replace")
+            self.pool.release(conn)
+            error_class = RetryableHTTPStatusError if response.status in RETRYABLE_STATUS else HTTPStatusError
+            raise error_class(response.status, body)
+        return self._iter_events(conn, response)
+
+    def _iter_events(self, conn, response):
+        finished = False
+        try:
+            for raw_line in response:
+                line = raw_line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                for candidate in event.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+                    if candidate.get("finishReason"):
+                        finished = True
+            if not finished:
+                # The server closed the stream before the final event.
+                raise EngineError("The response stream ended unexpectedly.")
+        finally:
+            if finished:
+                self.pool.release(conn)
+            else:
+                logging.info("Discarding connection of an unfinished stream.")
+                self.pool.discard(conn)
+
+    def close(self):
+        """Closes all pooled connections."""
+        self.pool.close()
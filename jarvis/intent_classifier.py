@@ -0,0 +1,305 @@
+import logging
+import math
+import threading
+from collections import OrderedDict
+from jarvis.command_router import WORD_PATTERN, CommandMatch
+from jarvis.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+# Words that frame a request without changing it ("please open the calculator
+# app"). Any other word outside the matched run means the utterance says more
+# than the command does ("who created linux").
+FILLER_WORDS = frozenset("""
+    a an the my me please jarvis hey hi ok okay so um uh can could would will you just now right
+    very much app window
+""".split())
+# Question framing ("what is your name", "tell me the time") is also filler,
+# but only for commands without side effects: "what is a calculator" must
+# not open the calculator.
+QUESTION_WORDS = frozenset("what what's whats is are it i tell doing".split())
+
+class Intent:
+    """
+    The command an utterance was classified as.
+    """
+    def __init__(self, name, phrase, score, query, start, end):
+        """
+        Args:
+            name (str): The command name.
+            phrase (str): The catalogue phrase closest to the utterance.
+            score (float): Cosine similarity between the phrase and the matched words (0 to 1).
+            query (str): The (lower-cased) utterance.
+            start (int): Index in `query` where the matched words start.
+            end (int): Index in `query` where the matched words end.
+        """
+        self.name = name
+        self.phrase = phrase
+        self.score = score
+        self.query = query
+        self.start = start
+        self.end = end
+
+    @property
+    def slot(self):
+        """The free text following the command, e.g. the search terms."""
+        return self.query[self.end:].strip()
+
+    def to_match(self):
+        """Returns a CommandMatch, so the command's handler can be called directly."""
+        return CommandMatch(self.name, self.phrase, self.query, self.start, self.end)
+
+    def __repr__(self):
+        return f"Intent(name={self.name!r}, phrase={self.phrase!r}, score={self.score:.2f}, slot={self.slot!r})"
+
+
+class IntentClassifier:
+    """
+    Classifies noisy transcripts ("open calculater", "skip this sung")
+    as commands, by nearest-neighbour search over the command catalogue.
+
+    Every catalogue phrase and every run of consecutive words in an
+    utterance is embedded as a TF-IDF vector of character n-grams, and the
+    similarities of all word runs of a batch of utterances to all phrases
+    are computed with one NumPy matrix product. The best-scoring run gives
+    the command; the words after it are the slot (e.g. the search terms).
+
+    The matched run must cover the whole utterance apart from filler words
+    (for slot commands: everything before the slot), and commands with
+    side effects cannot be framed as a question, so that questions which
+    merely share words with a command ("the music industry", "what is a
+    calculator") stay questions.
+
+    One-word phrases of slot commands (such as "play <title>") are left
+    out: they would claim every utterance starting with that word.
+
+    A classifier is read-only once built, so one instance can serve many
+    assistants and threads; see `shared()`.
+    """
+    # Classifiers built by `shared()`, by catalogue.
+    MAX_SHARED = 4
+    _shared = OrderedDict()
+    _shared_lock = threading.Lock()
+
+    def __init__(self, catalogue, threshold=0.6, ngram_sizes=(2, 3), max_extra_words=0, margin=0.1):
+        """
+        Initializes the IntentClassifier.
+
+        Args:
+            catalogue (list): Dicts with "name", "phrase", "priority", "slot" and optionally
+                              "side_effects", e.g. `CommandRouter.catalogue()`.
+            threshold (float): Minimum similarity for an utterance to be classified.
+            ngram_sizes (tuple): Character n-gram lengths.
+            max_extra_words (int): Non-filler words allowed outside the matched run for
+                                   commands without a slot (and before the run for commands
+                                   with one), so short phrases do not match inside questions.
+            margin (float): Commands scoring within this margin of the best one are
+                            ranked by priority, as the CommandRouter does.
+        """
+        self.threshold = threshold
+        self.ngram_sizes = ngram_sizes
+        self.max_extra_words = max_extra_words
+        self.margin = margin
+        self.entries = [
+            entry for entry in catalogue
+            if not (entry["slot"] and len(WORD_PATTERN.findall(entry["phrase"].lower())) < 2)
+        ]
+        self.max_phrase_words = max(len(WORD_PATTERN.findall(entry["phrase"].lower())) for entry in self.entries)
+
+        documents = [self._grams(" ".join(WORD_PATTERN.findall(entry["phrase"].lower()))) for entry in self.entries]
+        self.vocabulary = {}
+        for grams in documents:
+            for gram in grams:
+                self.vocabulary.setdefault(gram, len(self.vocabulary))
+        document_frequency = np.zeros(len(self.vocabulary))
+        for grams in documents:
+            document_frequency[[self.vocabulary[gram] for gram in set(grams)]] += 1
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+        # Grams that no phrase contains still count towards a word run's length.
+        self.unknown_idf = math.log(1 + len(documents)) + 1
+        self.phrase_vectors = self._vectorize(documents).T.copy()
+        self.phrase_lengths = np.array([len(grams) for grams in documents], dtype=float)
+        self.slot_mask = np.array([entry["slot"] for entry in self.entries])
+        self.action_mask = np.array([bool(entry.get("side_effects")) for entry in self.entries])
+
+    @classmethod
+    def from_router(cls, router, **kwargs):
+        """Builds a classifier over every phrase registered with a CommandRouter."""
+        return cls(router.catalogue(), **kwargs)
+
+    @classmethod
+    def shared(cls, router):
+        """
+        Returns a classifier for a router's commands, built once and shared by
+        every router with the same catalogue (e.g. one per browser session).
+        """
+        catalogue = router.catalogue()
+        key = tuple(
+            (entry["name"], entry["phrase"], entry["priority"], entry["slot"], entry.get("side_effects", False))
+            for entry in catalogue
+        )
+        with cls._shared_lock:
+            classifier = cls._shared.get(key)
+            if classifier is None:
+                classifier = cls._shared[key] = cls(catalogue)
+                if len(cls._shared) > cls.MAX_SHARED:
+                    cls._shared.popitem(last=False)
+            else:
+                cls._shared.move_to_end(key)
+            return classifier
+
+    def _grams(self, text):
+        padded = f" {text} "
+        return [padded[i:i + n] for n in self.ngram_sizes for i in range(len(padded) - n + 1)]
+
+    def _normalize(self, counts, unknown):
+        """Turns gram counts into L2-normalized TF-IDF vectors; unknown grams only add to the norm."""
+        weights = counts * self.idf
+        norms = np.sqrt((weights ** 2).sum(axis=1) + unknown * self.unknown_idf ** 2)
+        norms[norms == 0] = 1
+        return weights / norms[:, None]
+
+    def _vectorize(self, documents):
+        """Returns L2-normalized TF-IDF vectors, one row per list of grams."""
+        counts = np.zeros((len(documents), len(self.vocabulary)))
+        unknown = np.zeros(len(documents))
+        for row, grams in enumerate(documents):
+            for gram in grams:
+                column = self.vocabulary.get(gram)
+                if column is None:
+                    unknown[row] += 1
+                else:
+                    counts[row, column] += 1
+        return self._normalize(counts, unknown)
+
+    def _spans(self, queries):
+        """
+        Lists every run of up to max_phrase_words + 1 words of every query.
+
+        The queries are joined into one padded text (" word word  word "), so
+        the padded text of a run is a slice of it and the n-grams of all runs
+        can be looked up once per position instead of once per run.
+
+        Returns:
+            tuple: (text, per-query lists of (start word, end word), run start
+                   offsets, run end offsets). Offsets index the joined text.
+        """
+        longest = self.max_phrase_words + 1
+        parts, spans, starts, ends = [], [], [], []
+        offset = 0
+        for query in queries:
+            words = WORD_PATTERN.findall(query)
+            padded = " " + " ".join(words) + " "
+            # Offset of the space before each word, and of the one after it.
+            before = []
+            position = offset
+            for word in words:
+                before.append(position)
+                position += len(word) + 1
+            query_spans = []
+            for i in range(len(words)):
+                for j in range(i + 1, min(len(words), i + longest) + 1):
+                    query_spans.append((i, j))
+                    starts.append(before[i])
+                    ends.append(before[j - 1] + len(words[j - 1]) + 2)
+            spans.append(query_spans)
+            parts.append(padded)
+            offset += len(padded)
+        return "".join(parts), spans, np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64)
+
+    def classify_batch(self, queries, exclude=()):
+        """
+        Classifies many utterances at once.
+
+        Args:
+            queries (list): The utterances.
+            exclude (iterable): Command names that must not be returned, e.g. one
+                                the router already tried.
+
+        Returns:
+            list: An Intent, or None when no command is similar enough, per utterance.
+        """
+        queries = [query.lower() for query in queries]
+        text, spans, starts, ends = self._spans(queries)
+        rows = len(starts)
+        if not rows:
+            return [None] * len(queries)
+
+        size = len(self.vocabulary)
+        counts = np.zeros(rows * size)
+        unknown = np.zeros(rows)
+        lengths = np.zeros(rows)
+        for n in self.ngram_sizes:
+            vocabulary = self.vocabulary
+            columns = np.array([vocabulary.get(text[i:i + n], -1) for i in range(len(text) - n + 1)], dtype=np.int64)
+            # The n-grams of run r start at starts[r] .. ends[r] - n.
+            per_run = ends - starts - n + 1
+            run = np.repeat(np.arange(rows), per_run)
+            first = np.cumsum(per_run) - per_run
+            position = np.arange(per_run.sum()) - np.repeat(first - starts, per_run)
+            column = columns[position]
+            known = column >= 0
+            counts += np.bincount(run[known] * size + column[known], minlength=rows * size)
+            unknown += np.bincount(run[~known], minlength=rows)
+            lengths += per_run
+        vectors = self._normalize(counts.reshape(rows, size), unknown)
+        similarity = vectors @ self.phrase_vectors
+        # A run much shorter or longer than a phrase ("the" for "the time") is only a partial match.
+        lengths = lengths[:, None]
+        similarity *= np.minimum(lengths, self.phrase_lengths) / np.maximum(lengths, self.phrase_lengths)
+
+        allowed = np.array([entry["name"] not in exclude for entry in self.entries])
+        results = []
+        offset = 0
+        for query, query_spans in zip(queries, spans):
+            block = similarity[offset:offset + len(query_spans)]
+            offset += len(query_spans)
+            results.append(self._best(query, query_spans, block, allowed) if query_spans else None)
+        return results
+
+    def classify(self, query, exclude=()):
+        """
+        Classifies one utterance.
+
+        Returns:
+            Intent: The command, or None when no command is similar enough.
+        """
+        return self.classify_batch([query], exclude)[0]
+
+    def _best(self, query, spans, block, allowed):
+        matches = list(WORD_PATTERN.finditer(query))
+        words = [m.group() for m in matches]
+        word_positions = [(m.start(), m.end()) for m in matches]
+        # Non-filler words among the first i words; `strict` also counts question words.
+        content = np.cumsum([0] + [word not in FILLER_WORDS and word not in QUESTION_WORDS for word in words])
+        strict = np.cumsum([0] + [word not in FILLER_WORDS for word in words])
+        starts = np.array([start for start, _ in spans])[:, None]
+        ends = np.array([end for _, end in spans])[:, None]
+        # Words left outside each run (rows) for each phrase (columns); runs that
+        # leave too many are ruled out before picking the best run per phrase.
+        before = np.where(self.action_mask, strict[starts], content[starts])
+        after = np.where(self.action_mask, strict[-1] - strict[ends], content[-1] - content[ends])
+        extra = before + np.where(self.slot_mask, 0, after)
+        block = np.where(extra <= self.max_extra_words, block, -1.0)
+        best_span = block.argmax(axis=0)
+        scores = block[best_span, np.arange(block.shape[1])]
+        span_words = (ends - starts)[best_span, 0]
+        keep = np.flatnonzero(allowed & (scores >= self.threshold))
+        if not len(keep):
+            return None
+        candidates = {}
+        for column in keep:
+            entry = self.entries[column]
+            key = (float(scores[column]), int(span_words[column]))
+            if entry["name"] not in candidates or key > candidates[entry["name"]][0]:
+                candidates[entry["name"]] = (key, entry, spans[best_span[column]])
+        top = max(key[0] for key, _, _ in candidates.values())
+        # Near-ties go to the higher-priority command, then the better score.
+        key, entry, (start, end) = max(
+            (candidate for candidate in candidates.values() if candidate[0][0] >= top - self.margin),
+            key=lambda candidate: (candidate[1]["priority"], candidate[0]),
+        )
+        intent = Intent(entry["name"], entry["phrase"], key[0], query,
+                        word_positions[start][0], word_positions[end - 1][1])
+        logging.info(f"Classified {query!r} as {intent}")
+        return intent
@@ -0,0 +1,139 @@
+"""
+Deferred imports for heavy or optional third-party libraries.
+
+`lazy_import(name)` returns a placeholder that imports the real module the
+first time one of its attributes is used, so importing a JARVIS module no
+longer pays for google-generativeai, speech_recognition, gTTS or wikipedia.
+`warm_up()` imports them on a background thread once the UI is up, and
+`import_report()` lists how long each one took.
+
+Usage:
+    sr = lazy_import("speech_recognition")
+    ...
+    recognizer = sr.Recognizer()   # the import happens here
+"""
+import importlib
+import importlib.util
+import logging
+import threading
+import time
+
+_modules = {}
+_registry_lock = threading.Lock()
+
+class LazyModule:
+    """
+    A stand-in for a module that is imported on first attribute access.
+    """
+    def __init__(self, name):
+        """
+        Args:
+            name (str): The dotted module name, e.g. "google.generativeai".
+        """
+        self.__dict__.update(_name=name, _module=None, _lock=threading.Lock(),
+                             import_seconds=None, loaded_by=None)
+
+    def load(self):
+        """Imports the module if needed and returns it. Raises ImportError if it is missing."""
+        module = self._module
+        if module is not None:
+            return module
+        with self._lock:
+            if self._module is None:
+                start = time.perf_counter()
+                module = importlib.import_module(self._name)
+                self.__dict__.update(_module=module, import_seconds=time.perf_counter() - start,
+                                     loaded_by=threading.current_thread().name)
+                logging.info(f"Imported {self._name} in {self.import_seconds * 1000:.0f} ms")
+        return self._module
+
+    @property
+    def loaded(self):
+        """True once the module has been imported."""
+        return self._module is not None
+
+    @property
+    def available(self):
+        """True if the module is installed; checked without importing it."""
+        if self._module is not None:
+            return True
+        try:
+            return importlib.util.find_spec(self._name) is not None
+        except (ImportError, ValueError):
+            return False
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name):
+    """
+    Returns the shared LazyModule for a module name.
+
+    Args:
+        name (str): The dotted module name.
+
+    Returns:
+        LazyModule: Imports the module on first attribute access.
+    """
+    with _registry_lock:
+        module = _modules.get(name)
+        if module is None:
+            module = _modules[name] = LazyModule(name)
+        return module
+
+
+def warm_up(names=None):
+    """
+    Imports deferred modules on a background thread, so the first turn that
+    needs them does not wait. Missing optional modules are skipped.
+
+    Args:
+        names (iterable): Module names to import. Defaults to every lazily imported module.
+
+    Returns:
+        threading.Thread: The (daemon) thread doing the imports.
+    """
+    if names is None:
+        with _registry_lock:
+            modules = list(_modules.values())
+    else:
+        modules = [lazy_import(name) for name in names]
+
+    def run():
+        for module in modules:
+            if module.loaded or not module.available:
+                continue
+            try:
+                module.load()
+            except Exception as e:
+                logging.warning(f"Background import of {module._name} failed: {e}")
+
+    thread = threading.Thread(target=run, name="jarvis-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_report():
+    """
+    Returns the state of every lazily imported module.
+
+    Returns:
+        list: Dicts with name, available, loaded, import time in ms and the thread that imported it.
+    """
+    with _registry_lock:
+        modules = sorted(_modules.values(), key=lambda module: module._name)
+    return [
+        {
+            "name": module._name,
+            "available": module.available,
+            "loaded": module.loaded,
+            "import_ms": None if module.import_seconds is None else module.import_seconds * 1000,
+            "loaded_by": module.loaded_by,
+        }
+        for module in modules
+    ]
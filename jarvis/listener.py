@@ -0,0 +1,197 @@
+import logging
+import queue
+import threading
+import time
+from jarvis.lazy_import import lazy_import
+from jarvis.metrics import metrics
+
+sr = lazy_import("speech_recognition")
+
+def microphone_source():
+    """Returns the default microphone as an audio source."""
+    return sr.Microphone()
+
+def wav_file_source(path):
+    """Returns a source factory that reads audio from a WAV (or AIFF/FLAC) file."""
+    return lambda: sr.AudioFile(path)
+
+
+class BackgroundListener:
+    """
+    Captures and recognizes speech continuously in the background.
+
+    The audio source stays open for the lifetime of the listener. The ambient
+    noise calibration is stored on the recognizer and only refreshed every
+    `calibration_interval` seconds. Capture and recognition run on separate
+    threads, so the next phrase is recorded while the previous one is being
+    recognized, and recognized phrases are delivered through a queue.
+    """
+    _EOF = object()
+
+    def __init__(self, source_factory=microphone_source, recognizer=None, recognize=None,
+                 calibration_interval=60.0, calibration_duration=1.0, listen_timeout=1.0,
+                 phrase_time_limit=10, max_pending=8, language='en-in'):
+        """
+        Initializes the BackgroundListener.
+
+        Args:
+            source_factory (callable): Returns a `speech_recognition` AudioSource, e.g.
+                                       `microphone_source` or `wav_file_source(path)`.
+            recognizer (sr.Recognizer): The recognizer to use. A default one is created if omitted.
+            recognize (callable): `recognize(audio)` returning the transcript. Defaults to
+                                  Google Speech Recognition.
+            calibration_interval (float): Seconds between ambient noise calibrations.
+            calibration_duration (float): Seconds of audio used per calibration (0 disables it).
+            listen_timeout (float): Seconds to wait for speech before checking for stop/calibration.
+            phrase_time_limit (float): Maximum length of a single phrase in seconds.
+            max_pending (int): Maximum number of captured or recognized phrases waiting in a queue.
+            language (str): Language code for the default recognizer.
+        """
+        self.source_factory = source_factory
+        self.recognizer = recognizer or sr.Recognizer()
+        self.recognizer.pause_threshold = 1
+        self.recognizer.energy_threshold = 300
+        self.recognize = recognize or (lambda audio: self.recognizer.recognize_google(audio, language=language))
+        self.calibration_interval = calibration_interval
+        self.calibration_duration = calibration_duration
+        self.listen_timeout = listen_timeout
+        self.phrase_time_limit = phrase_time_limit
+        self.calibrations = 0
+        self._audio = queue.Queue(maxsize=max_pending)
+        self._phrases = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._paused = threading.Event()
+        self._finished = threading.Event()
+        self._calibrated_at = None
+        self._threads = []
+
+    def start(self):
+        """Starts the capture and recognition threads."""
+        if self._threads:
+            return self
+        self._stop.clear()
+        self._finished.clear()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="jarvis-capture", daemon=True),
+            threading.Thread(target=self._recognize_loop, name="jarvis-recognize", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stops listening and waits for the worker threads to exit."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def pause(self):
+        """Discards captured audio until `resume()` is called, e.g. while JARVIS is speaking."""
+        self._paused.set()
+
+    def resume(self):
+        """Resumes delivering captured phrases."""
+        self._paused.clear()
+
+    def _calibration_due(self):
+        if not self.calibration_duration:
+            return False
+        return self._calibrated_at is None or time.monotonic() - self._calibrated_at >= self.calibration_interval
+
+    def _capture_loop(self):
+        try:
+            with self.source_factory() as source:
+                while not self._stop.is_set():
+                    if self._calibration_due():
+                        self.recognizer.adjust_for_ambient_noise(source, duration=self.calibration_duration)
+                        self._calibrated_at = time.monotonic()
+                        self.calibrations += 1
+                        logging.info(f"Energy threshold calibrated to {self.recognizer.energy_threshold:.0f}")
+                    try:
+                        audio = self.recognizer.listen(source, timeout=self.listen_timeout,
+                                                       phrase_time_limit=self.phrase_time_limit)
+                    except sr.WaitTimeoutError:
+                        continue
+                    if not audio.frame_data:
+                        # A file source has been read to the end.
+                        break
+                    if self._paused.is_set():
+                        continue
+                    self._put(self._audio, audio)
+        except Exception as e:
+            logging.error(f"Background listener capture error: {e}")
+        finally:
+            self._put(self._audio, self._EOF, force=True)
+
+    def _recognize_loop(self):
+        # The end marker can be lost when the queue is full as the listener stops,
+        # so the stop flag is checked as well.
+        while not self._stop.is_set():
+            try:
+                audio = self._audio.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if audio is self._EOF:
+                break
+            try:
+                with metrics.span("stt.recognize"):
+                    text = self.recognize(audio)
+            except sr.UnknownValueError:
+                continue
+            except sr.RequestError as e:
+                logging.error(f"Speech Recognition service error: {e}")
+                continue
+            except Exception as e:
+                logging.error(f"An unexpected error occurred during speech recognition: {e}")
+                continue
+            if text:
+                logging.info(f"User said: {text}")
+                self._put(self._phrases, text.lower())
+        self._finished.set()
+
+    def _put(self, target, item, force=False):
+        # Wait for room, but never block forever once the listener is stopping.
+        while force or not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if force and self._stop.is_set():
+                    return
+
+    def get(self, timeout=None):
+        """
+        Returns the next recognized phrase.
+
+        Args:
+            timeout (float): Seconds to wait; None waits until a phrase arrives or
+                             the source is exhausted.
+
+        Returns:
+            str: The lower-cased phrase, or "" if nothing arrived in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if remaining <= 0:
+                return ""
+            try:
+                return self._phrases.get(timeout=remaining)
+            except queue.Empty:
+                if self._finished.is_set() and self._phrases.empty():
+                    return ""
+
+    def drain(self):
+        """Discards every phrase recognized so far and returns them."""
+        phrases = []
+        while True:
+            try:
+                phrases.append(self._phrases.get_nowait())
+            except queue.Empty:
+                return phrases
+
+    @property
+    def exhausted(self):
+        """True once a file source has been fully read and recognized."""
+        return self._finished.is_set() and self._phrases.empty()
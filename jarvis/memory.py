@@ -1,50 +1,166 @@
+import asyncio
 import json
 import os
-import shutil
+import threading
+import time
+from jarvis.metrics import metrics
+from jarvis.exporter import export_to_path
 
 class Memory:
     """
-    Manages the conversation history in memory and syncs with a JSON file.
+    Manages the conversation history in memory and syncs with an append-only
+    JSON-lines journal on disk.
+
+    Every call to `add()` appends a single record to the journal instead of
+    rewriting the whole history. The journal is compacted into an atomic
+    snapshot once enough obsolete records (cleared turns, torn lines) have
+    accumulated.
     """
-    def __init__(self, file_path="jarvis/conversation_history.json"):
+    def __init__(self, file_path="jarvis/conversation_history.json", compact_threshold=200):
         """
         Initializes the Memory class.
 
         Args:
-            file_path (str): The path to the JSON file for storing history.
+            file_path (str): The path for storing history. A legacy `.json` path is
+                             mapped to a `.jsonl` journal next to it and migrated
+                             automatically on first use. None keeps the history
+                             in memory only (e.g. for batch runs).
+            compact_threshold (int): Number of obsolete journal records tolerated
+                                     before the journal is compacted.
         """
-        self.file_path = file_path
+        if file_path is not None and file_path.endswith(".json"):
+            self.legacy_path = file_path
+            self.file_path = file_path + "l"
+        else:
+            self.legacy_path = None
+            self.file_path = file_path
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._journal_records = 0
+        self._timestamps = []
         self.history = self._load_history()
 
     def _load_history(self):
-        """Loads conversation history from the JSON file."""
+        """Loads conversation history by replaying the journal."""
+        if self.file_path is None:
+            return []
+        if not os.path.exists(self.file_path):
+            return self._migrate_legacy_history()
+
+        history = []
+        timestamps = []
+        corrupt = False
+        self._journal_records = 0
         try:
-            if os.path.exists(self.file_path):
-                with open(self.file_path, 'r') as f:
-                    return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+            with open(self.file_path, 'r') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    self._journal_records += 1
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn write from a crash; compaction will drop it.
+                        print(f"Warning: Skipping corrupt record in {self.file_path}.")
+                        corrupt = True
+                        continue
+                    if record.get("op") == "clear":
+                        history = []
+                        timestamps = []
+                    else:
+                        history.append({"role": record["role"], "parts": record.get("parts", [])})
+                        timestamps.append(record.get("ts"))
+        except IOError as e:
             print(f"Warning: Could not load history from {self.file_path}. Starting fresh. Error: {e}")
-        return []
+            return []
 
-    def _save_history(self):
-        """Saves the current conversation history to the JSON file."""
+        self.history = history
+        self._timestamps = timestamps
+        if corrupt or self._journal_records - len(history) >= self.compact_threshold:
+            self._save_history()
+        return history
+
+    def _migrate_legacy_history(self):
+        """Converts an old `conversation_history.json` file into a journal."""
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return []
+        try:
+            with open(self.legacy_path, 'r') as f:
+                legacy = json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            print(f"Warning: Could not migrate history from {self.legacy_path}. Starting fresh. Error: {e}")
+            return []
+
+        self.history = [{"role": entry["role"], "parts": entry.get("parts", [])} for entry in legacy]
+        self._timestamps = [None] * len(self.history)
+        self._save_history()
+        return self.history
+
+    def _append(self, record):
+        """Appends a single record to the journal."""
+        if self.file_path is None:
+            return
         try:
-            with open(self.file_path, 'w') as f:
-                json.dump(self.history, f, indent=4)
+            with metrics.span("memory.append"), open(self.file_path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+            self._journal_records += 1
         except IOError as e:
+            print(f"Error: Could not append history to {self.file_path}. Error: {e}")
+
+    def _save_history(self):
+        """
+        Atomically rewrites the journal as a snapshot of the current history.
+
+        The snapshot is written to a temporary file, flushed to disk and then
+        renamed over the journal, so a crash leaves either the old or the new
+        journal in place, never a partial one.
+        """
+        if self.file_path is None:
+            return
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.file_path}.tmp"
+        try:
+            with metrics.span("memory.snapshot"), open(tmp_path, 'w') as f:
+                for entry, ts in zip(self.history, self._timestamps):
+                    f.write(json.dumps({"role": entry["role"], "parts": entry["parts"], "ts": ts}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
+            self._journal_records = len(self.history)
+        except (IOError, OSError) as e:
             print(f"Error: Could not save history to {self.file_path}. Error: {e}")
 
+    def _maybe_compact(self):
+        """Compacts the journal once it holds too many obsolete records."""
+        if self._journal_records - len(self.history) >= self.compact_threshold:
+            self._save_history()
+
     def add(self, role, message):
         """
-        Adds a new message to the conversation history and saves it.
+        Adds a new message to the conversation history and appends it to the journal.
 
         Args:
             role (str): The role of the speaker ('user' or 'model').
             message (str): The message content.
         """
         # The format for Gemini API is a list of dicts with 'role' and 'parts'
-        self.history.append({"role": role, "parts": [message]})
-        self._save_history()
+        entry = {"role": role, "parts": [message]}
+        ts = time.time()
+        with self._lock:
+            self.history.append(entry)
+            self._timestamps.append(ts)
+            self._append({"role": role, "parts": [message], "ts": ts})
+
+    async def add_async(self, role, message):
+        """
+        Asynchronous version of `add()`; the disk write runs on a worker thread.
+        """
+        if self.file_path is None:
+            self.add(role, message)
+            return
+        await asyncio.to_thread(self.add, role, message)
 
     def get_history(self):
         """
@@ -68,18 +184,66 @@ class Memory:
 
     def clear(self):
         """
-        Clears the conversation history from memory and the file.
+        Clears the conversation history from memory and records the clear in the journal.
         """
-        self.history = []
-        self._save_history()
+        with self._lock:
+            self.history = []
+            self._timestamps = []
+            self._append({"op": "clear", "ts": time.time()})
+            self._maybe_compact()
+
+    async def clear_async(self):
+        """
+        Asynchronous version of `clear()`.
+        """
+        await asyncio.to_thread(self.clear)
+
+    def compact(self):
+        """
+        Forces a compaction of the journal into a snapshot of the current history.
+        """
+        with self._lock:
+            self._save_history()
+
+    def iter_turns(self):
+        """
+        Yields the turns of the conversation for export, oldest first.
+
+        Yields:
+            dict: "role", "content", "created_at" and "session_id" (always None here).
+        """
+        with self._lock:
+            entries = list(zip(self.history, self._timestamps))
+        for entry, ts in entries:
+            yield {"role": entry["role"], "content": entry["parts"][0] if entry["parts"] else "",
+                   "created_at": ts, "session_id": None}
+
+    def export_history(self, path, fmt=None, since=None, until=None):
+        """
+        Exports the conversation to a file.
+
+        Args:
+            path (str): The file to write; its extension selects the format if `fmt` is omitted.
+            fmt (str): "json", "jsonl" or "markdown".
+            since: Only export turns from this date or time on.
+            until: Only export turns up to this date or time.
+
+        Returns:
+            bool: True if the export was written.
+        """
+        try:
+            export_to_path(self.iter_turns(), path, fmt, since=since, until=until)
+            return True
+        except (IOError, OSError, ValueError) as e:
+            print(f"Error: Could not export history to {path}. Error: {e}")
+            return False
 
     def get_exported_history_content(self):
         """
-        Returns the content of the conversation history file as a string for export.
+        Returns the conversation history as a JSON string for export.
         """
         try:
-            with open(self.file_path, 'r') as f:
-                return f.read()
-        except IOError as e:
-            print(f"Error: Could not read history from {self.file_path} for export. Error: {e}")
+            return json.dumps(self.get_generative_history(), indent=4)
+        except (TypeError, ValueError) as e:
+            print(f"Error: Could not serialize history from {self.file_path} for export. Error: {e}")
             return None
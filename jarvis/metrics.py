@@ -0,0 +1,272 @@
+"""
+Lightweight timing spans for the hot paths of a turn.
+
+Recording is off by default. While it is disabled `span()` returns a shared
+no-op context manager and `time_stream()` returns the stream unchanged, so
+instrumented code pays for little more than an attribute check.
+
+Span names used by JARVIS:
+
+    turn.route          matching and running a command
+    turn.first_token    from receiving the query to the first chunk of the answer
+    turn.stream         the whole answer
+    engine.first_token  time to first token from the engine
+    engine.stream       total engine stream duration
+    memory.append       persisting one turn
+    memory.snapshot     rewriting the whole journal
+    tts.synthesize      synthesizing speech audio
+    stt.recognize       transcribing one captured phrase
+
+Usage:
+    from jarvis.metrics import metrics
+    metrics.enable(JsonLinesExporter("jarvis/metrics.jsonl"))
+    with metrics.span("memory.append"):
+        ...
+    print(metrics.prometheus_text())
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Histogram bucket upper bounds, in seconds.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class JsonLinesExporter:
+    """
+    Appends every finished span to a JSON-lines file, one object per line:
+    {"ts": <unix time>, "span": <name>, "ms": <duration>, "error": <bool>}
+    """
+    def __init__(self, path):
+        """
+        Args:
+            path (str): The file to append to; its directory is created if needed.
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def export(self, name, seconds, error):
+        line = json.dumps({"ts": round(time.time(), 3), "span": name, "ms": round(seconds * 1000, 3), "error": error})
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class _Histogram:
+    def __init__(self, buckets, window):
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.recent = deque(maxlen=window)
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record(self.name, time.perf_counter() - self.start, error=exc_type is not None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Metrics:
+    """
+    Collects span durations into histograms and forwards them to an exporter.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=500):
+        """
+        Args:
+            buckets (tuple): Histogram bucket upper bounds, in seconds.
+            window (int): Number of recent durations kept per span for percentiles.
+        """
+        self.buckets = buckets
+        self.window = window
+        self.enabled = False
+        self.exporter = None
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def enable(self, exporter=None):
+        """
+        Starts recording spans.
+
+        Args:
+            exporter (JsonLinesExporter): Optional sink that receives every span.
+        """
+        self.exporter = exporter
+        self.enabled = True
+        return self
+
+    def disable(self):
+        """Stops recording spans and closes the exporter. Collected data is kept."""
+        self.enabled = False
+        exporter, self.exporter = self.exporter, None
+        if exporter is not None:
+            exporter.close()
+
+    def reset(self):
+        """Discards all collected data."""
+        with self._lock:
+            self._histograms = {}
+
+    def span(self, name):
+        """Returns a context manager that times its body as the span `name`."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name)
+
+    def record(self, name, seconds, error=False):
+        """Records a duration measured by the caller."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram(self.buckets, self.window)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram.bucket_counts[i] += 1
+                    break
+            histogram.count += 1
+            histogram.total += seconds
+            histogram.errors += error
+            histogram.recent.append(seconds)
+        exporter = self.exporter
+        if exporter is not None:
+            try:
+                exporter.export(name, seconds, error)
+            except (OSError, ValueError):
+                pass
+
+    def time_stream(self, chunks, prefix):
+        """
+        Times an iterator of chunks as `<prefix>.first_token` and `<prefix>.stream`.
+
+        Returns:
+            iterator: The same chunks; `chunks` itself when recording is disabled.
+        """
+        if not self.enabled:
+            return chunks
+        return self._timed_stream(chunks, prefix)
+
+    def _timed_stream(self, chunks, prefix):
+        start = time.perf_counter()
+        first = True
+        error = True
+        try:
+            for chunk in chunks:
+                if first:
+                    self.record(f"{prefix}.first_token", time.perf_counter() - start)
+                    first = False
+                yield chunk
+            error = False
+        finally:
+            self.record(f"{prefix}.stream", time.perf_counter() - start, error=error)
+
+    def time_stream_async(self, chunks, prefix):
+        """Asynchronous version of `time_stream()` for async iterators."""
+        if not self.enabled:
+            return chunks
+        return self._timed_stream_async(chunks, prefix)
+
+    async def _timed_stream_async(self, chunks, prefix):
+        start = time.perf_counter()
+        first = True
+        error = True
+        try:
+            async for chunk in chunks:
+                if first:
+                    self.record(f"{prefix}.first_token", time.perf_counter() - start)
+                    first = False
+                yield chunk
+            error = False
+        finally:
+            self.record(f"{prefix}.stream", time.perf_counter() - start, error=error)
+
+    def summary(self):
+        """
+        Returns latency statistics of the recent spans.
+
+        Returns:
+            dict: Maps span names to count, errors, mean, p50, p90, p99 and max, in milliseconds.
+        """
+        with self._lock:
+            snapshot = {name: (h.count, h.errors, h.total, sorted(h.recent)) for name, h in self._histograms.items()}
+        result = {}
+        for name, (count, errors, total, recent) in sorted(snapshot.items()):
+            if not recent:
+                continue
+
+            def pick(fraction):
+                return recent[min(len(recent) - 1, int(fraction * len(recent)))] * 1000
+
+            result[name] = {
+                "count": count,
+                "errors": errors,
+                "mean": total / count * 1000,
+                "p50": pick(0.50),
+                "p90": pick(0.90),
+                "p99": pick(0.99),
+                "max": recent[-1] * 1000,
+            }
+        return result
+
+    def prometheus_text(self):
+        """Renders all spans as Prometheus histograms in the text exposition format."""
+        lines = [
+            "# HELP jarvis_span_duration_seconds Duration of instrumented JARVIS operations.",
+            "# TYPE jarvis_span_duration_seconds histogram",
+        ]
+        errors = []
+        with self._lock:
+            for name, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(f'jarvis_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'jarvis_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'jarvis_span_duration_seconds_sum{{span="{name}"}} {histogram.total:.6f}')
+                lines.append(f'jarvis_span_duration_seconds_count{{span="{name}"}} {histogram.count}')
+                errors.append(f'jarvis_span_errors_total{{span="{name}"}} {histogram.errors}')
+        lines.append("# HELP jarvis_span_errors_total Instrumented operations that raised an exception.")
+        lines.append("# TYPE jarvis_span_errors_total counter")
+        return "\n".join(lines + errors) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomically writes `prometheus_text()` to a file, e.g. for node_exporter's textfile collector."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+
+# The process-wide registry used by the instrumented modules.
+metrics = Metrics()
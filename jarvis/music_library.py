@@ -0,0 +1,658 @@
+import difflib
+import heapq
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+# --- MP3 header parsing ---
+
+# Bitrates in kbit/s, indexed by [version_key][layer][bitrate_index].
+_BITRATES = {
+    "v1": {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    "v2": {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+_LAYERS = {3: 1, 2: 2, 1: 3}
+_TEXT_ENCODINGS = {0: "latin-1", 1: "utf-16", 2: "utf-16-be", 3: "utf-8"}
+_TITLE_FRAMES = {"TIT2": "title", "TT2": "title", "TPE1": "artist", "TP1": "artist"}
+
+def _syncsafe(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+def _read_id3v2(f):
+    """
+    Reads the title and artist from an ID3v2 tag at the start of the file.
+
+    Returns:
+        tuple: (tag size in bytes, dict of text fields); (0, {}) if there is no tag.
+    """
+    header = f.read(10)
+    if len(header) < 10 or header[:3] != b"ID3":
+        return 0, {}
+    major, flags = header[3], header[5]
+    tag_size = 10 + _syncsafe(header[6:10]) + (10 if flags & 0x10 else 0)
+    fields = {}
+    id_size, header_size = (3, 6) if major == 2 else (4, 10)
+    position = 10
+    # Frames are read header by header, so large embedded pictures are skipped, not read.
+    while position + header_size <= tag_size and len(fields) < 2:
+        f.seek(position)
+        frame_header = f.read(header_size)
+        frame_id = frame_header[:id_size].decode("latin-1", errors="replace")
+        if not frame_id.strip("\0") or not frame_id.isalnum():
+            break  # Padding
+        if major == 2:
+            size = int.from_bytes(frame_header[3:6], "big")
+        elif major == 4:
+            size = _syncsafe(frame_header[4:8])
+        else:
+            size = int.from_bytes(frame_header[4:8], "big")
+        position += header_size + size
+        key = _TITLE_FRAMES.get(frame_id)
+        if key and 1 < size < 4096:
+            data = f.read(size)
+            encoding = _TEXT_ENCODINGS.get(data[0], "latin-1")
+            text = data[1:].decode(encoding, errors="replace").replace("\0", " ").strip()
+            if text:
+                fields[key] = text
+    return tag_size, fields
+
+def _parse_frame_header(header):
+    """Returns the properties of an MPEG audio frame header, or None if it is not one."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = _LAYERS.get((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    mono = (header[3] >> 6) == 3
+    if layer == 1:
+        samples = 384
+    elif layer == 2 or version == 3:
+        samples = 1152
+    else:
+        samples = 576
+    if layer == 3:
+        if version == 3:
+            side_info = 17 if mono else 32
+        else:
+            side_info = 9 if mono else 17
+    else:
+        side_info = 0
+    return {
+        "bitrate": _BITRATES["v1" if version == 3 else "v2"][layer][bitrate_index] * 1000,
+        "sample_rate": _SAMPLE_RATES[version][sample_rate_index],
+        "samples": samples,
+        "side_info": side_info,
+    }
+
+def read_mp3_info(path):
+    """
+    Reads the duration, title and artist of an MP3 file from its headers only.
+
+    The duration comes from the Xing/Info or VBRI header of variable bitrate
+    files, and from the bitrate and audio size of constant bitrate ones.
+
+    Args:
+        path (str): The MP3 file.
+
+    Returns:
+        dict: "duration" in seconds (None if it cannot be determined) and,
+              when tagged, "title" and "artist".
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        audio_start, info = _read_id3v2(f)
+        f.seek(audio_start)
+        data = f.read(64 * 1024)
+        if size > 128:
+            f.seek(size - 128)
+            has_id3v1 = f.read(3) == b"TAG"
+        else:
+            has_id3v1 = False
+
+    info["duration"] = None
+    offset = 0
+    while True:
+        offset = data.find(b"\xff", offset)
+        if offset < 0 or offset + 4 > len(data):
+            return info
+        frame = _parse_frame_header(data[offset:offset + 4])
+        if frame is not None:
+            break
+        offset += 1
+
+    xing = offset + 4 + frame["side_info"]
+    if data[xing:xing + 4] in (b"Xing", b"Info") and len(data) >= xing + 12:
+        flags = struct.unpack(">I", data[xing + 4:xing + 8])[0]
+        if flags & 0x1:
+            frames = struct.unpack(">I", data[xing + 8:xing + 12])[0]
+            info["duration"] = frames * frame["samples"] / frame["sample_rate"]
+            return info
+    vbri = offset + 36
+    if data[vbri:vbri + 4] == b"VBRI" and len(data) >= vbri + 18:
+        frames = struct.unpack(">I", data[vbri + 14:vbri + 18])[0]
+        info["duration"] = frames * frame["samples"] / frame["sample_rate"]
+        return info
+    audio_bytes = size - audio_start - offset - (128 if has_id3v1 else 0)
+    info["duration"] = max(0, audio_bytes) * 8 / frame["bitrate"]
+    return info
+
+
+# --- Players ---
+
+class CommandPlayer:
+    """
+    Plays files by handing them to an external program, e.g. `open` on macOS,
+    `xdg-open` on Linux or a command-line player such as `mpg123`.
+    """
+    def __init__(self, command, stoppable=True):
+        """
+        Args:
+            command (list): The program and its arguments; the file path is appended.
+            stoppable (bool): Whether terminating the program stops the music. Launchers
+                              such as `open` exit at once and leave another app playing.
+        """
+        self.command = list(command)
+        self.stoppable = stoppable
+        self._process = None
+        self._launched = False
+
+    def play(self, path):
+        self.stop()
+        self._launched = True
+        self._process = subprocess.Popen(self.command + [path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def stop(self):
+        """
+        Stops the music.
+
+        Returns:
+            bool: False if music was handed to another app, which cannot be stopped from here.
+        """
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+        self._process = None
+        return self.stoppable or not self._launched
+
+
+def default_player():
+    """
+    Returns a player for the current platform: a command-line player if one
+    is installed (so it can be stopped), otherwise the desktop's default app,
+    which cannot be stopped.
+    """
+    for command in (["mpg123", "-q"], ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"]):
+        if shutil.which(command[0]):
+            return CommandPlayer(command)
+    if sys.platform == "darwin":
+        return CommandPlayer(["open"], stoppable=False)
+    if sys.platform.startswith("win"):
+        return CommandPlayer(["cmd", "/c", "start", ""], stoppable=False)
+    return CommandPlayer(["xdg-open"], stoppable=False)
+
+
+# --- Shuffle queue ---
+
+class ShuffleQueue:
+    """
+    Plays every track once, in random order, before any track repeats, and
+    keeps a history for "previous".
+    """
+    def __init__(self, history_size=500, rng=None):
+        """
+        Args:
+            history_size (int): Number of played tracks remembered for "previous".
+            rng (random.Random): Random generator, e.g. seeded for reproducible tests.
+        """
+        self.history_size = history_size
+        self.rng = rng or random.Random()
+        self.history = []
+        self.cursor = -1
+        self._upcoming = []
+
+    @property
+    def current(self):
+        return self.history[self.cursor] if self.cursor >= 0 else None
+
+    def next(self, keys):
+        """
+        Returns the next track key.
+
+        Args:
+            keys (list): Keys of all tracks currently in the library.
+
+        Returns:
+            str: The next key, or None if the library is empty.
+        """
+        available = set(keys)
+        # After "previous", "next" walks forward through the history again.
+        while self.cursor + 1 < len(self.history):
+            self.cursor += 1
+            if self.history[self.cursor] in available:
+                return self.history[self.cursor]
+        while True:
+            if not self._upcoming:
+                if not keys:
+                    return None
+                self._upcoming = list(keys)
+                self.rng.shuffle(self._upcoming)
+                # Never start a new round with the track that just played.
+                if len(self._upcoming) > 1 and self._upcoming[-1] == self.current:
+                    self._upcoming[0], self._upcoming[-1] = self._upcoming[-1], self._upcoming[0]
+            key = self._upcoming.pop()
+            if key in available:
+                self._push(key)
+                return key
+
+    def previous(self):
+        """Returns the previously played track key, or None at the start of the history."""
+        if self.cursor <= 0:
+            return None
+        self.cursor -= 1
+        return self.history[self.cursor]
+
+    def select(self, key):
+        """Records a track chosen by name; it will not come up again in this round."""
+        if key in self._upcoming:
+            self._upcoming.remove(key)
+        self._push(key)
+
+    def _push(self, key):
+        del self.history[self.cursor + 1:]
+        self.history.append(key)
+        if len(self.history) > self.history_size:
+            del self.history[0]
+        self.cursor = len(self.history) - 1
+
+
+# --- Library ---
+
+# Words too common in titles to show that a query names a track: "tag with you"
+# shares two of its three words with "With or Without You".
+STOP_WORDS = {"a", "an", "and", "by", "for", "i", "in", "is", "it", "me", "my", "of", "on", "or",
+              "the", "to", "with", "you", "your"}
+
+def _words(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def _trigrams(word):
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def title_from_filename(filename):
+    """Turns "01 - artist_-_some-song.mp3" into a readable title."""
+    stem = os.path.splitext(filename)[0]
+    stem = re.sub(r"^\d+[\s._-]+", "", stem)
+    return " ".join(re.sub(r"[_-]+", " ", stem).split()) or stem
+
+
+class MusicLibrary:
+    """
+    An index of the MP3 files in a music directory, persisted between runs.
+
+    Each track records its size, modification time and duration (read from
+    the MP3 headers). A refresh only lists directories whose modification
+    time changed since the last scan, and only re-reads the headers of files
+    whose size or modification time changed; `refresh(full=True)` re-lists
+    every directory.
+
+    Titles, artists and file names are indexed by word, and the vocabulary by
+    character trigrams, so a fuzzy lookup only scores the few tracks that
+    share (possibly misspelled) words with the query, even in very large
+    libraries.
+    """
+    INDEX_VERSION = 1
+
+    def __init__(self, music_dir="music", index_path="jarvis/music_index.json", player=None,
+                 refresh_interval=30.0, shuffle=None):
+        """
+        Initializes the MusicLibrary. The index is loaded now and refreshed on first use.
+
+        Args:
+            music_dir (str): Directory scanned (recursively) for .mp3 files.
+            index_path (str): JSON file the index is persisted to, or None to keep it in memory.
+            player: Object with `play(path)` and `stop()`. Defaults to `default_player()`.
+            refresh_interval (float): Minimum seconds between automatic refreshes.
+            shuffle (ShuffleQueue): The shuffle queue to use.
+        """
+        self.music_dir = music_dir
+        self.index_path = index_path
+        self.player = player or default_player()
+        self.refresh_interval = refresh_interval
+        self.shuffle = shuffle or ShuffleQueue()
+        self.tracks = {}
+        self._directories = {}
+        self._word_index = {}
+        self._trigram_index = {}
+        self._refreshed_at = None
+        self._lock = threading.RLock()
+        self._load_index()
+
+    # --- Index persistence ---
+
+    def _load_index(self):
+        if not self.index_path or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+        except (IOError, ValueError) as e:
+            logging.warning(f"Could not read the music index {self.index_path}, rescanning: {e}")
+            return
+        if data.get("version") != self.INDEX_VERSION or data.get("music_dir") != os.path.abspath(self.music_dir):
+            return
+        self.tracks = data["tracks"]
+        self._directories = data["directories"]
+        for key, track in self.tracks.items():
+            self._index_track(key, track)
+
+    def _save_index(self):
+        if not self.index_path:
+            return
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {
+            "version": self.INDEX_VERSION,
+            "music_dir": os.path.abspath(self.music_dir),
+            "directories": self._directories,
+            "tracks": self.tracks,
+        }
+        tmp_path = f"{self.index_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(json.dumps(data, separators=(",", ":")))
+            os.replace(tmp_path, self.index_path)
+        except (IOError, OSError) as e:
+            logging.error(f"Could not save the music index {self.index_path}: {e}")
+
+    # --- Scanning ---
+
+    def refresh(self, full=False):
+        """
+        Brings the index up to date with the music directory.
+
+        Args:
+            full (bool): List every directory, not only those whose modification time changed.
+
+        Returns:
+            dict: Number of tracks added, updated and removed.
+        """
+        with self._lock:
+            changes = {"added": 0, "updated": 0, "removed": 0}
+            seen_directories = {}
+            pending = [self.music_dir] if os.path.isdir(self.music_dir) else []
+            while pending:
+                directory = pending.pop()
+                try:
+                    mtime = os.stat(directory).st_mtime
+                except OSError:
+                    continue
+                known = self._directories.get(directory)
+                if not full and known is not None and known["mtime"] == mtime:
+                    # Unchanged listing: keep its tracks, but still visit its subdirectories.
+                    seen_directories[directory] = known
+                    pending.extend(known["subdirs"])
+                    continue
+                seen_directories[directory] = self._scan_directory(directory, mtime, changes)
+                pending.extend(seen_directories[directory]["subdirs"])
+
+            for directory in set(self._directories) - set(seen_directories):
+                for key in self._directories[directory]["files"]:
+                    if self._remove_track(key):
+                        changes["removed"] += 1
+            self._directories = seen_directories
+            self._refreshed_at = time.monotonic()
+            if any(changes.values()) or full:
+                self._save_index()
+            if any(changes.values()):
+                logging.info(f"Music library refreshed: {changes}")
+            return changes
+
+    def _scan_directory(self, directory, mtime, changes):
+        files, subdirs = [], []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.name.lower().endswith(".mp3") and entry.is_file():
+                    files.append(entry.path)
+                    stat = entry.stat()
+                    track = self.tracks.get(entry.path)
+                    if track is None or track["size"] != stat.st_size or track["mtime"] != stat.st_mtime:
+                        changes["updated" if track else "added"] += 1
+                        self._add_track(entry.path, stat)
+
+        previous = self._directories.get(directory)
+        if previous is not None:
+            for key in set(previous["files"]) - set(files):
+                if self._remove_track(key):
+                    changes["removed"] += 1
+        return {"mtime": mtime, "files": files, "subdirs": subdirs}
+
+    def _add_track(self, path, stat):
+        try:
+            info = read_mp3_info(path)
+        except (IOError, OSError, ValueError, struct.error) as e:
+            logging.warning(f"Could not read MP3 headers of {path}: {e}")
+            info = {"duration": None}
+        name = os.path.basename(path)
+        title = info.get("title") or title_from_filename(name)
+        artist = info.get("artist")
+        track = {
+            "path": path,
+            "name": name,
+            "title": title,
+            "artist": artist,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "duration": info["duration"],
+            # The words a track can be found by, normalized once here.
+            "search": " ".join(_words(" ".join(filter(None, (title, artist, title_from_filename(name)))))),
+        }
+        if path in self.tracks:
+            self._unindex_track(path, self.tracks[path])
+        self.tracks[path] = track
+        self._index_track(path, track)
+
+    def _remove_track(self, key):
+        track = self.tracks.pop(key, None)
+        if track is None:
+            return False
+        self._unindex_track(key, track)
+        return True
+
+    def _index_track(self, key, track):
+        for word in set(track["search"].split()):
+            keys = self._word_index.get(word)
+            if keys is None:
+                keys = self._word_index[word] = set()
+                for gram in _trigrams(word):
+                    self._trigram_index.setdefault(gram, set()).add(word)
+            keys.add(key)
+
+    def _unindex_track(self, key, track):
+        for word in set(track["search"].split()):
+            keys = self._word_index.get(word)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._word_index[word]
+                for gram in _trigrams(word):
+                    words = self._trigram_index.get(gram)
+                    if words is not None:
+                        words.discard(word)
+                        if not words:
+                            del self._trigram_index[gram]
+
+    def _similar_words(self, word, min_similarity=0.5):
+        """Returns indexed words resembling `word`, with their Dice similarity of trigrams."""
+        grams = _trigrams(word)
+        shared = {}
+        for gram in grams:
+            for candidate in self._trigram_index.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        similar = {}
+        for candidate, count in shared.items():
+            # A word of n letters has n padded trigrams.
+            similarity = 2 * count / (len(grams) + len(candidate))
+            if similarity >= min_similarity:
+                similar[candidate] = similarity
+        return similar
+
+    def _maybe_refresh(self):
+        if self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.refresh_interval:
+            self.refresh()
+
+    # --- Lookup ---
+
+    def find(self, query, limit=1, min_score=0.5):
+        """
+        Finds tracks whose title, artist or file name resemble a query.
+
+        Args:
+            query (str): E.g. "bohemian rhapsody" or "queen bohemian".
+            limit (int): Maximum number of tracks returned.
+            min_score (float): Minimum similarity between 0 and 1.
+
+        Returns:
+            list: Matching tracks, best first.
+        """
+        with self._lock:
+            self._maybe_refresh()
+            query_words = set(_words(query))
+            if not query_words:
+                return []
+            # Coverage only counts the words that set a title apart, unless there are none.
+            query_words = query_words - STOP_WORDS or query_words
+            # Each track scores the best similarity of its words to every query word.
+            matched = {}
+            for word in query_words:
+                best = {}
+                for similar, similarity in self._similar_words(word).items():
+                    for key in self._word_index[similar]:
+                        if similarity > best.get(key, 0):
+                            best[key] = similarity
+                for key, similarity in best.items():
+                    matched[key] = matched.get(key, 0) + similarity
+            # Only the tracks matching the most query words get a precise score.
+            candidates = heapq.nlargest(max(20, limit * 5), matched, key=matched.get)
+            query_text = " ".join(_words(query))
+            scored = []
+            for key in candidates:
+                track = self.tracks[key]
+                coverage = matched[key] / len(query_words)
+                best = max(
+                    difflib.SequenceMatcher(None, query_text, text).ratio()
+                    for text in (" ".join(_words(track["title"])), track["search"])
+                )
+                score = max(best, coverage * 0.9)
+                if score >= min_score:
+                    # Ties on coverage go to the closest title.
+                    scored.append((score, best, key))
+            scored.sort(reverse=True)
+            return [self.tracks[key] for _, _, key in scored[:limit]]
+
+    # --- Playback ---
+
+    def play(self, query=None, cancel_event=None):
+        """
+        Plays a track by (fuzzy) title, or the next track of the shuffle queue.
+
+        Args:
+            query (str): The title to look for; None plays the next track of the shuffle.
+            cancel_event (threading.Event): If set by the time the track is chosen (e.g. the
+                                            caller gave up waiting), nothing is played.
+
+        Returns:
+            dict: The track being played, or None if nothing matched, the library is
+                  empty or playback was cancelled.
+        """
+        with self._lock:
+            if query:
+                matches = self.find(query)
+                if not matches or self._cancelled(cancel_event):
+                    return None
+                track = matches[0]
+                self.shuffle.select(track["path"])
+            else:
+                self._maybe_refresh()
+                if self._cancelled(cancel_event):
+                    return None
+                key = self.shuffle.next(list(self.tracks))
+                if key is None:
+                    return None
+                track = self.tracks[key]
+            self.player.play(track["path"])
+            return track
+
+    def next(self):
+        """Skips to the next track of the shuffle queue."""
+        return self.play()
+
+    def previous(self, cancel_event=None):
+        """
+        Plays the previously played track again.
+
+        Args:
+            cancel_event (threading.Event): If set once the lock is acquired, nothing is played.
+
+        Returns:
+            dict: The track, or None if there is no earlier track or playback was cancelled.
+        """
+        with self._lock:
+            if self._cancelled(cancel_event):
+                return None
+            key = self.shuffle.previous()
+            while key is not None and key not in self.tracks:
+                key = self.shuffle.previous()
+            if key is None:
+                return None
+            track = self.tracks[key]
+            self.player.play(track["path"])
+            return track
+
+    @staticmethod
+    def _cancelled(cancel_event):
+        if cancel_event is not None and cancel_event.is_set():
+            logging.info("Playback cancelled before it started")
+            return True
+        return False
+
+    def stop(self):
+        """
+        Stops playback.
+
+        Returns:
+            bool: False if the player could not stop the music.
+        """
+        return self.player.stop() is not False
+
+    def stats(self):
+        """Returns the number of indexed tracks, directories and their total duration."""
+        with self._lock:
+            return {
+                "tracks": len(self.tracks),
+                "directories": len(self._directories),
+                "total_duration": sum(track["duration"] or 0 for track in self.tracks.values()),
+            }
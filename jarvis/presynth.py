@@ -0,0 +1,195 @@
+import collections
+import logging
+import threading
+from jarvis.metrics import metrics
+from jarvis.speech_pipeline import SentenceSplitter
+
+class PreSynthesizer:
+    """
+    Synthesizes the audio of assistant replies in the background, so that
+    pressing play does not have to wait for gTTS.
+
+    A reply is split into sentences while it is still streaming in, and each
+    sentence is synthesized into the TTSCache by a small pool of worker
+    threads. Playback then only reads the cache (or joins a synthesis that
+    is already running). Jobs are keyed by (sentence, accent, language), so
+    a sentence repeated within or across replies is synthesized once. The
+    queue is bounded; sentences that do not fit are synthesized on demand
+    at playback instead. Jobs of a message are dropped when it is cancelled,
+    e.g. when the conversation is cleared.
+
+    Usage:
+        chunks = presynth.stream(message_id, assistant.respond_stream(prompt))
+        ...
+        audio = presynth.audio(message_id, text)
+    """
+    def __init__(self, tts_cache, max_workers=2, max_queue=32, min_chars=20, max_messages=1000):
+        """
+        Initializes the PreSynthesizer.
+
+        Args:
+            tts_cache (TTSCache): Where the audio is synthesized to and read from.
+            max_workers (int): Number of sentences synthesized at the same time.
+            max_queue (int): Maximum number of sentences waiting to be synthesized.
+            min_chars (int): Minimum sentence length, see SentenceSplitter.
+            max_messages (int): Number of messages whose sentence split is remembered;
+                                older messages are split again at playback.
+        """
+        self.tts_cache = tts_cache
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.min_chars = min_chars
+        self.max_messages = max_messages
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._queue = collections.OrderedDict()      # job key -> (text, accent, lang)
+        self._owners = {}                            # job key -> ids of the messages waiting for it
+        self._sentences = collections.OrderedDict()  # message id -> its sentences so far
+        self._threads = []
+        self._closed = False
+
+    def _start_workers(self):
+        """Starts the worker threads on first use. Must be called with the lock held."""
+        if self._threads or self._closed:
+            return
+        for i in range(self.max_workers):
+            thread = threading.Thread(target=self._run, name=f"jarvis-presynth-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _enqueue(self, message_id, sentence, accent, lang):
+        key = self.tts_cache.key(sentence, accent, lang)
+        with self._lock:
+            if self._closed:
+                return
+            if message_id not in self._sentences:
+                self._sentences[message_id] = []
+                if len(self._sentences) > self.max_messages:
+                    self._sentences.popitem(last=False)
+            self._sentences[message_id].append(sentence)
+            if key in self._queue:
+                self._owners[key].add(message_id)
+                return
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                logging.info("Pre-synthesis queue full; the sentence will be synthesized on playback")
+                return
+            self._queue[key] = (sentence, accent, lang)
+            self._owners[key] = {message_id}
+            self._start_workers()
+            self._work.notify()
+
+    def submit(self, message_id, text, accent="com", lang="en"):
+        """
+        Queues a complete message for synthesis.
+
+        Args:
+            message_id (str): Identifies the message, for `audio()` and `cancel()`.
+            text (str): The message text.
+            accent (str): The gTTS top-level domain that selects the accent.
+            lang (str): The language code.
+        """
+        splitter = SentenceSplitter(min_chars=self.min_chars)
+        for sentence in splitter.feed(text) + splitter.flush():
+            self._enqueue(message_id, sentence, accent, lang)
+
+    def stream(self, message_id, chunks, accent="com", lang="en"):
+        """
+        Passes a response stream through, queueing each sentence for synthesis
+        as soon as it is complete.
+
+        Args:
+            message_id (str): Identifies the message, for `audio()` and `cancel()`.
+            chunks (iterable): The streamed response text.
+            accent (str): The gTTS top-level domain that selects the accent.
+            lang (str): The language code.
+
+        Yields:
+            str: The chunks, unchanged.
+        """
+        splitter = SentenceSplitter(min_chars=self.min_chars)
+        for chunk in chunks:
+            yield chunk
+            for sentence in splitter.feed(chunk):
+                self._enqueue(message_id, sentence, accent, lang)
+        for sentence in splitter.flush():
+            self._enqueue(message_id, sentence, accent, lang)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._work.wait()
+                if self._closed:
+                    return
+                key, (text, accent, lang) = self._queue.popitem(last=False)
+                self._owners.pop(key, None)
+            with metrics.span("tts.presynth"):
+                # The cache makes a playback request for the same sentence wait for this synthesis.
+                self.tts_cache.get_audio(text, accent=accent, lang=lang)
+
+    def audio(self, message_id, text, accent="com", lang="en"):
+        """
+        Returns the audio of a message, sentence by sentence from the cache.
+        A sentence being synthesized in the background is waited for, and one
+        not started yet is synthesized right away, while the workers carry on
+        with the later sentences.
+
+        Args:
+            message_id (str): The message.
+            text (str): The message text, used if the message was never queued.
+            accent (str): The gTTS top-level domain that selects the accent.
+            lang (str): The language code.
+
+        Returns:
+            bytes: The MP3 audio (consecutive MP3 streams play back as one), or None
+                   if synthesis failed.
+        """
+        with self._lock:
+            sentences = list(self._sentences.get(message_id, ()))
+        if not sentences:
+            splitter = SentenceSplitter(min_chars=self.min_chars)
+            sentences = splitter.feed(text) + splitter.flush()
+        parts = []
+        for sentence in sentences:
+            audio = self.tts_cache.get_audio(sentence, accent=accent, lang=lang)
+            if audio is None:
+                return None
+            parts.append(audio)
+        return b"".join(parts) or None
+
+    def cancel(self, message_id):
+        """
+        Drops the queued sentences of a message that no other message is waiting for.
+
+        Returns:
+            int: The number of jobs dropped.
+        """
+        dropped = 0
+        with self._lock:
+            self._sentences.pop(message_id, None)
+            for key in [key for key, owners in self._owners.items() if message_id in owners]:
+                owners = self._owners[key]
+                owners.discard(message_id)
+                if not owners:
+                    del self._owners[key]
+                    del self._queue[key]
+                    dropped += 1
+        return dropped
+
+    def pending(self):
+        """Returns the number of sentences waiting to be synthesized."""
+        with self._lock:
+            return len(self._queue)
+
+    def shutdown(self):
+        """Drops the queued jobs and stops the workers once their current sentence is done."""
+        with self._lock:
+            self._closed = True
+            self._queue.clear()
+            self._owners.clear()
+            self._work.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join()
@@ -1,12 +1,19 @@
+from jarvis.context_window import ContextWindow
+
 class PromptController:
     """
     Builds and formats the prompt for the Gemini model, including system
     instructions and conversation history, suitable for a chat-based interaction.
     """
-    def __init__(self):
+    def __init__(self, context_window=None):
         """
         Initializes the PromptController.
+
+        Args:
+            context_window (ContextWindow): Keeps the history within a token budget.
+                                            A default window is created if omitted.
         """
+        self.context_window = context_window or ContextWindow()
         self.base_prompt = "Your name is Jarvis, a personal assistant created by Anwar, a Data Science Learner. Answer the user's question."
         self.role_prompts = {
             "Tutor": "You are a helpful and patient tutor. Explain concepts clearly with examples.",
@@ -15,29 +22,50 @@ class PromptController:
             "Default": "" # No extra role-based instruction
         }
 
-    def build_prompt(self, history, role="Default"):
+    def build_system_instruction(self, role="Default", summary=""):
         """
-        Constructs the full prompt for the model based on history and role.
-        In a chat model, the history itself often serves as the prompt.
-        This method will prepend a system-level instruction based on the role.
+        Builds the system instruction for the given role.
 
         Args:
-            history (list): The conversation history from the Memory class.
             role (str): The desired role for the assistant.
+            summary (str): Summary of older turns that no longer fit the context window.
 
         Returns:
-            list: The formatted prompt including role-based instructions and history.
+            str: The system instruction to pass to the model.
         """
         role_instruction = self.role_prompts.get(role, "")
         system_instruction = f"{self.base_prompt} {role_instruction}".strip()
+        if summary:
+            system_instruction += f"\n\nSummary of the earlier conversation:\n{summary}"
+        return system_instruction
+
+    def build_request(self, history, role="Default"):
+        """
+        Builds everything the engine needs for one turn.
+
+        Args:
+            history (list): The conversation history from the Memory class.
+            role (str): The desired role for the assistant.
 
-        # The prompt for the Gemini chat model is the history itself.
-        # We can insert a system message at the beginning of the chat,
-        # but for many models, the user/model turn structure is sufficient.
-        # Let's keep it simple and just return the history.
-        # The model's behavior can be guided by a system message if needed,
-        # but let's try without it first to keep the code beginner-friendly.
-        
-        # A simple implementation: The history is the prompt.
-        # The `assistant.py` will be responsible for adding the latest user message.
-        return history
\ No newline at end of file
+        Returns:
+            tuple: (list of history entries within the token budget, system instruction)
+        """
+        recent, summary = self.context_window.apply(history)
+        return recent, self.build_system_instruction(role, summary)
+
+    def build_prompt(self, history, role="Default"):
+        """
+        Constructs the prompt contents for the model based on history.
+        Older turns are dropped according to the context window; use
+        `build_request` to also get the system instruction that carries
+        their summary.
+
+        Args:
+            history (list): The conversation history from the Memory class.
+            role (str): The desired role for the assistant.
+
+        Returns:
+            list: The history entries that fit within the token budget.
+        """
+        contents, _ = self.build_request(history, role)
+        return contents
@@ -0,0 +1,192 @@
+import logging
+import queue
+import random
+import socket
+import threading
+import time
+from jarvis.engine import EngineError
+
+# HTTP status codes worth retrying: rate limiting and transient server errors.
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Exception class names raised by google-api-core for the same conditions.
+RETRYABLE_ERROR_NAMES = {
+    "ServiceUnavailable", "TooManyRequests", "ResourceExhausted", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway",
+}
+
+class RetryableError(EngineError):
+    """An engine failure that may succeed if the request is repeated."""
+
+class FirstTokenTimeout(RetryableError):
+    """Raised when no chunk arrives within the first-token timeout."""
+
+
+def is_retryable(error):
+    """
+    Decides whether a failed request may be retried.
+
+    Args:
+        error (Exception): The error raised by the transport.
+
+    Returns:
+        bool: True for timeouts, connection failures, rate limiting and 5xx errors.
+    """
+    if isinstance(error, RetryableError):
+        return True
+    if isinstance(error, EngineError):
+        return False
+    if isinstance(error, (ConnectionError, TimeoutError, socket.timeout)):
+        return True
+    if getattr(error, "code", None) in RETRYABLE_STATUS or getattr(error, "status", None) in RETRYABLE_STATUS:
+        return True
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+    """
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0):
+        """
+        Args:
+            max_attempts (int): Total number of attempts, including the first one.
+            base_delay (float): Backoff before the first retry, in seconds (before jitter).
+            max_delay (float): Upper bound for a single backoff, in seconds.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, retry):
+        """Returns a random delay for the given retry number (1 for the first retry)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+
+class _Attempt:
+    """One request running on its own thread, pushing its events to a shared queue."""
+    def __init__(self, attempt_id, open_stream, events):
+        self.id = attempt_id
+        self.cancelled = threading.Event()
+        self._open_stream = open_stream
+        self._events = events
+        threading.Thread(target=self._run, name=f"jarvis-request-{attempt_id}", daemon=True).start()
+
+    def _run(self):
+        stream = None
+        try:
+            stream = self._open_stream()
+            for chunk in stream:
+                if self.cancelled.is_set():
+                    return
+                self._events.put((self.id, "chunk", chunk))
+            self._events.put((self.id, "end", None))
+        except Exception as e:
+            self._events.put((self.id, "error", e))
+        finally:
+            close = getattr(stream, "close", None)
+            if self.cancelled.is_set() and close is not None:
+                try:
+                    close()
+                except Exception:
+                    pass
+
+
+def resilient_stream(open_stream, retry_policy=None, first_token_timeout=30.0,
+                     read_timeout=60.0, hedge_after=None):
+    """
+    Streams chunks from `open_stream()` with timeouts, retries and optional hedging.
+
+    Errors raised before the first chunk are retried with jittered exponential
+    backoff if they are retryable. Once a chunk has been emitted the stream is
+    committed: later errors are raised without retrying, so no text is ever
+    repeated. With hedging enabled, a second identical request is started if
+    the first has not produced a chunk after `hedge_after` seconds, and
+    whichever answers first is used.
+
+    Args:
+        open_stream (callable): Starts a request and returns an iterator of text chunks.
+        retry_policy (RetryPolicy): Retry settings. Defaults to RetryPolicy().
+        first_token_timeout (float): Seconds to wait for the first chunk of an attempt.
+        read_timeout (float): Seconds to wait for each subsequent chunk.
+        hedge_after (float): Seconds after which a hedge request is sent, or None to disable.
+
+    Yields:
+        str: Chunks of the response.
+    """
+    policy = retry_policy or RetryPolicy()
+    events = queue.Queue()
+    next_id = 0
+    last_error = None
+
+    for attempt_number in range(1, policy.max_attempts + 1):
+        if attempt_number > 1:
+            delay = policy.backoff(attempt_number - 1)
+            logging.warning(f"Retrying request (attempt {attempt_number}) in {delay:.2f}s after: {last_error}")
+            time.sleep(delay)
+
+        started = time.monotonic()
+        active = {next_id: _Attempt(next_id, open_stream, events)}
+        next_id += 1
+        hedged = hedge_after is None
+        winner = None
+        first_chunk = None
+
+        # Wait for the first chunk from any active request.
+        while winner is None and active:
+            now = time.monotonic()
+            deadline = started + first_token_timeout
+            wake_at = deadline if hedged else min(deadline, started + hedge_after)
+            try:
+                attempt_id, kind, payload = events.get(timeout=max(0.0, wake_at - now))
+            except queue.Empty:
+                if not hedged and time.monotonic() < deadline:
+                    logging.info(f"No first token after {hedge_after}s; sending a hedge request.")
+                    active[next_id] = _Attempt(next_id, open_stream, events)
+                    next_id += 1
+                    hedged = True
+                    continue
+                last_error = FirstTokenTimeout(f"No response within {first_token_timeout}s")
+                break
+            if attempt_id not in active:
+                continue  # A late event from an abandoned request.
+            if kind == "error":
+                del active[attempt_id]
+                last_error = payload
+                if not is_retryable(payload):
+                    for attempt in active.values():
+                        attempt.cancelled.set()
+                    raise payload
+                continue
+            winner = active.pop(attempt_id)
+            for attempt in active.values():
+                attempt.cancelled.set()
+            if kind == "end":
+                return
+            first_chunk = payload
+
+        if winner is None:
+            for attempt in active.values():
+                attempt.cancelled.set()
+            continue
+
+        # Committed to this response: stream the rest without retrying.
+        try:
+            yield first_chunk
+            while True:
+                try:
+                    attempt_id, kind, payload = events.get(timeout=read_timeout)
+                except queue.Empty:
+                    raise EngineError(f"Stream stalled for more than {read_timeout}s")
+                if attempt_id != winner.id:
+                    continue
+                if kind == "chunk":
+                    yield payload
+                elif kind == "end":
+                    return
+                else:
+                    raise payload
+        finally:
+            winner.cancelled.set()
+
+    raise last_error if isinstance(last_error, EngineError) else EngineError(f"Request failed: {last_error}")
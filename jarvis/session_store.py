@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from jarvis.memory import Memory
+
+class SessionMemory:
+    """
+    A handle to one session's history that behaves like a Memory.
+
+    The underlying Memory is looked up through the SessionManager on every
+    call, so a session that was evicted from RAM is transparently reloaded
+    from storage the next time it is used.
+    """
+    def __init__(self, manager, session_id):
+        self.manager = manager
+        self.session_id = session_id
+
+    def add(self, role, message):
+        with self.manager.acquire(self.session_id) as memory:
+            memory.add(role, message)
+            self.manager._grow(self.session_id, len(message))
+
+    async def add_async(self, role, message):
+        await asyncio.to_thread(self.add, role, message)
+
+    def get_history(self):
+        with self.manager.acquire(self.session_id) as memory:
+            return memory.get_history()
+
+    def get_generative_history(self):
+        with self.manager.acquire(self.session_id) as memory:
+            return memory.get_generative_history()
+
+    def clear(self):
+        with self.manager.acquire(self.session_id) as memory:
+            memory.clear()
+            self.manager._reset_size(self.session_id)
+
+    async def clear_async(self):
+        await asyncio.to_thread(self.clear)
+
+    def compact(self):
+        with self.manager.acquire(self.session_id) as memory:
+            memory.compact()
+
+    def get_exported_history_content(self):
+        with self.manager.acquire(self.session_id) as memory:
+            return memory.get_exported_history_content()
+
+    def iter_turns(self):
+        with self.manager.acquire(self.session_id) as memory:
+            turns = list(memory.iter_turns())
+        for turn in turns:
+            turn["session_id"] = self.session_id
+            yield turn
+
+    def export_history(self, path, **kwargs):
+        with self.manager.acquire(self.session_id) as memory:
+            return memory.export_history(path, **kwargs)
+
+    def search(self, text, **kwargs):
+        """Searches the session's history, or returns None if its storage backend cannot search."""
+        with self.manager.acquire(self.session_id) as memory:
+            if not hasattr(memory, "search"):
+                return None
+            return memory.search(text, **kwargs)
+
+
+class _Session:
+    def __init__(self, memory, size):
+        self.memory = memory
+        self.size = size
+        self.lock = threading.RLock()
+        self.last_used = time.monotonic()
+
+
+class _Lease:
+    """Context manager holding a session's lock while its Memory is in use."""
+    def __init__(self, manager, session_id):
+        self.manager = manager
+        self.session_id = session_id
+        self.session = None
+
+    def __enter__(self):
+        while True:
+            session = self.manager._get_or_load(self.session_id)
+            session.lock.acquire()
+            # Eviction needs the session lock, so once we hold it and the session
+            # is still registered it cannot be unloaded underneath us.
+            if self.manager._is_loaded(self.session_id, session):
+                break
+            session.lock.release()
+        session.last_used = time.monotonic()
+        self.session = session
+        return session.memory
+
+    def __exit__(self, *exc_info):
+        self.session.lock.release()
+
+
+class SessionManager:
+    """
+    Keeps one conversation history per session on a shared storage backend.
+
+    Every session has its own lock, so concurrent users never contend on a
+    single history; the manager-wide lock is only held to look sessions up.
+    Sessions idle for longer than `idle_timeout` are dropped from RAM, and the
+    least recently used ones are evicted when the number of loaded sessions or
+    their total size exceeds its cap. Evicted sessions stay on disk and are
+    reloaded on their next use.
+    """
+    def __init__(self, storage_dir="jarvis/sessions", memory_factory=None, max_sessions=200,
+                 max_total_bytes=64 * 1024 * 1024, idle_timeout=30 * 60):
+        """
+        Initializes the SessionManager.
+
+        Args:
+            storage_dir (str): Directory holding one journal per session.
+            memory_factory (callable): `memory_factory(session_id)` returning a Memory-like
+                                       object. Defaults to a journal file in `storage_dir`.
+            max_sessions (int): Maximum number of sessions kept in RAM.
+            max_total_bytes (int): Approximate cap on the text held in RAM across sessions.
+            idle_timeout (float): Seconds of inactivity after which a session is unloaded.
+        """
+        self.storage_dir = storage_dir
+        self.memory_factory = memory_factory or self._journal_memory
+        self.max_sessions = max_sessions
+        self.max_total_bytes = max_total_bytes
+        self.idle_timeout = idle_timeout
+        self.total_bytes = 0
+        self.loads = 0
+        self.evictions = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(storage_dir, exist_ok=True)
+
+    @staticmethod
+    def normalize_id(session_id):
+        """Maps a session ID to a string that is safe to use as a file name."""
+        if re.fullmatch(r"[A-Za-z0-9_-]{1,64}", session_id):
+            return session_id
+        return hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+
+    def _journal_memory(self, session_id):
+        return Memory(file_path=os.path.join(self.storage_dir, f"{session_id}.jsonl"))
+
+    def get(self, session_id):
+        """
+        Returns a Memory-like handle for a session.
+
+        Args:
+            session_id (str): Identifies the browser session or user.
+
+        Returns:
+            SessionMemory: The session's history.
+        """
+        return SessionMemory(self, self.normalize_id(session_id))
+
+    def acquire(self, session_id):
+        """
+        Returns a context manager that loads a session if needed and holds its
+        lock while the session's Memory is in use.
+        """
+        return _Lease(self, session_id)
+
+    def _get_or_load(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+        return self._load(session_id)
+
+    def _is_loaded(self, session_id, session):
+        with self._lock:
+            return self._sessions.get(session_id) is session
+
+    def _load(self, session_id):
+        # Loading reads the journal, so it happens outside the manager-wide lock.
+        memory = self.memory_factory(session_id)
+        size = sum(len(part) for entry in memory.get_generative_history() for part in entry["parts"])
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _Session(memory, size)
+                self._sessions[session_id] = session
+                self.total_bytes += size
+                self.loads += 1
+            self._sessions.move_to_end(session_id)
+        self.evict(keep=session_id)
+        return session
+
+    def _grow(self, session_id, size):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.size += size
+                self.total_bytes += size
+        if self.total_bytes > self.max_total_bytes:
+            self.evict(keep=session_id)
+
+    def _reset_size(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self.total_bytes -= session.size
+                session.size = 0
+
+    def evict(self, keep=None):
+        """
+        Unloads idle sessions and, if still over a cap, the least recently used ones.
+        Sessions that are currently in use are never unloaded.
+
+        Args:
+            keep (str): A session that must stay loaded, e.g. the one being used.
+
+        Returns:
+            int: Number of sessions unloaded.
+        """
+        now = time.monotonic()
+        evicted = 0
+        with self._lock:
+            for session_id in list(self._sessions):
+                session = self._sessions[session_id]
+                over_cap = len(self._sessions) > self.max_sessions or self.total_bytes > self.max_total_bytes
+                idle = now - session.last_used > self.idle_timeout
+                if session_id == keep or not (over_cap or idle):
+                    continue
+                if not session.lock.acquire(blocking=False):
+                    continue
+                try:
+                    del self._sessions[session_id]
+                    self.total_bytes -= session.size
+                    evicted += 1
+                finally:
+                    session.lock.release()
+            self.evictions += evicted
+        if evicted:
+            logging.info(f"Unloaded {evicted} idle session(s) from memory.")
+        return evicted
+
+    def stats(self):
+        """Returns the number of loaded sessions and their approximate size."""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "total_bytes": self.total_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,159 @@
+import logging
+import queue
+import re
+import threading
+import time
+
+# A sentence ends at ., ! or ? followed by whitespace, or at a line break.
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+class SentenceSplitter:
+    """
+    Splits a stream of text chunks into complete sentences as they arrive.
+    """
+    def __init__(self, min_chars=20):
+        """
+        Args:
+            min_chars (int): Sentences shorter than this are merged with the next one
+                             so the speech does not sound choppy.
+        """
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, chunk):
+        """
+        Adds a chunk of text and returns the sentences it completed.
+
+        Args:
+            chunk (str): The next piece of streamed text.
+
+        Returns:
+            list: Complete sentences, in order.
+        """
+        self._buffer += chunk
+        sentences = []
+        start = 0
+        for boundary in SENTENCE_BOUNDARY.finditer(self._buffer):
+            sentence = self._buffer[start:boundary.start()].strip()
+            if len(sentence) >= self.min_chars:
+                sentences.append(sentence)
+                start = boundary.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        """Returns whatever text is left once the stream has ended."""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return [rest] if rest else []
+
+
+class StreamingSpeaker:
+    """
+    Speaks a streamed response sentence by sentence while it is still arriving.
+
+    The producer (the thread reading the response stream) feeds chunks in; a
+    consumer thread speaks completed sentences from a bounded queue, so the
+    first sentence is spoken while later chunks are still being generated.
+    """
+    _DONE = object()
+
+    def __init__(self, speak_fn, max_queue=8, min_chars=20):
+        """
+        Args:
+            speak_fn (callable): Blocking function that speaks one piece of text.
+            max_queue (int): Maximum number of sentences waiting to be spoken.
+            min_chars (int): Minimum sentence length, see SentenceSplitter.
+        """
+        self.speak_fn = speak_fn
+        self.splitter = SentenceSplitter(min_chars=min_chars)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="jarvis-speaker", daemon=True)
+        self.started_at = None
+        self.first_audio_at = None
+        self.stream_finished_at = None
+        self.finished_at = None
+
+    def start(self):
+        """Starts the speaking thread and the latency clock."""
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def feed(self, chunk):
+        """Feeds a chunk of the response; completed sentences are queued for speaking."""
+        for sentence in self.splitter.feed(chunk):
+            self._put(sentence)
+
+    def close(self):
+        """Signals that the response stream has ended."""
+        self.stream_finished_at = time.perf_counter()
+        for sentence in self.splitter.flush():
+            self._put(sentence)
+        self._put(self._DONE)
+
+    def _put(self, item):
+        # Block while the queue is full, but give up as soon as speech is cancelled.
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        while not self._cancelled.is_set():
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is self._DONE:
+                break
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter()
+            self.speak_fn(item)
+        self.finished_at = time.perf_counter()
+
+    def wait(self, timeout=None):
+        """Waits until every queued sentence has been spoken (or speech was cancelled)."""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def cancel(self):
+        """Stops speaking: drops queued sentences and unblocks the producer."""
+        self._cancelled.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def timings(self):
+        """
+        Returns the latency measurements, in seconds from `start()`.
+
+        Returns:
+            dict: time_to_first_audio, stream_duration and total_duration
+                  (None for stages that were not reached).
+        """
+        def since_start(moment):
+            return None if moment is None or self.started_at is None else moment - self.started_at
+        return {
+            "time_to_first_audio": since_start(self.first_audio_at),
+            "stream_duration": since_start(self.stream_finished_at),
+            "total_duration": since_start(self.finished_at),
+        }
+
+    def log_timings(self):
+        """Logs the latency measurements of the last response."""
+        timings = self.timings()
+        formatted = ", ".join(
+            f"{name.replace('_', ' ')}: {value:.2f}s" for name, value in timings.items() if value is not None
+        )
+        logging.info(f"Speech timings - {formatted}")
+        return timings
@@ -0,0 +1,176 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+def pyttsx3_engine_factory():
+    """Creates a pyttsx3 engine (the default backend of the SpeechService)."""
+    import pyttsx3
+    return pyttsx3.init()
+
+
+class Utterance:
+    """
+    A piece of text queued for speaking.
+    """
+    def __init__(self, text, priority):
+        self.text = text
+        self.priority = priority
+        self.done = threading.Event()
+        self.cancelled = False
+        self.queued_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+
+    def wait(self, timeout=None):
+        """Blocks until the utterance has been spoken or dropped."""
+        return self.done.wait(timeout)
+
+
+class SpeechService:
+    """
+    A long-lived text-to-speech worker.
+
+    The TTS engine is created once, on a dedicated thread, and the voice is
+    resolved once. Utterances are spoken from a priority queue (lower numbers
+    first, FIFO within a priority) and can be interrupted. Callers may block
+    until their utterance has been spoken or return immediately.
+    """
+    _STOP = "__stop__"
+
+    def __init__(self, engine_factory=None, rate=180, voice_index=7):
+        """
+        Initializes the SpeechService. The worker thread starts on first use.
+
+        Args:
+            engine_factory (callable): Returns a pyttsx3-compatible engine. Defaults to pyttsx3.
+            rate (int): Speaking rate in words per minute.
+            voice_index (int): Preferred index in the engine's voice list; falls back
+                               to the first voice if there are not enough voices.
+        """
+        self.engine_factory = engine_factory or pyttsx3_engine_factory
+        self.rate = rate
+        self.voice_index = voice_index
+        self.engine = None
+        self.spoken = 0
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+        self._current = None
+
+    def start(self):
+        """Starts the worker thread if it is not running yet."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._ready.clear()
+                self._thread = threading.Thread(target=self._run, name="jarvis-speech", daemon=True)
+                self._thread.start()
+        self._ready.wait()
+        return self
+
+    def _init_engine(self):
+        """Creates the engine and resolves the voice. Runs once, on the worker thread."""
+        try:
+            engine = self.engine_factory()
+            engine.setProperty('rate', self.rate)
+            voices = engine.getProperty("voices")
+            if voices:
+                voice = voices[self.voice_index] if len(voices) > self.voice_index else voices[0]
+                engine.setProperty('voice', voice.id)
+            self.engine = engine
+        except Exception as e:
+            logging.error(f"Could not initialize the speech engine: {e}")
+            self.engine = None
+
+    def _run(self):
+        self._init_engine()
+        self._ready.set()
+        while True:
+            _, _, utterance = self._queue.get()
+            if utterance is self._STOP:
+                break
+            if utterance.cancelled:
+                utterance.done.set()
+                continue
+            self._current = utterance
+            utterance.started_at = time.perf_counter()
+            try:
+                if self.engine is None:
+                    print(f"JARVIS (no speech engine): {utterance.text}")
+                else:
+                    logging.info(f"Speaking: {utterance.text}")
+                    self.engine.say(utterance.text)
+                    self.engine.runAndWait()
+                self.spoken += 1
+            except Exception as e:
+                logging.error(f"Error while speaking: {e}")
+                print(f"ERROR: Could not speak the text. Check system TTS config. Details: {e}")
+            finally:
+                utterance.finished_at = time.perf_counter()
+                self._current = None
+                utterance.done.set()
+
+    def say(self, text, priority=PRIORITY_NORMAL, block=True, interrupt=False):
+        """
+        Queues text for speaking.
+
+        Args:
+            text (str): The text to speak.
+            priority (int): Lower values are spoken first.
+            block (bool): Wait until the text has been spoken.
+            interrupt (bool): Stop the current utterance and drop everything queued first.
+
+        Returns:
+            Utterance: Handle that can be waited on.
+        """
+        self.start()
+        if interrupt:
+            self.interrupt()
+        utterance = Utterance(text, priority)
+        self._queue.put((priority, next(self._counter), utterance))
+        if block:
+            utterance.wait()
+        return utterance
+
+    def interrupt(self):
+        """Drops every queued utterance and stops the one being spoken."""
+        while True:
+            try:
+                _, _, utterance = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if utterance is self._STOP:
+                self._queue.put((float("inf"), next(self._counter), utterance))
+                break
+            utterance.cancelled = True
+            utterance.done.set()
+        if self._current is not None and self.engine is not None:
+            try:
+                self.engine.stop()
+            except Exception as e:
+                logging.warning(f"Could not interrupt the speech engine: {e}")
+
+    def shutdown(self, timeout=None):
+        """Speaks whatever is queued, then stops the worker thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put((float("inf"), next(self._counter), self._STOP))
+            self._thread.join(timeout)
+
+
+_default_service = None
+_default_service_lock = threading.Lock()
+
+def get_speech_service():
+    """Returns the process-wide SpeechService, creating it on first use."""
+    global _default_service
+    with _default_service_lock:
+        if _default_service is None:
+            _default_service = SpeechService()
+        return _default_service
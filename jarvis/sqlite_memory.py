@@ -0,0 +1,328 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from jarvis.metrics import metrics
+from jarvis.exporter import export_to_path, to_timestamp
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(
+    content, content='turns', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS turns_ai AFTER INSERT ON turns BEGIN
+    INSERT INTO turns_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS turns_ad AFTER DELETE ON turns BEGIN
+    INSERT INTO turns_fts (turns_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+class ConversationDatabase:
+    """
+    A SQLite database of conversation turns with a full-text (FTS5) index.
+
+    The database runs in WAL mode so searches never block writers. One
+    instance can be shared by many sessions and threads.
+    """
+    def __init__(self, db_path="jarvis/conversations.sqlite3"):
+        """
+        Args:
+            db_path (str): Path to the SQLite file, or ":memory:".
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path) if db_path != ":memory:" else ""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def memory(self, session_id="default"):
+        """Returns a SQLiteMemory for a session (usable as a SessionManager memory_factory)."""
+        return SQLiteMemory(database=self, session_id=session_id)
+
+    def insert(self, session_id, role, content, created_at=None):
+        """Stores a turn and returns its row ID."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO turns (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, role, content, created_at or time.time()),
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def insert_many(self, rows):
+        """Stores many (session_id, role, content, created_at) turns in one transaction."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO turns (session_id, role, content, created_at) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def turns(self, session_id):
+        """Returns (role, content, created_at) tuples of a session, oldest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT role, content, created_at FROM turns WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+
+    def iter_turns(self, session_id=None, since=None, until=None, batch_size=500):
+        """
+        Yields turns for export, grouped by session and oldest first.
+
+        Rows are read in batches by keyset pagination, so a large database is
+        streamed without holding the lock (or every row) for the whole export.
+
+        Args:
+            session_id (str): Only this session; None for every session.
+            since: Only turns from this date or time on (see exporter.to_timestamp).
+            until: Only turns up to and including this date, or before this time.
+            batch_size (int): Rows read per query.
+
+        Yields:
+            dict: "role", "content", "created_at" and "session_id".
+        """
+        conditions = []
+        params = []
+        if session_id is not None:
+            conditions.append("session_id = ?")
+            params.append(session_id)
+        start = to_timestamp(since)
+        end = to_timestamp(until, end_of_day=True)
+        if start is not None:
+            conditions.append("created_at >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("created_at < ?")
+            params.append(end)
+        last = ("", 0)
+        while True:
+            where = " AND ".join(conditions + ["(session_id, id) > (?, ?)"])
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, session_id, role, content, created_at FROM turns WHERE {where} "
+                    "ORDER BY session_id, id LIMIT ?", (*params, *last, batch_size)
+                ).fetchall()
+            for row_id, row_session, role, content, created_at in rows:
+                yield {"role": role, "content": content, "created_at": created_at, "session_id": row_session}
+            if len(rows) < batch_size:
+                break
+            last = (rows[-1][1], rows[-1][0])
+
+    def delete_session(self, session_id):
+        """Deletes every turn of a session (the FTS index is updated by a trigger)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    @staticmethod
+    def _match_expression(text, operator=" "):
+        # Quote each word so user input can never be parsed as FTS5 query syntax.
+        words = [word for word in re.findall(r"\w+", text.lower()) if len(word) > 1]
+        return operator.join(f'"{word}"' for word in words)
+
+    def search(self, text, session_id=None, role=None, limit=10):
+        """
+        Full-text search over stored turns, best matches first.
+
+        Turns containing all the words are preferred; if there are none, turns
+        containing any of them are returned.
+
+        Args:
+            text (str): Words to look for.
+            session_id (str): Restrict the search to one session, or None for all.
+            role (str): Restrict the search to 'user' or 'model' turns.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: Dicts with session_id, role, content, created_at and a highlighted snippet.
+        """
+        results = self._search(self._match_expression(text), session_id, role, limit)
+        if not results:
+            results = self._search(self._match_expression(text, " OR "), session_id, role, limit)
+        return results
+
+    def _search(self, expression, session_id, role, limit):
+        if not expression:
+            return []
+        sql = (
+            "SELECT t.session_id, t.role, t.content, t.created_at, "
+            "snippet(turns_fts, 0, '**', '**', '...', 12) "
+            "FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid "
+            "WHERE turns_fts MATCH ?"
+        )
+        params = [expression]
+        if session_id is not None:
+            sql += " AND t.session_id = ?"
+            params.append(session_id)
+        if role is not None:
+            sql += " AND t.role = ?"
+            params.append(role)
+        sql += " ORDER BY bm25(turns_fts) LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {"session_id": row[0], "role": row[1], "content": row[2], "created_at": row[3], "snippet": row[4]}
+            for row in rows
+        ]
+
+    def optimize(self):
+        """Merges the FTS index segments; worth running after bulk imports."""
+        with self._lock:
+            self._conn.execute("INSERT INTO turns_fts (turns_fts) VALUES ('optimize')")
+            self._conn.commit()
+
+
+class SQLiteMemory:
+    """
+    A Memory implementation backed by a ConversationDatabase.
+
+    It exposes the same interface as Memory (`add`, `get_history`,
+    `get_generative_history`, `clear`, ...) plus `search()`. The current
+    session's turns are also kept in memory, so reading the history never
+    touches the database.
+    """
+    def __init__(self, db_path="jarvis/conversations.sqlite3", session_id="default", database=None):
+        """
+        Initializes the SQLiteMemory.
+
+        Args:
+            db_path (str): Path to the SQLite file; ignored if `database` is given.
+            session_id (str): The conversation this memory reads and writes.
+            database (ConversationDatabase): A database shared with other sessions.
+        """
+        self.database = database or ConversationDatabase(db_path)
+        self.session_id = session_id
+        self._lock = threading.RLock()
+        self.history = []
+        self._timestamps = []
+        for role, content, created_at in self.database.turns(session_id):
+            self.history.append({"role": role, "parts": [content]})
+            self._timestamps.append(created_at)
+
+    def add(self, role, message):
+        """
+        Adds a new message to the conversation history and stores it.
+
+        Args:
+            role (str): The role of the speaker ('user' or 'model').
+            message (str): The message content.
+        """
+        ts = time.time()
+        with self._lock, metrics.span("memory.append"):
+            self.database.insert(self.session_id, role, message, ts)
+            self.history.append({"role": role, "parts": [message]})
+            self._timestamps.append(ts)
+
+    async def add_async(self, role, message):
+        """
+        Asynchronous version of `add()`; the database write runs on a worker thread.
+        """
+        await asyncio.to_thread(self.add, role, message)
+
+    def get_history(self):
+        """
+        Returns the conversation history in the UI format ('role' and 'content').
+        """
+        return [
+            {"role": entry["role"], "content": entry["parts"][0] if entry["parts"] else ""}
+            for entry in self.history
+        ]
+
+    def get_generative_history(self):
+        """
+        Returns the raw history in the format expected by the generative AI model.
+        """
+        return self.history
+
+    def clear(self):
+        """
+        Deletes the session's turns from memory and from the database.
+        """
+        with self._lock:
+            self.database.delete_session(self.session_id)
+            self.history = []
+            self._timestamps = []
+
+    async def clear_async(self):
+        """
+        Asynchronous version of `clear()`.
+        """
+        await asyncio.to_thread(self.clear)
+
+    def compact(self):
+        """
+        Optimizes the full-text index.
+        """
+        self.database.optimize()
+
+    def search(self, text, role=None, limit=10, all_sessions=False):
+        """
+        Searches past turns of this session (or of every session) by full text.
+
+        Args:
+            text (str): Words to look for.
+            role (str): Restrict the search to 'user' or 'model' turns.
+            limit (int): Maximum number of results.
+            all_sessions (bool): Search every session instead of only this one.
+
+        Returns:
+            list: Ranked matches, see ConversationDatabase.search.
+        """
+        session_id = None if all_sessions else self.session_id
+        return self.database.search(text, session_id=session_id, role=role, limit=limit)
+
+    def iter_turns(self):
+        """Yields the session's turns for export, oldest first."""
+        with self._lock:
+            entries = list(zip(self.history, self._timestamps))
+        for entry, ts in entries:
+            yield {"role": entry["role"], "content": entry["parts"][0] if entry["parts"] else "",
+                   "created_at": ts, "session_id": self.session_id}
+
+    def export_history(self, path, fmt=None, since=None, until=None, all_sessions=False):
+        """
+        Exports the conversation (or every stored conversation) to a file.
+
+        Args:
+            path (str): The file to write; its extension selects the format if `fmt` is omitted.
+            fmt (str): "json", "jsonl" or "markdown".
+            since: Only export turns from this date or time on.
+            until: Only export turns up to this date or time.
+            all_sessions (bool): Export every session in the database, not only this one.
+
+        Returns:
+            bool: True if the export was written.
+        """
+        if all_sessions:
+            turns = self.database.iter_turns(since=since, until=until)
+            since = until = None
+        else:
+            turns = self.iter_turns()
+        try:
+            export_to_path(turns, path, fmt, since=since, until=until)
+            return True
+        except (IOError, OSError, ValueError) as e:
+            print(f"Error: Could not export history to {path}. Error: {e}")
+            return False
+
+    def get_exported_history_content(self):
+        """
+        Returns the conversation history as a JSON string for export.
+        """
+        return json.dumps(self.get_generative_history(), indent=4)
@@ -0,0 +1,724 @@
+"""
+Speech-to-text backends that transcribe audio as it streams in.
+
+An audio source yields chunks of 16-bit little-endian mono PCM. A backend
+turns the chunks into Hypothesis objects: partial transcripts while a
+phrase is still being spoken, and one final transcript per phrase. Command
+routing can therefore start before the speaker has finished (see
+StreamingListener).
+
+Sources: MicrophoneStream (PyAudio), WavFileSource and RawPCMSource; the
+file sources make voice input testable on a headless machine.
+
+Backends:
+    GoogleBackend   Google Web Speech API through SpeechRecognition. It only
+                    recognizes whole recordings, so phrases are cut by an
+                    endpointer and partial results (optional) re-send the
+                    audio so far.
+    VoskBackend     Offline recognition with a local Vosk/Kaldi model; partial
+                    results come for free.
+
+Usage:
+    backend = VoskBackend("models/vosk-model-small-en-us-0.15")
+    with WavFileSource("command.wav") as source:
+        for hypothesis in backend.stream(source.chunks(), source.sample_rate):
+            print(hypothesis)
+"""
+import array
+import json
+import logging
+import math
+import queue
+import sys
+import threading
+import time
+import wave
+from jarvis.command_router import WORD_PATTERN
+from jarvis.intent_classifier import FILLER_WORDS, QUESTION_WORDS
+from jarvis.lazy_import import lazy_import
+from jarvis.metrics import metrics
+from jarvis.vad import VADEndpointer, np
+
+sr = lazy_import("speech_recognition")
+pyaudio = lazy_import("pyaudio")
+vosk = lazy_import("vosk")
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+class Hypothesis:
+    """
+    A transcript of the phrase being spoken.
+    """
+    def __init__(self, text, final, audio_seconds):
+        """
+        Args:
+            text (str): The (lower-cased) transcript so far.
+            final (bool): True once the phrase has ended and the text will not change.
+            audio_seconds (float): Position in the audio stream when the hypothesis was made.
+        """
+        self.text = text
+        self.final = final
+        self.audio_seconds = audio_seconds
+
+    def __repr__(self):
+        kind = "final" if self.final else "partial"
+        return f"Hypothesis({kind}, {self.text!r}, at {self.audio_seconds:.2f} s)"
+
+
+def pcm_seconds(pcm, sample_rate):
+    """Returns the duration of 16-bit mono PCM audio."""
+    return len(pcm) / (SAMPLE_WIDTH * sample_rate)
+
+def pcm_rms(pcm):
+    """Returns the root-mean-square amplitude of 16-bit little-endian PCM audio."""
+    samples = array.array("h", pcm[:len(pcm) - len(pcm) % SAMPLE_WIDTH])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+
+# --- Audio sources ---
+
+class _FileSource:
+    """Base class of the file sources: yields fixed-size chunks, optionally in real time."""
+    def __init__(self, chunk_ms=100, realtime=False):
+        self.chunk_ms = chunk_ms
+        self.realtime = realtime
+        self.sample_rate = SAMPLE_RATE
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        pass
+
+    def _read(self, frames):
+        raise NotImplementedError
+
+    def chunks(self):
+        """
+        Yields:
+            bytes: Consecutive chunks of 16-bit mono PCM, `chunk_ms` long (the last may be shorter).
+        """
+        frames = max(1, self.sample_rate * self.chunk_ms // 1000)
+        start = time.monotonic()
+        position = 0.0
+        while True:
+            chunk = self._read(frames)
+            if not chunk:
+                return
+            position += pcm_seconds(chunk, self.sample_rate)
+            if self.realtime:
+                # Deliver the audio no faster than it would be spoken.
+                delay = start + position - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            yield chunk
+
+
+class WavFileSource(_FileSource):
+    """
+    Reads a 16-bit PCM WAV file. Multi-channel files are reduced to their first channel.
+    """
+    def __init__(self, path, chunk_ms=100, realtime=False):
+        """
+        Args:
+            path: The WAV file path or an open binary file.
+            chunk_ms (int): Length of each chunk in milliseconds.
+            realtime (bool): Deliver chunks at the speed of speech, like a microphone.
+        """
+        super().__init__(chunk_ms, realtime)
+        self._wav = wave.open(path, "rb")
+        if self._wav.getsampwidth() != SAMPLE_WIDTH:
+            width = self._wav.getsampwidth()
+            self._wav.close()
+            raise ValueError(f"Only 16-bit WAV files are supported, not {8 * width}-bit")
+        self.channels = self._wav.getnchannels()
+        self.sample_rate = self._wav.getframerate()
+
+    def _read(self, frames):
+        data = self._wav.readframes(frames)
+        if self.channels == 1 or not data:
+            return data
+        samples = array.array("h", data)
+        return samples[::self.channels].tobytes()
+
+    def close(self):
+        self._wav.close()
+
+
+class RawPCMSource(_FileSource):
+    """
+    Reads headerless 16-bit little-endian mono PCM from a file or a bytes object.
+    """
+    def __init__(self, path_or_bytes, sample_rate=SAMPLE_RATE, chunk_ms=100, realtime=False):
+        """
+        Args:
+            path_or_bytes: The file path, or the audio itself as bytes.
+            sample_rate (int): Samples per second of the audio.
+            chunk_ms (int): Length of each chunk in milliseconds.
+            realtime (bool): Deliver chunks at the speed of speech, like a microphone.
+        """
+        super().__init__(chunk_ms, realtime)
+        self.sample_rate = sample_rate
+        if isinstance(path_or_bytes, (bytes, bytearray, memoryview)):
+            self._data = memoryview(path_or_bytes)
+            self._file = None
+        else:
+            self._data = None
+            self._file = open(path_or_bytes, "rb")
+        self._position = 0
+
+    def _read(self, frames):
+        size = frames * SAMPLE_WIDTH
+        if self._file is not None:
+            return self._file.read(size)
+        chunk = bytes(self._data[self._position:self._position + size])
+        self._position += len(chunk)
+        return chunk
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class MicrophoneStream:
+    """
+    Streams 16-bit mono PCM from the default microphone with PyAudio.
+    """
+    def __init__(self, sample_rate=SAMPLE_RATE, chunk_ms=100, device_index=None):
+        """
+        Args:
+            sample_rate (int): Samples per second to record.
+            chunk_ms (int): Length of each chunk in milliseconds.
+            device_index (int): PyAudio input device, or None for the default one.
+        """
+        self.sample_rate = sample_rate
+        self.chunk_ms = chunk_ms
+        self.device_index = device_index
+        self._audio = None
+        self._stream = None
+        self._closed = threading.Event()
+
+    def __enter__(self):
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16, channels=1, rate=self.sample_rate, input=True,
+            input_device_index=self.device_index, frames_per_buffer=self.sample_rate * self.chunk_ms // 1000,
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._closed.set()
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+    def chunks(self):
+        """
+        Yields:
+            bytes: Chunks of 16-bit mono PCM until the stream is closed.
+        """
+        frames = self.sample_rate * self.chunk_ms // 1000
+        while not self._closed.is_set() and self._stream is not None:
+            yield self._stream.read(frames, exception_on_overflow=False)
+
+
+# --- Endpointing ---
+
+class EnergyEndpointer:
+    """
+    Splits a PCM stream into phrases by loudness: a phrase starts with a
+    chunk louder than `threshold` and ends after `silence_seconds` of quiet
+    chunks, or when it reaches `max_phrase_seconds`.
+    """
+    def __init__(self, threshold=300, silence_seconds=0.8, max_phrase_seconds=10.0):
+        """
+        Args:
+            threshold (float): RMS amplitude above which a chunk counts as speech.
+            silence_seconds (float): Quiet time that ends a phrase.
+            max_phrase_seconds (float): A phrase is cut off at this length.
+        """
+        self.threshold = threshold
+        self.silence_seconds = silence_seconds
+        self.max_phrase_seconds = max_phrase_seconds
+        self.reset()
+
+    def reset(self):
+        """Forgets the current phrase."""
+        self.in_phrase = False
+        self._silence = 0.0
+        self._length = 0.0
+
+    def feed(self, chunk, sample_rate):
+        """
+        Classifies the next chunk.
+
+        Returns:
+            tuple: (in_phrase, ended). `in_phrase` is True if the chunk belongs to a
+                   phrase; `ended` is True if the phrase ends with this chunk.
+        """
+        seconds = pcm_seconds(chunk, sample_rate)
+        voiced = pcm_rms(chunk) >= self.threshold
+        if not self.in_phrase:
+            if not voiced:
+                return False, False
+            self.in_phrase = True
+            self._silence = self._length = 0.0
+        self._length += seconds
+        self._silence = 0.0 if voiced else self._silence + seconds
+        if self._silence >= self.silence_seconds or self._length >= self.max_phrase_seconds:
+            self.reset()
+            return True, True
+        return True, False
+
+    def trim(self, phrase, sample_rate):
+        """Returns the whole phrase; this endpointer does not locate the speech within it."""
+        return memoryview(phrase)
+
+
+# --- Backends ---
+
+class STTBackend:
+    """
+    The interface for speech-to-text backends.
+
+    Subclasses implement `stream()`, which consumes PCM chunks and yields
+    Hypothesis objects: any number of partial ones while a phrase is being
+    spoken (repeated unchanged while the speaker pauses), then a final one
+    when it ends (with empty text if nothing was understood).
+    """
+    name = None
+
+    def stream(self, chunks, sample_rate=SAMPLE_RATE):
+        """
+        Transcribes an audio stream as it arrives.
+
+        Args:
+            chunks (iterable): 16-bit little-endian mono PCM chunks.
+            sample_rate (int): Samples per second of the audio.
+
+        Yields:
+            Hypothesis: Partial and final transcripts, in order.
+        """
+        raise NotImplementedError
+
+    def transcribe(self, pcm, sample_rate=SAMPLE_RATE):
+        """
+        Transcribes a complete recording.
+
+        Returns:
+            str: The final transcripts of all its phrases, joined by spaces.
+        """
+        chunk = sample_rate * SAMPLE_WIDTH // 10
+        chunks = (pcm[i:i + chunk] for i in range(0, len(pcm), chunk))
+        return " ".join(h.text for h in self.stream(chunks, sample_rate) if h.final and h.text)
+
+
+class BufferedBackend(STTBackend):
+    """
+    Base class for recognizers that only accept complete recordings.
+
+    Phrases are cut by an endpointer and recognized when they end, without
+    the silence around them. With a `partial_interval`, the phrase so far is
+    also recognized every that many seconds of audio, which gives partial
+    results at the price of extra recognition requests.
+    """
+    def __init__(self, endpointer=None, partial_interval=None):
+        """
+        Args:
+            endpointer: Splits the stream into phrases. Must provide `feed(chunk, sample_rate)`,
+                        `reset()` and `trim(phrase, sample_rate)`. Defaults to a VADEndpointer,
+                        or an EnergyEndpointer if NumPy is not installed.
+            partial_interval (float): Seconds of speech between partial results, or None.
+        """
+        self.endpointer = endpointer or (VADEndpointer() if np.available else EnergyEndpointer())
+        self.partial_interval = partial_interval
+
+    def recognize(self, pcm, sample_rate, final):
+        """
+        Recognizes a phrase, or the beginning of one when `final` is False.
+
+        Args:
+            pcm (memoryview): The voiced audio of the phrase.
+
+        Returns:
+            str: The transcript, or "" if nothing was understood.
+        """
+        raise NotImplementedError
+
+    def _recognize(self, phrase, sample_rate, final):
+        audio = self.endpointer.trim(phrase, sample_rate)
+        try:
+            if not len(audio):
+                return ""
+            with metrics.span("stt.recognize" if final else "stt.partial"):
+                return (self.recognize(audio, sample_rate, final) or "").lower()
+        except Exception as e:
+            logging.error(f"{self.name} speech recognition failed: {e}")
+            return ""
+        finally:
+            # The phrase buffer cannot be cleared while a view on it exists.
+            audio.release()
+
+    def stream(self, chunks, sample_rate=SAMPLE_RATE):
+        self.endpointer.reset()
+        phrase = bytearray()
+        position = 0.0
+        next_partial = self.partial_interval
+        for chunk in chunks:
+            position += pcm_seconds(chunk, sample_rate)
+            in_phrase, ended = self.endpointer.feed(chunk, sample_rate)
+            if not in_phrase:
+                continue
+            phrase += chunk
+            if ended:
+                yield Hypothesis(self._recognize(phrase, sample_rate, final=True), True, position)
+                phrase.clear()
+                next_partial = self.partial_interval
+            elif next_partial is not None and pcm_seconds(phrase, sample_rate) >= next_partial:
+                next_partial += self.partial_interval
+                text = self._recognize(phrase, sample_rate, final=False)
+                if text:
+                    yield Hypothesis(text, False, position)
+        if phrase:
+            # The stream ended in the middle of a phrase.
+            yield Hypothesis(self._recognize(phrase, sample_rate, final=True), True, position)
+
+
+class GoogleBackend(BufferedBackend):
+    """
+    Recognizes phrases with the Google Web Speech API (`recognize_google`).
+    """
+    name = "google"
+
+    def __init__(self, language="en-in", recognizer=None, endpointer=None, partial_interval=None):
+        """
+        Args:
+            language (str): Language code of the speech.
+            recognizer (sr.Recognizer): The recognizer to use. A default one is created if omitted.
+            endpointer: Splits the stream into phrases; a VADEndpointer by default.
+            partial_interval (float): Seconds of speech between partial results, or None
+                                      for final results only (one request per phrase).
+        """
+        super().__init__(endpointer, partial_interval)
+        self.language = language
+        self._recognizer = recognizer
+
+    @property
+    def recognizer(self):
+        if self._recognizer is None:
+            self._recognizer = sr.Recognizer()
+        return self._recognizer
+
+    def recognize(self, pcm, sample_rate, final):
+        try:
+            audio = sr.AudioData(pcm.tobytes(), sample_rate, SAMPLE_WIDTH)
+            return self.recognizer.recognize_google(audio, language=self.language)
+        except sr.UnknownValueError:
+            return ""
+
+
+class VoskBackend(STTBackend):
+    """
+    Offline recognition with a local Vosk model. Vosk detects the end of
+    each phrase itself and reports partial results after every chunk.
+    """
+    name = "vosk"
+    _models = {}
+    _models_lock = threading.Lock()
+
+    def __init__(self, model_path=None, language="en-us"):
+        """
+        Args:
+            model_path (str): Directory of an unpacked Vosk model. If omitted, Vosk's
+                              small model for `language` is downloaded and cached.
+            language (str): Language of the model to download when no path is given.
+        """
+        self.model_path = model_path
+        self.language = language
+
+    @classmethod
+    def available(cls):
+        """True if the vosk package is installed; checked without importing it."""
+        return vosk.available
+
+    @property
+    def model(self):
+        """The loaded model, shared by every backend using the same path."""
+        key = self.model_path or self.language
+        with self._models_lock:
+            if key not in self._models:
+                with metrics.span("stt.load_model"):
+                    vosk.SetLogLevel(-1)
+                    self._models[key] = vosk.Model(self.model_path) if self.model_path else vosk.Model(lang=self.language)
+            return self._models[key]
+
+    def stream(self, chunks, sample_rate=SAMPLE_RATE):
+        recognizer = vosk.KaldiRecognizer(self.model, sample_rate)
+        position = 0.0
+        for chunk in chunks:
+            position += pcm_seconds(chunk, sample_rate)
+            if recognizer.AcceptWaveform(chunk):
+                yield Hypothesis(json.loads(recognizer.Result()).get("text", ""), True, position)
+            else:
+                text = json.loads(recognizer.PartialResult()).get("partial", "")
+                if text:
+                    yield Hypothesis(text, False, position)
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        if text:
+            yield Hypothesis(text, True, position)
+
+
+def create_backend(name, language=None, model_path=None):
+    """
+    Returns the backend with the given name.
+
+    Args:
+        name (str): "google" or "vosk".
+        language (str): Language code, if not the backend's default.
+        model_path (str): Vosk model directory.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if name == "google":
+        return GoogleBackend(language=language or "en-in")
+    if name == "vosk":
+        return VoskBackend(model_path=model_path, language=language or "en-us")
+    raise ValueError(f"Unknown speech-to-text backend {name!r}; expected 'google' or 'vosk'")
+
+def audio_file_source(path, realtime=False, sample_rate=SAMPLE_RATE):
+    """Returns a WavFileSource for .wav files and a RawPCMSource (at `sample_rate`) otherwise."""
+    if path.lower().endswith(".wav"):
+        return WavFileSource(path, realtime=realtime)
+    return RawPCMSource(path, sample_rate=sample_rate, realtime=realtime)
+
+
+def _whole_command(router, text, eligible):
+    """Returns the command a transcript consists of (apart from filler words), or None."""
+    match = router.match(text)
+    if match is None or match.name not in eligible:
+        return None
+    outside = WORD_PATTERN.findall(match.before) + WORD_PATTERN.findall(match.rest)
+    if any(word not in FILLER_WORDS and word not in QUESTION_WORDS for word in outside):
+        return None
+    return match.name
+
+
+def deliver_phrases(hypotheses, router=None, stable_partials=2):
+    """
+    Picks the transcript to act on for each phrase.
+
+    Normally that is the final transcript. With a CommandRouter, a partial
+    transcript is taken instead once `stable_partials` partials in a row
+    have consisted of the same command and nothing else ("what time is
+    it"), so the command can run before the speaker has stopped. A partial
+    that merely contains a command ("what time does the pharmacy ...") does
+    not count. Commands that take free text (slot commands, such as "search
+    wikipedia for ...") or act on the system (`side_effects`, such as "stop
+    the music") always wait for the final transcript. If the speaker goes
+    on after an early delivery and the final transcript is no longer that
+    command, the final transcript is delivered as well.
+
+    Args:
+        hypotheses (iterable): Hypothesis objects from `STTBackend.stream()`.
+        router (CommandRouter): Enables early delivery of matched commands.
+        stable_partials (int): Matching partials needed for early delivery.
+
+    Yields:
+        tuple: (Hypothesis, early). Usually one per phrase; phrases with an empty
+               final transcript are skipped.
+    """
+    eligible = set()
+    if router is not None:
+        eligible = {entry["name"] for entry in router.catalogue()
+                    if not entry["slot"] and not entry.get("side_effects")}
+    command, streak = None, 0
+    delivered = None
+    for hypothesis in hypotheses:
+        if hypothesis.final:
+            if hypothesis.text and (delivered is None or _whole_command(router, hypothesis.text, eligible) != delivered):
+                yield hypothesis, False
+            command, streak, delivered = None, 0, None
+        elif router is not None and delivered is None:
+            name = _whole_command(router, hypothesis.text, eligible)
+            if name is None:
+                command, streak = None, 0
+                continue
+            streak = streak + 1 if name == command else 1
+            command = name
+            if streak >= stable_partials:
+                delivered = name
+                yield hypothesis, True
+
+
+# --- Listener ---
+
+class StreamingListener:
+    """
+    Runs an STTBackend on an audio source in the background and delivers
+    phrases through a queue, like BackgroundListener. Capture and
+    recognition run on separate threads, so no audio is lost while a phrase
+    is being recognized. With a CommandRouter, matched commands are
+    delivered from partial transcripts (see `deliver_phrases`).
+    """
+    _EOF = object()
+
+    def __init__(self, backend, source_factory=MicrophoneStream, router=None, stable_partials=2, max_pending=8,
+                 max_buffered_seconds=30):
+        """
+        Initializes the StreamingListener.
+
+        Args:
+            backend (STTBackend): Transcribes the audio.
+            source_factory (callable): Returns an audio source, e.g. `MicrophoneStream`
+                                       or `lambda: WavFileSource(path, realtime=True)`.
+            router (CommandRouter): Enables early delivery of matched commands.
+            stable_partials (int): Consecutive partial transcripts that must match the
+                                   same command before it is delivered early.
+            max_pending (int): Maximum number of recognized phrases waiting in the queue.
+            max_buffered_seconds (float): Audio that may wait for recognition (at 100 ms
+                                          chunks) before capture blocks.
+        """
+        self.backend = backend
+        self.source_factory = source_factory
+        self.router = router
+        self.stable_partials = stable_partials
+        self.early_deliveries = 0
+        self._audio = queue.Queue(maxsize=int(max_buffered_seconds * 10))
+        self._phrases = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._paused = threading.Event()
+        self._finished = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the capture and recognition threads."""
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        self._finished.clear()
+        self._thread = threading.Thread(target=self._run, name="jarvis-stt", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stops listening and waits for the worker threads to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def pause(self):
+        """Discards recognized phrases until `resume()` is called, e.g. while JARVIS is speaking."""
+        self._paused.set()
+
+    def resume(self):
+        """Resumes delivering recognized phrases."""
+        self._paused.clear()
+
+    def _capture(self, source):
+        try:
+            for chunk in source.chunks():
+                if self._stop.is_set():
+                    break
+                self._put(self._audio, chunk)
+        except Exception as e:
+            logging.error(f"Streaming listener capture error: {e}")
+        finally:
+            self._put(self._audio, self._EOF, force=True)
+
+    def _captured_chunks(self):
+        while not self._stop.is_set():
+            try:
+                chunk = self._audio.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if chunk is self._EOF:
+                return
+            yield chunk
+
+    def _run(self):
+        try:
+            with self.source_factory() as source:
+                # Audio keeps being captured while a phrase is being recognized.
+                capture = threading.Thread(target=self._capture, args=(source,), name="jarvis-stt-capture", daemon=True)
+                capture.start()
+                try:
+                    hypotheses = self.backend.stream(self._captured_chunks(), source.sample_rate)
+                    for hypothesis, early in deliver_phrases(hypotheses, self.router, self.stable_partials):
+                        self.early_deliveries += early
+                        self._deliver(hypothesis.text)
+                finally:
+                    self._stop.set()
+                    capture.join()
+        except Exception as e:
+            logging.error(f"Streaming listener error: {e}")
+        finally:
+            self._finished.set()
+
+    def _deliver(self, text):
+        if self._paused.is_set():
+            return
+        logging.info(f"User said: {text}")
+        self._put(self._phrases, text.lower())
+
+    def _put(self, target, item, force=False):
+        # Wait for room, but never block forever once the listener is stopping.
+        while force or not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if force and self._stop.is_set():
+                    return
+
+    def get(self, timeout=None):
+        """
+        Returns the next recognized phrase.
+
+        Args:
+            timeout (float): Seconds to wait; None waits until a phrase arrives or
+                             the source is exhausted.
+
+        Returns:
+            str: The lower-cased phrase, or "" if nothing arrived in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if remaining <= 0:
+                return ""
+            try:
+                return self._phrases.get(timeout=remaining)
+            except queue.Empty:
+                if self._finished.is_set() and self._phrases.empty():
+                    return ""
+
+    def drain(self):
+        """Discards every phrase recognized so far and returns them."""
+        phrases = []
+        while True:
+            try:
+                phrases.append(self._phrases.get_nowait())
+            except queue.Empty:
+                return phrases
+
+    @property
+    def exhausted(self):
+        """True once the source has been fully read and recognized."""
+        return self._finished.is_set() and self._phrases.empty()
@@ -0,0 +1,214 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+class _Pending:
+    """A load or synthesis in progress, shared by every thread asking for the same key."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.audio = None
+
+class TTSCache:
+    """
+    A content-addressed cache of synthesized speech.
+
+    Audio is keyed by a hash of (text, accent, language) and kept both in
+    memory and on disk, each with its own total-size cap and LRU eviction.
+    Concurrent requests for the same audio wait for a single synthesis, so
+    the same text is never synthesized twice while it is cached.
+    """
+    def __init__(self, cache_dir="jarvis/tts_cache", max_disk_bytes=50 * 1024 * 1024,
+                 max_memory_bytes=8 * 1024 * 1024, synthesizer=None):
+        """
+        Initializes the TTSCache.
+
+        Args:
+            cache_dir (str): Directory holding the cached MP3 files.
+            max_disk_bytes (int): Total size cap for the files on disk.
+            max_memory_bytes (int): Total size cap for audio kept in memory.
+            synthesizer (callable): `synthesizer(text, accent, lang)` returning MP3 bytes.
+                                    Defaults to gTTS.
+        """
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        if synthesizer is None:
+            from jarvis.voice_io import synthesize_mp3
+            synthesizer = synthesize_mp3
+        self.synthesizer = synthesizer
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan_disk()
+
+    def _scan_disk(self):
+        """Indexes the files already on disk, oldest first."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    @staticmethod
+    def key(text, accent="com", lang="en"):
+        """Returns the content hash used as cache key."""
+        return hashlib.sha256(f"{lang}\0{accent}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def get_audio(self, text, accent="com", lang="en"):
+        """
+        Returns the MP3 audio for a text, synthesizing it only if it is not cached.
+
+        Args:
+            text (str): The text to speak.
+            accent (str): The gTTS top-level domain that selects the accent.
+            lang (str): The language code.
+
+        Returns:
+            bytes: The MP3 audio, or None if synthesis failed.
+        """
+        key = self.key(text, accent, lang)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._touch(key)
+                self.hits += 1
+                return audio
+            # Only one thread loads or synthesizes a given key; the others wait for it.
+            # That is what lets the file I/O below run without holding the lock.
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = _Pending()
+                on_disk = key in self._disk
+
+        if not owner:
+            pending.done.wait()
+            if pending.audio is not None:
+                with self._lock:
+                    self.hits += 1
+            return pending.audio
+
+        audio = None
+        try:
+            if on_disk:
+                audio = self._read(key)
+            if audio is not None:
+                with self._lock:
+                    self.hits += 1
+            else:
+                with self._lock:
+                    self.misses += 1
+                audio = self._synthesize(key, text, accent, lang)
+        finally:
+            pending.audio = audio
+            with self._lock:
+                del self._inflight[key]
+            pending.done.set()
+        return audio
+
+    def get_path(self, text, accent="com", lang="en"):
+        """
+        Returns the path of the cached MP3 file for a text, synthesizing it if needed.
+        Every distinct text gets its own file, so concurrent sessions never overwrite
+        each other's audio.
+        """
+        if self.get_audio(text, accent, lang) is None:
+            return None
+        path = self._path(self.key(text, accent, lang))
+        return path if os.path.exists(path) else None
+
+    def _touch(self, key):
+        """Marks a key as recently used. Must be called with the lock held."""
+        self._memory.move_to_end(key)
+        if key in self._disk:
+            self._disk.move_to_end(key)
+
+    def _read(self, key):
+        """Loads cached audio from disk, or returns None if the file is gone."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                if key in self._disk:
+                    self._disk_bytes -= self._disk.pop(key)
+            return None
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._remember(key, audio)
+        return audio
+
+    def _synthesize(self, key, text, accent, lang):
+        """Synthesizes audio and writes it to disk and memory."""
+        try:
+            audio = self.synthesizer(text, accent, lang)
+        except Exception as e:
+            logging.error(f"Error synthesizing audio: {e}")
+            return None
+        if not audio:
+            return None
+        tmp_path = self._path(key) + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, self._path(key))
+            written = True
+        except OSError as e:
+            logging.error(f"Could not write audio cache file: {e}")
+            written = False
+        evicted = []
+        with self._lock:
+            self._remember(key, audio)
+            if written:
+                self._disk[key] = len(audio)
+                self._disk_bytes += len(audio)
+                while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+                    old, size = self._disk.popitem(last=False)
+                    self._disk_bytes -= size
+                    evicted.append(old)
+        for old in evicted:
+            try:
+                os.remove(self._path(old))
+            except OSError:
+                pass
+        return audio
+
+    def _remember(self, key, audio):
+        """Keeps audio in memory, evicting the least recently used entries. Must be called with the lock held."""
+        if len(audio) > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old)
+
+    def stats(self):
+        """Returns the hit/miss counters and the current cache sizes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "disk_entries": len(self._disk),
+            }
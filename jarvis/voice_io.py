@@ -1,29 +1,47 @@
-import speech_recognition as sr
-import pyttsx3
 import logging
-from gtts import gTTS
+import io
 import os
+from jarvis.lazy_import import lazy_import
+from jarvis.metrics import metrics
+from jarvis.speech_service import get_speech_service, PRIORITY_NORMAL
+from jarvis.stt import GoogleBackend, MicrophoneStream, pcm_seconds
+from jarvis.vad import np
 
-def speak(text):
+sr = lazy_import("speech_recognition")
+gtts = lazy_import("gtts")
+
+def speak(text, block=True, priority=PRIORITY_NORMAL, interrupt=False):
     """
-    Converts text to speech directly using pyttsx3 (for CLI mode).
+    Converts text to speech using the shared pyttsx3 speech service (for CLI mode).
+
+    Args:
+        text (str): The text to speak.
+        block (bool): Wait until the text has been spoken.
+        priority (int): Lower values are spoken first.
+        interrupt (bool): Stop whatever is currently being spoken first.
+
+    Returns:
+        Utterance: Handle that can be waited on when `block` is False.
     """
-    try:
-        engine = pyttsx3.init()
-        engine.setProperty('rate', 180)
-        voices = engine.getProperty("voices")
-        if len(voices) > 7:
-            engine.setProperty('voice', voices[7].id)
-        else:
-            engine.setProperty('voice', voices[0].id)
-        
-        logging.info(f"Speaking: {text}")
-        engine.say(text)
-        engine.runAndWait()
-        engine.stop()
-    except Exception as e:
-        logging.error(f"Error in pyttsx3 speak function: {e}")
-        print(f"ERROR: Could not speak the text. Check system TTS config. Details: {e}")
+    return get_speech_service().say(text, priority=priority, block=block, interrupt=interrupt)
+
+def synthesize_mp3(text, accent='com', lang='en'):
+    """
+    Converts text to MP3 audio in memory using Google Text-to-Speech (gTTS).
+
+    Args:
+        text (str): The text to convert.
+        accent (str): The top-level domain for the Google Translate host,
+                      which determines the accent (e.g., 'com', 'co.uk').
+        lang (str): The language code.
+
+    Returns:
+        bytes: The MP3 audio.
+    """
+    buffer = io.BytesIO()
+    with metrics.span("tts.synthesize"):
+        gtts.gTTS(text=text, lang=lang, tld=accent, slow=False).write_to_fp(buffer)
+    return buffer.getvalue()
 
 def text_to_audio_file(text, accent='com', filename="temp_audio.mp3"):
     """
@@ -39,17 +57,78 @@ def text_to_audio_file(text, accent='com', filename="temp_audio.mp3"):
         str: The path to the generated audio file.
     """
     try:
-        tts = gTTS(text=text, lang='en', tld=accent, slow=False)
-        tts.save(filename)
+        audio = synthesize_mp3(text, accent=accent)
+        with open(filename, 'wb') as f:
+            f.write(audio)
         return filename
     except Exception as e:
         logging.error(f"Error generating audio file with gTTS: {e}")
         return None
 
-def take_command():
+def voice_input_available():
+    """
+    Returns True if the speech recognition and microphone libraries are installed.
+    Checked without importing them.
+    """
+    return sr.available and lazy_import("pyaudio").available
+
+def _until_timeout(chunks, sample_rate, endpointer, timeout):
+    """Stops a chunk stream if no phrase has started within `timeout` seconds."""
+    waited = 0.0
+    for chunk in chunks:
+        if endpointer is not None and not endpointer.in_phrase:
+            waited += pcm_seconds(chunk, sample_rate)
+            if waited > timeout:
+                print("No speech detected within the time limit.")
+                return
+        yield chunk
+
+def take_command(listener=None, backend=None, source=None, timeout=5):
     """
     Listens for microphone input and converts it to text.
+
+    Without a listener or backend, Google recognition is used with the NumPy
+    voice-activity detector when available: only the speech is uploaded,
+    and the phrase ends after a short adaptive pause rather than a second.
+
+    Args:
+        listener (BackgroundListener): If given, the next phrase captured by this
+                                       continuously running listener is returned
+                                       instead of opening the microphone.
+        backend (STTBackend): If given, the first phrase this backend recognizes
+                              in `source` is returned.
+        source: Audio source for `backend`, e.g. a WavFileSource. Defaults to the microphone.
+        timeout (float): Seconds to wait for speech to start.
     """
+    if listener is not None:
+        print("\nListening for voice command...")
+        query = listener.get()
+        if query:
+            print(f"User said: {query}")
+        return query
+
+    if backend is None and source is None and voice_input_available() and np.available:
+        backend = GoogleBackend()
+
+    if backend is not None:
+        print("\nListening for voice command...")
+        with source or MicrophoneStream() as stream:
+            chunks = _until_timeout(stream.chunks(), stream.sample_rate, getattr(backend, "endpointer", None), timeout)
+            for hypothesis in backend.stream(chunks, stream.sample_rate):
+                if not hypothesis.final:
+                    continue
+                if not hypothesis.text:
+                    print("Sorry, I could not understand the audio.")
+                    return ""
+                print(f"User said: {hypothesis.text}")
+                logging.info(f"User said: {hypothesis.text}")
+                return hypothesis.text.lower()
+        return ""
+
+    if not voice_input_available():
+        print("Voice input is unavailable: install SpeechRecognition and PyAudio.")
+        return ""
+
     r = sr.Recognizer()
     with sr.Microphone() as source:
         print("\nListening for voice command...")
@@ -58,14 +137,15 @@ def take_command():
         r.adjust_for_ambient_noise(source, duration=1)
         
         try:
-            audio = r.listen(source, timeout=5, phrase_time_limit=10)
+            audio = r.listen(source, timeout=timeout, phrase_time_limit=10)
         except sr.WaitTimeoutError:
             print("No speech detected within the time limit.")
             return ""
 
     try:
         print("Recognizing...")
-        query = r.recognize_google(audio, language='en-in')
+        with metrics.span("stt.recognize"):
+            query = r.recognize_google(audio, language='en-in')
         print(f"User said: {query}")
         logging.info(f"User said: {query}")
         return query.lower()
@@ -0,0 +1,107 @@
+import re
+import logging
+from jarvis.cache import PersistentCache
+from jarvis.lazy_import import lazy_import
+
+wikipedia = lazy_import("wikipedia")
+
+class PageNotFound(Exception):
+    """Raised when Wikipedia has no page for a query."""
+
+class AmbiguousQuery(Exception):
+    """Raised when a query matches several Wikipedia pages."""
+
+
+def wikipedia_fetcher(query, sentences=2):
+    """
+    Fetches a summary from Wikipedia, translating the library's exceptions.
+
+    Args:
+        query (str): The search query.
+        sentences (int): Number of sentences in the summary.
+
+    Returns:
+        str: The page summary.
+    """
+    try:
+        return wikipedia.summary(query, sentences=sentences)
+    except wikipedia.exceptions.PageError as e:
+        raise PageNotFound(query) from e
+    except wikipedia.exceptions.DisambiguationError as e:
+        raise AmbiguousQuery(query) from e
+
+
+class WikipediaSearch:
+    """
+    Looks up Wikipedia summaries through a persistent LRU/TTL cache.
+
+    Both successful summaries and negative results (missing or ambiguous
+    pages) are cached, so repeated queries never hit the network again until
+    they expire.
+    """
+    def __init__(self, cache=None, fetcher=None, sentences=2, negative_ttl=24 * 3600):
+        """
+        Initializes the WikipediaSearch.
+
+        Args:
+            cache (PersistentCache): Cache for results. Defaults to a file next to
+                                     the conversation history.
+            fetcher (callable): `fetcher(query, sentences)` returning a summary or raising
+                                PageNotFound / AmbiguousQuery. Defaults to the live API.
+            sentences (int): Number of sentences per summary.
+            negative_ttl (float): Time-to-live in seconds for negative results.
+        """
+        if cache is None:
+            cache = PersistentCache("jarvis/wikipedia_cache.sqlite3", max_entries=500, ttl=7 * 24 * 3600)
+        self.cache = cache
+        self.fetcher = fetcher or wikipedia_fetcher
+        self.sentences = sentences
+        self.negative_ttl = negative_ttl
+
+    @staticmethod
+    def normalize(query):
+        """Normalizes a query so trivially different spellings share a cache entry."""
+        return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+    def summary(self, query):
+        """
+        Returns the Wikipedia summary for a query.
+
+        Args:
+            query (str): The search query.
+
+        Returns:
+            str: The page summary.
+
+        Raises:
+            PageNotFound: If no page matches (possibly from the cache).
+            AmbiguousQuery: If several pages match (possibly from the cache).
+        """
+        key = f"{self.sentences}:{self.normalize(query)}"
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = self._fetch(query, key)
+
+        if cached["status"] == "not_found":
+            raise PageNotFound(query)
+        if cached["status"] == "ambiguous":
+            raise AmbiguousQuery(query)
+        return cached["text"]
+
+    def _fetch(self, query, key):
+        """Fetches a result from the network and caches it, including negative results."""
+        try:
+            result = {"status": "ok", "text": self.fetcher(query, self.sentences)}
+            self.cache.set(key, result)
+        except PageNotFound:
+            result = {"status": "not_found"}
+            self.cache.set(key, result, ttl=self.negative_ttl)
+        except AmbiguousQuery:
+            result = {"status": "ambiguous"}
+            self.cache.set(key, result, ttl=self.negative_ttl)
+        logging.info(f"Wikipedia lookup for '{query}': {result['status']}")
+        return result
+
+    def stats(self):
+        """Returns the cache hit/miss counters."""
+        return self.cache.stats()